@@ -1,4 +1,5 @@
 import pygame
+import fontcache
 import sys
 
 # Initialize pygame
@@ -21,9 +22,12 @@ FILE_SELECT = 0
 GAME_PLAY = 1
 current_state = FILE_SELECT
 
-# Fonts
-title_font = pygame.font.SysFont('Arial', 64)
-prompt_font = pygame.font.SysFont('Arial', 32)
+# Fonts, rendered through the shared font registry and text cache
+def render_title(text, color):
+    return fontcache.render_text(text, 64, color, 'Arial', sysfont=True)
+
+def render_prompt(text, color):
+    return fontcache.render_text(text, 32, color, 'Arial', sysfont=True)
 
 # Player attributes
 player_x = 100
@@ -44,12 +48,12 @@ def draw_file_select():
     screen.fill(BLUE)
     
     # Draw title
-    title_text = title_font.render("ULTRA MARIO", True, WHITE)
+    title_text = render_title("ULTRA MARIO", WHITE)
     title_rect = title_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/3))
     screen.blit(title_text, title_rect)
     
     # Draw prompt
-    prompt_text = prompt_font.render("PRESS Z OR ENTER", True, WHITE)
+    prompt_text = render_prompt("PRESS Z OR ENTER", WHITE)
     prompt_rect = prompt_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2))
     screen.blit(prompt_text, prompt_rect)
 
@@ -64,7 +68,7 @@ def draw_game():
     pygame.draw.rect(screen, RED, (player_x, player_y, player_width, player_height))
     
     # Draw game info
-    game_info = prompt_font.render("ULTRA MARIO - GAME LOADED", True, BLACK)
+    game_info = render_prompt("ULTRA MARIO - GAME LOADED", BLACK)
     screen.blit(game_info, (20, 20))
 
 def handle_player_movement():
@@ -1,4 +1,5 @@
 import pygame
+import fontcache
 import sys
 import math
 from enum import Enum
@@ -33,18 +34,20 @@ class MenuState(Enum):
 
 class MenuItem:
     """Represents a menu item."""
+    __slots__ = ('text', 'position', 'action', 'font_size', 'is_selected', 'hover_offset')
+
     def __init__(self, text, position, action, font_size=36):
         self.text = text
         self.position = position
         self.action = action
-        self.font = pygame.font.Font(None, font_size)
+        self.font_size = font_size
         self.is_selected = False
         self.hover_offset = 0
 
     def draw(self, surface):
         """Draw the menu item."""
         color = (255, 255, 0) if self.is_selected else (255, 255, 255)
-        text_surface = self.font.render(self.text, True, color)
+        text_surface = fontcache.render_text(self.text, self.font_size, color)
         pos = (self.position[0], self.position[1] + self.hover_offset)
         surface.blit(text_surface, pos)
 
@@ -71,9 +74,6 @@ class MenuSystem:
                      lambda: sys.exit())
         ]
 
-        # Title font
-        self.title_font = pygame.font.Font(None, 72)
-
     def update(self):
         """Update the menu state based on user input."""
         keys = pygame.key.get_pressed()
@@ -92,7 +92,7 @@ class MenuSystem:
     def draw(self, screen):
         """Draw the menu on the screen."""
         screen.fill((0, 0, 40))
-        title_text = self.title_font.render("Super Mario FX Beta", True, (255, 255, 255))
+        title_text = fontcache.render_text("Super Mario FX Beta", 72, (255, 255, 255))
         screen.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 100))
 
         for item in self.menu_items:
@@ -161,6 +161,7 @@ class Game:
                 pygame.quit()
                 run_ursina_game()
                 pygame.init()
+                fontcache.clear()  # Fonts do not survive pygame.quit()
                 self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
                 pygame.display.set_caption("Super Mario FX Beta")
                 self.menu.state = MenuState.MAIN
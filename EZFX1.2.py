@@ -1,4 +1,5 @@
 import pygame
+import fontcache
 import sys
 import math
 from enum import Enum
@@ -11,17 +12,19 @@ class MenuState(Enum):
     PLAYING = "playing"
 
 class MenuItem:
+    __slots__ = ('text', 'position', 'action', 'font_size', 'is_selected', 'hover_offset')
+
     def __init__(self, text, position, action, font_size=36):
         self.text = text
         self.position = position
         self.action = action
-        self.font = pygame.font.Font(None, font_size)
+        self.font_size = font_size
         self.is_selected = False
         self.hover_offset = 0
 
     def draw(self, surface):
         color = (255, 0, 0) if self.is_selected else (255, 255, 255)
-        text_surface = self.font.render(self.text, True, color)
+        text_surface = fontcache.render_text(self.text, self.font_size, color)
         pos = (self.position[0], self.position[1] + self.hover_offset)
         surface.blit(text_surface, pos)
 
@@ -46,8 +49,6 @@ class MenuSystem:
                      lambda: sys.exit())
         ]
 
-        self.title_font = pygame.font.Font(None, 72)
-
     def update(self):
         current_time = pygame.time.get_ticks()
         if current_time - self.last_input_time < 200:
@@ -77,7 +78,7 @@ class MenuSystem:
 
     def draw(self, screen):
         screen.fill((0, 0, 0))
-        title_text = self.title_font.render("Super Mario FX 1.0", True, (255, 0, 0))
+        title_text = fontcache.render_text("Super Mario FX 1.0", 72, (255, 0, 0))
         screen.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 100))
 
         for item in self.menu_items:
@@ -339,6 +340,7 @@ class Game:
                 run_mario_fx()
                 # When Ursina app ends, re-init pygame for menu
                 pygame.init()
+                fontcache.clear()  # Fonts do not survive pygame.quit()
                 self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
                 pygame.display.set_caption("Super Mario FX 1.0")
                 self.menu.state = MenuState.MAIN
@@ -349,9 +351,8 @@ class Game:
 
             elif self.menu.state == MenuState.CREDITS:
                 self.screen.fill((0, 0, 0))
-                credits_font = pygame.font.Font(None, 48)
-                credits_text = credits_font.render("Super Mario FX 1.0", True, (255, 0, 0))
-                credit_line2 = credits_font.render("A Fan Project", True, (255, 255, 255))
+                credits_text = fontcache.render_text("Super Mario FX 1.0", 48, (255, 0, 0))
+                credit_line2 = fontcache.render_text("A Fan Project", 48, (255, 255, 255))
                 self.screen.blit(credits_text, (
                     self.screen_width // 2 - credits_text.get_width() // 2,
                     self.screen_height // 2 - 40
@@ -1,4 +1,5 @@
 import pygame
+import fontcache
 import sys
 import math
 from enum import Enum
@@ -17,8 +18,7 @@ class FTRender:
         self.surface.fill((0, 0, 0, 0))
 
     def draw_text(self, text, position, color=(255, 255, 255), font_size=36, font_name=None):
-        font = pygame.font.Font(font_name, font_size) if font_name else pygame.font.Font(None, font_size)
-        text_surface = font.render(text, True, color)
+        text_surface = fontcache.render_text(text, font_size, color, font_name)
         self.surface.blit(text_surface, position)
 
     def draw_rect(self, rect, color):
@@ -34,6 +34,8 @@ class MenuState(Enum):
     CREDITS = "credits"
 
 class MenuItem:
+    __slots__ = ('text', 'position', 'action', 'is_selected', 'hover_offset')
+
     def __init__(self, text, position, action):
         self.text = text
         self.position = position
@@ -0,0 +1,39 @@
+# bench_batched_env.py
+###
+# Environment steps per second for BatchedEnv as the number of worlds grows,
+# against stepping headless Game instances one after another.
+# Run: python bench_batched_env.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import time
+import numpy as np
+from ezgunnerinfdevpt2 import BatchedEnv, Game
+from headless import ScriptedInput
+
+WORLD_COUNTS = [1, 16, 256, 1024, 4096, 16384]
+SERIAL_STEPS = 2000
+TARGET_STEPS = 200000  # Environment steps per measurement
+
+def main():
+    game = Game(headless=True)
+    inputs = ScriptedInput.random(SERIAL_STEPS)
+    start = time.perf_counter()
+    game.run_headless(inputs, record_every=0)
+    serial = SERIAL_STEPS / (time.perf_counter() - start)
+    print(f"Game.run_headless: {serial:.0f} steps/s")
+
+    print(f"{'worlds':>7} {'batch us':>9} {'steps/s':>11} {'speedup':>8}")
+    for count in WORLD_COUNTS:
+        env = BatchedEnv(count)
+        env.reset()
+        batches = max(50, TARGET_STEPS // count)
+        actions = [env.sample_actions() for _ in range(16)]
+        start = time.perf_counter()
+        for batch in range(batches):
+            env.step(actions[batch % len(actions)])
+        elapsed = (time.perf_counter() - start) / batches
+        rate = count / elapsed
+        print(f"{count:>7} {elapsed * 1e6:>9.0f} {rate:>11.0f} {rate / serial:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_effect_executor.py
+###
+# Time of FTRender's post-processing passes (FX perspective, ASCII, Mode 7)
+# when the EffectExecutor cuts the frame into horizontal bands across 1, 2,
+# 4 and 8 worker threads. Speedup needs as many cores; on one core the extra
+# bands only show the executor's overhead.
+# Run: python bench_effect_executor.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import time
+import numpy as np
+import pygame
+from testengine import EffectExecutor, FTRender
+
+WORKERS = [1, 2, 4, 8]
+SIZES = [(800, 600), (1920, 1080)]
+FRAMES = 60
+
+def make_surface(size, rng):
+    surface = pygame.Surface(size).convert()
+    pygame.surfarray.blit_array(surface, rng.integers(0, 256, size + (3,), dtype=np.uint8))
+    return surface
+
+def passes(renderer, frame, texture, floor):
+    return {
+        'fx_perspective': lambda: renderer.apply_fx_perspective(frame, 0, 0),
+        'ascii': lambda: renderer.surface_to_ascii(frame),
+        'mode7': lambda: renderer.render_mode7(floor, texture, 512.0, 512.0, 0.3),
+    }
+
+def time_pass(run):
+    run()  # Warm the scratch tables and buffers
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        run()
+    return (time.perf_counter() - start) / FRAMES
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    rng = np.random.default_rng(0)
+    texture = make_surface((256, 256), rng)
+    print(f"{os.cpu_count()} CPU(s), {FRAMES} frames per pass, ms per frame")
+    print(f"{'size':>10} {'pass':>15} " + ' '.join(f"{f'{workers} thr':>8}" for workers in WORKERS))
+    for size in SIZES:
+        frame = make_surface(size, rng)
+        floor = pygame.Surface(size).convert()
+        results = {}
+        for workers in WORKERS:
+            renderer = FTRender(*size)
+            renderer.effects.shutdown()
+            renderer.effects = EffectExecutor(workers)
+            for name, run in passes(renderer, frame, texture, floor).items():
+                results.setdefault(name, []).append(time_pass(run))
+            renderer.close()
+        for name, times in results.items():
+            print(f"{'%dx%d' % size:>10} {name:>15} " + ' '.join(f"{t * 1000:>8.2f}" for t in times))
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# bench_entity_memory.py
+###
+# Bytes per entity and attribute read time for the slot-based record types,
+# against dict-backed twins of the same classes (what they were before
+# __slots__). Run: python bench_entity_memory.py
+import gc
+import importlib.util
+import os
+import time
+import tracemalloc
+import pygame
+import testengine
+import ezgunnerinfdevpt2
+
+INSTANCE_COUNTS = [10000, 100000]
+
+def load_ezguner():
+    # ezguner2.0.py has a dot in its name, load it by path
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ezguner2.0.py')
+    spec = importlib.util.spec_from_file_location('ezguner2', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def dict_backed(cls):
+    # Same methods and properties, but instances keep their attributes in a __dict__
+    skip = set(cls.__slots__) | {'__slots__', '__dict__', '__weakref__'}
+    return type(cls.__name__, (), {name: value for name, value in cls.__dict__.items() if name not in skip})
+
+def measure(factory, count, attribute):
+    gc.collect()
+    tracemalloc.start()
+    instances = [factory(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for instance in instances:
+        getattr(instance, attribute)
+    read = (time.perf_counter() - start) / count
+    del instances
+    return size / count, read
+
+def main():
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    ezguner = load_ezguner()
+    texture = pygame.Surface((24, 32))
+    sheet = ezguner.SpriteSheet(scale=2)
+    world = ezgunnerinfdevpt2.PhysicsWorld()
+
+    # name, class, constructor, attribute read in the hot loops
+    entities = [
+        ('RenderObject', testengine.RenderObject, lambda cls, i: cls(texture, (i, i)), 'position'),
+        ('testengine.GameObject', testengine.GameObject, lambda cls, i: cls(i, i, 24, 32), 'velocity'),
+        ('ezgunner.GameObject', ezgunnerinfdevpt2.GameObject, lambda cls, i: cls(world, i, i, 24, 32), 'physics'),
+        ('PhysicsComponent', ezgunnerinfdevpt2.PhysicsComponent, lambda cls, i: cls(world, 0), 'velocity'),
+        ('AnimatedSprite', ezguner.AnimatedSprite, lambda cls, i: cls(sheet, 'goomba', i, i), 'x'),
+    ]
+
+    print(f"{'entity':<22} {'count':>7} {'dict B':>8} {'slots B':>8} {'saved':>6} {'dict ns':>8} {'slots ns':>9}")
+    for name, cls, make, attribute in entities:
+        before_cls = dict_backed(cls)
+        for count in INSTANCE_COUNTS:
+            world.count = 0  # Reuse the same body rows for every run
+            before, before_read = measure(lambda i: make(before_cls, i), count, attribute)
+            world.count = 0
+            after, after_read = measure(lambda i: make(cls, i), count, attribute)
+            print(f"{name:<22} {count:>7} {before:>8.0f} {after:>8.0f} {1 - after / before:>6.0%} "
+                  f"{before_read * 1e9:>8.1f} {after_read * 1e9:>9.1f}")
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
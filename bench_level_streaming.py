@@ -0,0 +1,70 @@
+# bench_level_streaming.py
+###
+# Writes a stage hundreds of screens long in the chunked level format and
+# scrolls a camera across it with LevelStreamer, against loading every
+# platform up front. Run: python bench_level_streaming.py
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import pygame
+from testengine import LevelFile, LevelStreamer, SpatialHash, write_level, LEVEL_TILE_SIZE, SPAWN_PLAYER
+
+SCREENS = 500
+SCREEN_WIDTH = 800
+PLATFORMS_PER_SCREEN = 100
+CAMERA_STEP = 16  # World pixels the camera scrolls per update
+
+def make_stage(rng):
+    width = SCREENS * SCREEN_WIDTH
+    platforms = [(rng.randrange(width), rng.randrange(100, 560), rng.randrange(50, 400), 20)
+                 for _ in range(SCREENS * PLATFORMS_PER_SCREEN)]
+    tiles = [(col, 18, 1) for col in range(width // LEVEL_TILE_SIZE)]  # Ground row
+    spawns = [(100, 400, SPAWN_PLAYER)] + [(rng.randrange(width), 500, 1) for _ in range(SCREENS * 4)]
+    return platforms, tiles, spawns
+
+def main():
+    rng = random.Random(0)
+    platforms, tiles, spawns = make_stage(rng)
+    path = os.path.join(tempfile.mkdtemp(), 'stage.ftlv')
+    start = time.perf_counter()
+    write_level(path, platforms, tiles, spawns)
+    print(f"{SCREENS} screens, {len(platforms)} platforms, {len(tiles)} tiles: "
+          f"{os.path.getsize(path) / 1024:.0f} KiB written in {time.perf_counter() - start:.2f} s")
+
+    # Everything resident: what create_level does today
+    tracemalloc.start()
+    rects = [pygame.Rect(p) for p in platforms]
+    index = SpatialHash()
+    index.build(rects)
+    full = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rects, index
+
+    # Streaming across the whole stage
+    with LevelFile(path) as level:
+        tracemalloc.start()
+        streamer = LevelStreamer(level)
+        worst = total = 0.0
+        updates = peak_platforms = peak_chunks = 0
+        for camera_x in range(0, level.width - SCREEN_WIDTH, CAMERA_STEP):
+            start = time.perf_counter()
+            streamer.update(camera_x, SCREEN_WIDTH)
+            elapsed = time.perf_counter() - start
+            worst = max(worst, elapsed)
+            total += elapsed
+            updates += 1
+            peak_platforms = max(peak_platforms, len(streamer.platforms))
+            peak_chunks = max(peak_chunks, len(streamer.resident))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        stats = streamer.stats()
+
+    print(f"full load:  {len(platforms)} platforms resident, {full / 1024 / 1024:.1f} MiB")
+    print(f"streaming:  at most {peak_platforms} platforms in {peak_chunks} chunks, peak {peak / 1024:.0f} KiB")
+    print(f"updates:    {updates}, mean {total / updates * 1e6:.0f} us, worst {worst * 1000:.2f} ms "
+          f"({stats['loads']} loads, {stats['unloads']} unloads)")
+
+if __name__ == "__main__":
+    main()
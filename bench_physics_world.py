@@ -0,0 +1,85 @@
+# bench_physics_world.py
+###
+# Simulation step cost against the body count: the per-object Vector2
+# update that GameObject used to run versus one PhysicsWorld.step.
+# Run: python bench_physics_world.py
+import random
+import time
+import pygame
+from ezgunnerinfdevpt2 import (GameObject, PhysicsWorld, SpatialHash, FRICTION, FRICTION_HZ, GRAVITY,
+                               TERMINAL_VELOCITY, SIMULATION_HZ)
+
+BODY_COUNTS = [100, 1000, 10000, 50000]
+PLATFORM_COUNT = 2000
+LEVEL_SIZE = 8000
+FRAME_BUDGET_MS = 1000 / 60
+
+class ScalarBody:
+    # The old per-object path: Vector2 state and a fresh acceleration per step
+    def __init__(self, x, y, width, height):
+        self.position = pygame.math.Vector2(x, y)
+        self.velocity = pygame.math.Vector2(0, 0)
+        self.acceleration = pygame.math.Vector2(0, GRAVITY)
+        self.collision = pygame.Rect(x, y, width, height)
+        self.on_ground = False
+
+    def update(self, dt, platform_index):
+        self.velocity += self.acceleration * dt
+        self.velocity.x *= FRICTION ** (dt * FRICTION_HZ)
+        self.velocity.y = min(TERMINAL_VELOCITY, max(-TERMINAL_VELOCITY, self.velocity.y))
+        self.acceleration = pygame.math.Vector2(0, GRAVITY)
+        self.position += self.velocity * dt
+        self.collision.x = self.position.x
+        self.collision.y = self.position.y
+        self.on_ground = False
+        for platform in platform_index.query(self.collision):
+            if self.collision.colliderect(platform):
+                if self.velocity.y > 0:
+                    self.collision.bottom = platform.top
+                    self.position.y = self.collision.y
+                    self.velocity.y = 0
+                    self.on_ground = True
+                elif self.velocity.y < 0:
+                    self.collision.top = platform.bottom
+                    self.position.y = self.collision.y
+                    self.velocity.y = 0
+
+def main():
+    rng = random.Random(0)
+    platforms = [pygame.Rect(rng.randrange(LEVEL_SIZE), rng.randrange(LEVEL_SIZE), rng.randrange(50, 250), 20)
+                 for _ in range(PLATFORM_COUNT)]
+    platform_index = SpatialHash()
+    platform_index.build(platforms)
+    dt = 1.0 / SIMULATION_HZ
+
+    print(f"{PLATFORM_COUNT} platforms, times per simulation step")
+    print(f"{'bodies':>8} {'objects ms':>11} {'world ms':>9} {'speedup':>8} {'60 Hz load':>11}")
+    for count in BODY_COUNTS:
+        spawns = [(rng.uniform(0, LEVEL_SIZE), rng.uniform(0, LEVEL_SIZE)) for _ in range(count)]
+        bodies = [ScalarBody(x, y, 24, 32) for x, y in spawns]
+        world = PhysicsWorld()
+        handles = [GameObject(world, x, y, 24, 32) for x, y in spawns]
+        world.set_platforms(platform_index)
+        steps = max(5, 20000 // count)
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            for body in bodies:
+                body.update(dt, platform_index)
+        scalar = (time.perf_counter() - start) / steps
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            world.step(dt)
+        vectorized = (time.perf_counter() - start) / steps
+
+        # Both paths must agree body for body
+        assert all(body.position.x == handle.position.x and body.position.y == handle.position.y
+                   for body, handle in zip(bodies, handles))
+
+        # Load at one step per 60 Hz frame
+        print(f"{count:>8} {scalar * 1000:>11.2f} {vectorized * 1000:>9.3f} {scalar / vectorized:>7.0f}x "
+              f"{vectorized * 1000 / FRAME_BUDGET_MS:>10.0%}")
+
+if __name__ == "__main__":
+    main()
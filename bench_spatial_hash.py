@@ -0,0 +1,53 @@
+# bench_spatial_hash.py
+###
+# Per-step collision cost against the level size: the old loop over every
+# platform versus the SpatialHash broadphase from testengine.
+# Run: python bench_spatial_hash.py
+import random
+import time
+import pygame
+from testengine import GameObject, SpatialHash, SIMULATION_HZ
+
+PLATFORM_COUNTS = [10, 100, 1000, 10000, 100000]
+OBJECT_COUNT = 16
+PLATFORM_DENSITY = 300  # World pixels per platform side, levels grow with the count
+
+def make_level(count, rng):
+    side = int(count ** 0.5 * PLATFORM_DENSITY) + 800
+    platforms = [pygame.Rect(rng.randrange(side), rng.randrange(side), rng.randrange(50, 250), 20)
+                 for _ in range(count)]
+    objects = [GameObject(rng.randrange(side), rng.randrange(side), 24, 32) for _ in range(OBJECT_COUNT)]
+    return platforms, objects
+
+def time_steps(objects, candidates, steps):
+    dt = 1.0 / SIMULATION_HZ
+    start = time.perf_counter()
+    for _ in range(steps):
+        for obj in objects:
+            obj.update(dt)
+            obj.check_collision(candidates(obj))
+    return (time.perf_counter() - start) / steps
+
+def main():
+    print(f"{OBJECT_COUNT} objects, times per simulation step")
+    print(f"{'platforms':>10} {'brute ms':>10} {'hash ms':>10} {'speedup':>8} {'build ms':>9} {'cells':>8}")
+    for count in PLATFORM_COUNTS:
+        rng = random.Random(count)
+        platforms, objects = make_level(count, rng)
+        # Keep the brute-force runs short on the big levels
+        steps = max(3, min(200, 200000 // count))
+
+        brute = time_steps([GameObject(o.position.x, o.position.y, o.width, o.height) for o in objects],
+                           lambda obj: platforms, steps)
+
+        start = time.perf_counter()
+        index = SpatialHash()
+        index.build(platforms)
+        build = time.perf_counter() - start
+        hashed = time_steps(objects, lambda obj: index.query(obj.bounds()), max(steps, 200))
+
+        print(f"{count:>10} {brute * 1000:>10.3f} {hashed * 1000:>10.3f} {brute / hashed:>7.0f}x "
+              f"{build * 1000:>9.1f} {len(index.cells):>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# bench_split_render.py
+###
+# Single-process ezgunnerinfdevpt2 (step, then render) against the split
+# runtime, where a simulation process publishes frames through shared memory
+# and this process only draws, both uncapped.
+# Run: python bench_split_render.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import time
+import pygame
+from splitrender import SplitRuntime, make_game
+
+ENTITY_COUNTS = [1000, 10000, 50000]
+DURATION = 3.0  # Seconds measured per mode
+STEPS_PER_FRAME = 2  # 120 Hz simulation under 60 Hz frames
+NO_INPUT = {key: False for key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_a, pygame.K_d, pygame.K_w)}
+
+def single(entities):
+    game = make_game(entities, 0, headless=True)
+    frames = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        for _ in range(STEPS_PER_FRAME):
+            game.handle_input(NO_INPUT)
+            game.update(game.timestep.step)
+        game.render(1.0)
+        frames += 1
+    elapsed = time.perf_counter() - start
+    return frames / elapsed, frames * STEPS_PER_FRAME / elapsed
+
+def split(entities):
+    runtime = SplitRuntime(entities, headless=True, uncapped=True)
+    try:
+        while not runtime.frame():
+            time.sleep(0.01)  # Simulation process still starting
+        frames, new_frames, steps = runtime.frames, runtime.new_frames, runtime.ring.steps
+        start = time.perf_counter()
+        while time.perf_counter() - start < DURATION:
+            runtime.frame()
+        elapsed = time.perf_counter() - start
+        stats = ((runtime.frames - frames) / elapsed, (runtime.new_frames - new_frames) / elapsed,
+                 (runtime.ring.steps - steps) / elapsed, runtime.torn)
+    finally:
+        runtime.close()
+    return stats
+
+def main():
+    print(f"{os.cpu_count()} CPU(s), {DURATION:.0f} s per mode")
+    print(f"{'entities':>9} {'single fps':>11} {'steps/s':>8} {'split fps':>10} {'new fps':>8} {'steps/s':>8} "
+          f"{'torn':>5}")
+    for count in ENTITY_COUNTS:
+        single_fps, single_steps = single(count)
+        split_fps, new_fps, split_steps, torn = split(count)
+        print(f"{count:>9} {single_fps:>11.1f} {single_steps:>8.0f} {split_fps:>10.1f} {new_fps:>8.1f} "
+              f"{split_steps:>8.0f} {torn:>5}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# bench_threaded_physics.py
+###
+# Uncapped frame time of testengine's serial loop against the threaded
+# physics loop, where the next frame simulates on a worker thread while the
+# current one is composited. Extra bodies make the physics side heavier.
+# Run: python bench_threaded_physics.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import random
+import time
+import pygame
+from testengine import Game, GameObject, PhysicsThread, RenderObject
+
+BODY_COUNTS = [0, 200, 1000, 3000]
+FRAMES = 120
+STEPS_PER_FRAME = 2  # 120 Hz simulation under 60 Hz frames
+NO_KEYS = {key: False for key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_a, pygame.K_d, pygame.K_w)}
+
+def make_game(bodies, rng):
+    game = Game(headless=True)
+    texture = pygame.Surface((24, 32))
+    texture.fill((200, 200, 0))
+    for _ in range(bodies):
+        obj = GameObject(rng.uniform(0, 800), rng.uniform(0, 500), 24, 32)
+        obj.set_render_object(RenderObject(texture, (obj.position.x, obj.position.y)))
+        game.game_objects.append(obj)
+        game.object_handles.append(game.object_index.insert(obj, obj.bounds()))
+    return game
+
+def serial(game):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        game.handle_input(NO_KEYS)
+        for _ in range(STEPS_PER_FRAME):
+            game.update(game.timestep.step)
+        game.render(1.0)
+    return (time.perf_counter() - start) / FRAMES
+
+def threaded(game):
+    physics = PhysicsThread(game)
+    simulation = wait = 0.0
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        state = physics.collect()
+        simulation += physics.simulation_time
+        wait += physics.wait_time
+        physics.submit(NO_KEYS, STEPS_PER_FRAME, 1.0)
+        game.render(state.alpha, state)
+    elapsed = time.perf_counter() - start
+    physics.stop()
+    return elapsed / FRAMES, simulation / FRAMES, wait / FRAMES
+
+def main():
+    print(f"{os.cpu_count()} CPU(s), {FRAMES} frames of {STEPS_PER_FRAME} steps, times per frame")
+    print(f"{'bodies':>7} {'serial ms':>10} {'threaded ms':>12} {'physics ms':>11} {'wait ms':>8} {'saved':>6}")
+    for count in BODY_COUNTS:
+        serial_time = serial(make_game(count, random.Random(count)))
+        threaded_time, simulation, wait = threaded(make_game(count, random.Random(count)))
+        print(f"{count:>7} {serial_time * 1000:>10.2f} {threaded_time * 1000:>12.2f} {simulation * 1000:>11.2f} "
+              f"{wait * 1000:>8.2f} {1 - threaded_time / serial_time:>6.0%}")
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import pygame
+import fontcache
 import sys
 import math
 from enum import Enum
@@ -25,18 +26,20 @@ class MenuState(Enum):
 
 class MenuItem:
     """Menu item with hover effects."""
+    __slots__ = ('text', 'position', 'action', 'font_size', 'is_selected', 'hover_offset')
+
     def __init__(self, text, position, action, font_size=36):
         self.text = text
         self.position = position
         self.action = action
-        self.font = pygame.font.Font(None, font_size)
+        self.font_size = font_size
         self.is_selected = False
         self.hover_offset = 0
 
     def draw(self, surface):
         """Draw menu item with selection effects."""
         color = (255, 255, 0) if self.is_selected else (255, 255, 255)
-        text_surface = self.font.render(self.text, True, color)
+        text_surface = fontcache.render_text(self.text, self.font_size, color)
         pos = (self.position[0], self.position[1] + self.hover_offset)
         surface.blit(text_surface, pos)
 
@@ -77,8 +80,6 @@ class MenuSystem:
                      lambda: setattr(self, 'state', MenuState.MAIN))
         ]
 
-        self.title_font = pygame.font.Font(None, 72)
-
     def run_game(self, game_id):
         """Launch selected game."""
         self.state = MenuState.PLAYING
@@ -128,13 +129,13 @@ class MenuSystem:
         screen.fill((0, 0, 40))
         
         if self.state == MenuState.MAIN:
-            title_text = self.title_font.render("Super Mario FX Beta", True, (255, 255, 255))
+            title_text = fontcache.render_text("Super Mario FX Beta", 72, (255, 255, 255))
             screen.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 100))
             for item in self.menu_items:
                 item.draw(screen)
         
         elif self.state == MenuState.GAME_SELECT:
-            title_text = self.title_font.render("Select a Game", True, (255, 255, 255))
+            title_text = fontcache.render_text("Select a Game", 72, (255, 255, 255))
             screen.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 100))
             for item in self.game_select_items:
                 item.draw(screen)
@@ -215,6 +216,7 @@ class Game:
                 
                 # Reinitialize pygame after game ends
                 pygame.init()
+                fontcache.clear()  # Fonts do not survive pygame.quit()
                 self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
                 pygame.display.set_caption("Super Mario FX Beta")
                 self.menu.state = MenuState.MAIN
@@ -227,8 +229,7 @@ class Game:
 
             elif self.menu.state == MenuState.CREDITS:
                 self.screen.fill((0, 0, 0))
-                credits_font = pygame.font.Font(None, 48)
-                credits_text = credits_font.render("Credits: Made by Gemini", True, (255, 255, 255))
+                credits_text = fontcache.render_text("Credits: Made by Gemini", 48, (255, 255, 255))
                 self.screen.blit(credits_text, (
                     self.screen_width // 2 - credits_text.get_width() // 2,
                     self.screen_height // 2 - 20
@@ -1,4 +1,6 @@
 import pygame
+from collections import OrderedDict
+import numpy as np
 import json  # Retained in case you plan to use it elsewhere
 ## [C] Team Flames 20XX
 
@@ -6,6 +8,44 @@ import json  # Retained in case you plan to use it elsewhere
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 TILE_SIZE = 40
+TRANSFORM_CACHE_BUDGET = 16 * 1024 * 1024  # Bytes of cached sprite variants
+TRANSFORM_ROTATION_STEP = 1.0  # Degrees per cached rotation step
+ATLAS_MAX_SIZE = 1024  # Largest sprite atlas page, in pixels per side
+
+# Fixed-timestep simulation. Speeds are in pixels per 60 Hz frame and are
+# scaled by the step length, so any SIMULATION_HZ moves at the same speed.
+SIMULATION_HZ = 120
+MAX_CATCHUP_STEPS = 8  # Simulation steps per rendered frame before dropping time
+FRAME_MS = 1000 / 60
+
+# Tile collision flags, one byte per tile
+TILE_EMPTY = 0
+TILE_SOLID = 1
+TILE_ONE_WAY = 2  # Platform that is only solid from above
+TILE_SLOPE_UP = 4  # 45 degree floor rising to the right
+TILE_SLOPE_DOWN = 8  # 45 degree floor falling to the right
+TILE_SLOPES = TILE_SLOPE_UP | TILE_SLOPE_DOWN
+TILE_CHARS = {'#': TILE_SOLID, '-': TILE_ONE_WAY, '/': TILE_SLOPE_UP, '\\': TILE_SLOPE_DOWN}
+COLLISION_EPSILON = 0.001
+
+# Level layout in TILE_SIZE tiles (20 x 15 fills the screen)
+LEVEL_MAP = [
+    '....................',
+    '....................',
+    '....................',
+    '....................',
+    '....................',
+    '....................',
+    '....................',
+    '....................',
+    '....................',
+    '............####....',
+    '....................',
+    '...-----............',
+    '....................',
+    '........./\\.........',
+    '####################',
+]
 
 # Animation states
 IDLE = 'idle'
@@ -32,34 +72,205 @@ COLOR_MAP = {
     }
 }
 
+class TransformCache:
+    def __init__(self, budget_bytes=TRANSFORM_CACHE_BUDGET, rotation_step=TRANSFORM_ROTATION_STEP):
+        """
+        Flipped/scaled/rotated sprite variants keyed by (source, scale, rotation
+        step, flip_x, flip_y), evicted least recently used first once the pixel
+        memory goes over budget_bytes.
+        """
+        self.entries = OrderedDict()
+        self.budget_bytes = budget_bytes
+        self.rotation_step = rotation_step
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source: pygame.Surface, scale: float = 1.0, rotation: float = 0.0,
+            flip_x: bool = False, flip_y: bool = False) -> pygame.Surface:
+        """Return the transformed variant of source, building it on a miss."""
+        steps = int(round(rotation / self.rotation_step)) % int(round(360 / self.rotation_step))
+        if scale == 1.0 and steps == 0 and not flip_x and not flip_y:
+            return source
+        key = (source, scale, steps, flip_x, flip_y)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = source
+        if flip_x or flip_y:
+            surface = pygame.transform.flip(surface, flip_x, flip_y)
+        if scale != 1.0:
+            width, height = source.get_size()
+            surface = pygame.transform.scale(surface, (round(width * scale), round(height * scale)))
+        if steps:
+            surface = pygame.transform.rotate(surface, steps * self.rotation_step)
+
+        size = surface.get_pitch() * surface.get_height()
+        if size <= self.budget_bytes:
+            while self.used_bytes + size > self.budget_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.used_bytes -= evicted.get_pitch() * evicted.get_height()
+                self.evictions += 1
+            self.entries[key] = surface
+            self.used_bytes += size
+        return surface
+
+    def prewarm(self, sources, scales=(1.0,), rotations=(0.0,), flips=((False, False),)):
+        """Build variants at load time so the first frames do not stall."""
+        for source in sources:
+            for scale in scales:
+                for rotation in rotations:
+                    for flip_x, flip_y in flips:
+                        self.get(source, scale, rotation, flip_x, flip_y)
+
+    def clear(self):
+        """Drop every cached variant."""
+        self.entries.clear()
+        self.used_bytes = 0
+
+    def stats(self) -> dict:
+        """Cache size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.used_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+# Scaled and mirrored sprite frames shared by every AnimatedSprite
+transform_cache = TransformCache()
+
+def pack_frames(sizes, max_size=ATLAS_MAX_SIZE):
+    """
+    Shelf-pack (width, height) sizes into atlas pages of at most max_size
+    pixels per side. Returns a (page, Rect) per size, in input order, and
+    the size of every page.
+    """
+    placements = [None] * len(sizes)
+    page_sizes = []
+    page = -1
+    x = y = shelf_height = page_width = 0
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True)
+    for i in order:
+        width, height = sizes[i]
+        if page < 0 or x + width > max_size:
+            # Start a new shelf, or a new page when this one is full
+            y += shelf_height
+            x = shelf_height = 0
+            if page < 0 or y + height > max_size:
+                if page >= 0:
+                    page_sizes[page] = (page_width, y)
+                page += 1
+                page_sizes.append((0, 0))
+                y = page_width = 0
+        placements[i] = (page, pygame.Rect(x, y, width, height))
+        x += width
+        shelf_height = max(shelf_height, height)
+        page_width = max(page_width, x)
+    if page >= 0:
+        page_sizes[page] = (page_width, y + shelf_height)
+    return placements, page_sizes
+
+# Animation frames generated for every character
+FRAME_COUNTS = {
+    'mario': {IDLE: 1, WALKING: 3, JUMPING: 1},
+    'luigi': {IDLE: 1, WALKING: 3, JUMPING: 1},
+    'goomba': {WALKING: 2},
+    'koopa': {WALKING: 2}
+}
+
+class FixedTimestep:
+    def __init__(self, step_hz=None, max_steps=None):
+        """
+        Accumulates real frame time (in seconds) and hands it out as fixed
+        simulation steps. `alpha` is how far the render time sits between
+        the last two steps. The defaults are read when constructed so
+        overridden module constants take effect.
+        """
+        self.step = 1.0 / (step_hz or SIMULATION_HZ)
+        self.max_steps = MAX_CATCHUP_STEPS if max_steps is None else max_steps
+        self.accumulator = 0.0
+        self.dropped_steps = 0
+
+    def advance(self, frame_time):
+        """Add a frame's time and return how many steps to simulate."""
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            # Too far behind: give up on the backlog instead of spiralling
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.step + steps * self.step
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a step left in the accumulator, for interpolation."""
+        return self.accumulator / self.step
+
 class SpriteSheet:
-    def __init__(self):
+    def __init__(self, scale=1):
         """
         Instead of loading from a file, generate placeholder sprites.
+        Every frame is packed, already scaled by `scale` and in both facings,
+        into one or a few atlas pages so sprites can be drawn as subrects of
+        a single source surface.
         """
-        self.sprite_locations = {
-            'mario': {
-                IDLE: [self.create_sprite('mario', IDLE)],
-                WALKING: [self.create_sprite('mario', WALKING, i) for i in range(3)],
-                JUMPING: [self.create_sprite('mario', JUMPING)]
-            },
-            'luigi': {
-                IDLE: [self.create_sprite('luigi', IDLE)],
-                WALKING: [self.create_sprite('luigi', WALKING, i) for i in range(3)],
-                JUMPING: [self.create_sprite('luigi', JUMPING)]
-            },
-            'goomba': {
-                WALKING: [self.create_sprite('goomba', WALKING, i) for i in range(2)]
-            },
-            'koopa': {
-                WALKING: [self.create_sprite('koopa', WALKING, i) for i in range(2)]
-            }
-        }
+        self.scale = scale
+        self.font = pygame.font.SysFont(None, 20)
+        self.atlases = []
+        self.frame_rects = {}  # (character, state) -> [(page, right_rect, left_rect)]
+        self.sprite_locations = {}  # character -> state -> [atlas subsurface]
+        self.build_atlas()
+
+    def build_atlas(self):
+        """Render every frame once into the atlas pages and index their rects."""
+        entries = [
+            (character, state, variation)
+            for character, states in FRAME_COUNTS.items()
+            for state, count in states.items()
+            for variation in range(count)
+        ]
+        frame_size = (32 * self.scale, 32 * self.scale)
+        placements, page_sizes = pack_frames([frame_size] * (len(entries) * 2))
+        pages = [pygame.Surface(size, pygame.SRCALPHA) for size in page_sizes]
 
-    def create_sprite(self, character, state, variation=0):
+        # Frames are drawn at base size into one scratch surface, then scaled
+        # (and mirrored) into their atlas slots
+        scratch = pygame.Surface((32, 32), pygame.SRCALPHA)
+        for i, (character, state, variation) in enumerate(entries):
+            self.create_sprite(character, state, variation, scratch)
+            right_page, right_rect = placements[2 * i]
+            left_page, left_rect = placements[2 * i + 1]
+            pygame.transform.scale(scratch, frame_size, pages[right_page].subsurface(right_rect))
+            pygame.transform.scale(pygame.transform.flip(scratch, True, False), frame_size,
+                                   pages[left_page].subsurface(left_rect))
+            self.frame_rects.setdefault((character, state), []).append((right_page, right_rect, left_rect))
+
+        # Match the display format once so blits from the atlas are fast
+        if pygame.display.get_surface() is not None:
+            pages = [page.convert_alpha() for page in pages]
+        self.atlases = pages
+
+        for (character, state), rects in self.frame_rects.items():
+            self.sprite_locations.setdefault(character, {})[state] = [
+                self.atlases[page].subsurface(right_rect) for page, right_rect, _ in rects
+            ]
+
+    def create_sprite(self, character, state, variation=0, sprite=None):
         """
         Create a placeholder sprite as a colored rectangle.
         Different variations have slight color changes to simulate animation frames.
+        Draws into `sprite` when given instead of allocating a new surface.
         """
         width, height = 32, 32  # Base size before scaling
         color = COLOR_MAP.get(character, {}).get(state, (255, 255, 255))
@@ -68,33 +279,179 @@ class SpriteSheet:
         if variation > 0:
             color = tuple(max(min(c - variation * 20, 255), 0) for c in color)
         
-        sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+        if sprite is None:
+            sprite = pygame.Surface((width, height), pygame.SRCALPHA)
         sprite.fill(color)
         
         # Optionally, draw a simple shape or text to differentiate characters
         pygame.draw.rect(sprite, (0, 0, 0), sprite.get_rect(), 2)  # Black border
         
-        font = pygame.font.SysFont(None, 20)
-        text = font.render(character[0].upper(), True, (0, 0, 0))
+        text = self.font.render(character[0].upper(), True, (0, 0, 0))
         text_rect = text.get_rect(center=(width//2, height//2))
         sprite.blit(text, text_rect)
         
         return sprite
 
+    def get_frame_rects(self, character, state):
+        """Atlas (page, facing-right rect, facing-left rect) for each frame."""
+        return self.frame_rects.get((character, state), [])
+
     def get_animation_frames(self, character, state):
         """Get all frames for a character's animation state."""
         return self.sprite_locations.get(character, {}).get(state, [])
 
+class TileMap:
+    def __init__(self, cols, rows, tile_size=TILE_SIZE):
+        """
+        Collision layer for a tile level: one byte of TILE_* flags per tile,
+        indexed [row, col]. Coordinates past the edges read as the nearest
+        edge tile, so the level extends outward (enemies can walk off-screen
+        on the ground row).
+        """
+        self.tile_size = tile_size
+        self.cols = cols
+        self.rows = rows
+        self.flags = np.zeros((rows, cols), dtype=np.uint8)
+
+    @classmethod
+    def from_rows(cls, rows, tile_size=TILE_SIZE):
+        """Build a map from strings of TILE_CHARS, one string per tile row."""
+        tilemap = cls(max(len(row) for row in rows), len(rows), tile_size)
+        for y, row in enumerate(rows):
+            for x, char in enumerate(row):
+                tilemap.flags[y, x] = TILE_CHARS.get(char, TILE_EMPTY)
+        return tilemap
+
+    def tile_at(self, col, row):
+        """Flags of one tile, O(1)."""
+        col = min(max(col, 0), self.cols - 1)
+        row = min(max(row, 0), self.rows - 1)
+        return self.flags[row, col]
+
+    def is_solid(self, x, y):
+        """Whether the world pixel (x, y) is inside a solid tile."""
+        return bool(self.tile_at(int(x // self.tile_size), int(y // self.tile_size)) & TILE_SOLID)
+
+    def slope_surface(self, flags, col, row, x):
+        """Height of a slope tile's floor under world x."""
+        size = self.tile_size
+        local_x = min(max(x - col * size, 0), size)
+        if flags & TILE_SLOPE_UP:
+            return row * size + size - local_x
+        return row * size + local_x
+
+    def move(self, sprite, dx, dy):
+        """
+        Move `sprite` by (dx, dy) and resolve it against the map, one axis at
+        a time: x against solid walls, then y against solid floors and
+        ceilings, one-way platforms (from above only) and slopes (floor under
+        the sprite's center). Sets `sprite.on_ground` and zeroes the velocity
+        of a blocked axis. Touches only the few tiles around the sprite, so
+        the cost does not depend on the level size.
+        """
+        size = self.tile_size
+        width, height = sprite.width, sprite.height
+        was_on_ground = sprite.on_ground
+        previous_bottom = sprite.y + height
+
+        # Horizontal: only full solids block, slopes are walked up
+        if dx:
+            sprite.x += dx
+            top_row = int(sprite.y // size)
+            bottom_row = int((sprite.y + height - COLLISION_EPSILON) // size)
+            if dx > 0:
+                col = int((sprite.x + width - COLLISION_EPSILON) // size)
+            else:
+                col = int(sprite.x // size)
+            for row in range(top_row, bottom_row + 1):
+                if self.tile_at(col, row) & TILE_SOLID:
+                    sprite.x = col * size - width if dx > 0 else (col + 1) * size
+                    sprite.velocity_x = 0
+                    break
+
+        # Vertical
+        sprite.y += dy
+        sprite.on_ground = False
+        left_col = int(sprite.x // size)
+        right_col = int((sprite.x + width - COLLISION_EPSILON) // size)
+        if dy < 0:
+            row = int(sprite.y // size)
+            for col in range(left_col, right_col + 1):
+                if self.tile_at(col, row) & TILE_SOLID:
+                    sprite.y = (row + 1) * size
+                    sprite.velocity_y = 0
+                    break
+            return
+
+        # Falling (or standing): every row the feet passed through this step
+        first_row = int((previous_bottom - COLLISION_EPSILON) // size)
+        last_row = int((sprite.y + height - COLLISION_EPSILON) // size)
+        for row in range(first_row, last_row + 1):
+            landed = False
+            for col in range(left_col, right_col + 1):
+                flags = self.tile_at(col, row)
+                if flags & TILE_SOLID or (flags & TILE_ONE_WAY and previous_bottom <= row * size + COLLISION_EPSILON):
+                    landed = True
+                    break
+            if landed:
+                sprite.y = row * size - height
+                sprite.velocity_y = 0
+                sprite.on_ground = True
+                break
+
+        # Slopes under the center; stick to them walking downhill
+        center_x = sprite.x + width / 2
+        col = int(center_x // size)
+        bottom = sprite.y + height
+        feet_row = int((bottom - COLLISION_EPSILON) // size)
+        snap = size / 2 if was_on_ground else 0
+        for row in (feet_row - 1, feet_row, feet_row + 1):
+            flags = self.tile_at(col, row)
+            if flags & TILE_SLOPES:
+                surface = self.slope_surface(flags, col, row, center_x)
+                if surface - snap <= bottom <= surface + size:
+                    sprite.y = surface - height
+                    sprite.velocity_y = 0
+                    sprite.on_ground = True
+                    break
+
+    def render(self, color=(34, 139, 34), one_way_color=(139, 69, 19)):
+        """Draw the whole map once into a transparent surface."""
+        size = self.tile_size
+        surface = pygame.Surface((self.cols * size, self.rows * size), pygame.SRCALPHA)
+        for row, col in zip(*np.nonzero(self.flags)):
+            flags = self.flags[row, col]
+            x, y = int(col) * size, int(row) * size
+            if flags & TILE_SOLID:
+                surface.fill(color, (x, y, size, size))
+            elif flags & TILE_ONE_WAY:
+                surface.fill(one_way_color, (x, y, size, size // 4))
+            elif flags & TILE_SLOPE_UP:
+                pygame.draw.polygon(surface, color, [(x, y + size), (x + size, y), (x + size, y + size)])
+            elif flags & TILE_SLOPE_DOWN:
+                pygame.draw.polygon(surface, color, [(x, y), (x + size, y + size), (x, y + size)])
+        return surface
+
 class AnimatedSprite:
+    __slots__ = (
+        'x', 'y', 'previous_x', 'previous_y', 'scale', 'velocity_x', 'velocity_y', 'on_ground',
+        'facing_right', 'character', 'current_state', 'sprite_sheet', 'animations', 'frame_scale',
+        'frame_rects', 'current_frame', 'animation_timer', 'animation_speed', 'width', 'height'
+    )
+
     def __init__(self, sprite_sheet, character, x, y, scale=2):
         self.x = x
         self.y = y
+        self.previous_x = x  # Position before the last simulation step
+        self.previous_y = y
         self.scale = scale
         self.velocity_x = 0
         self.velocity_y = 0
+        self.on_ground = False
         self.facing_right = True
         self.character = character
         self.current_state = IDLE
+        self.sprite_sheet = sprite_sheet
         
         # Load animations
         self.animations = {
@@ -106,6 +463,16 @@ class AnimatedSprite:
         # Remove empty animation states
         self.animations = {state: frames for state, frames in self.animations.items() if frames}
         
+        # Frames already packed at this scale are drawn straight from the
+        # atlas; otherwise build the rescaled frames for both facings up front
+        self.frame_scale = scale / sprite_sheet.scale
+        self.frame_rects = {state: sprite_sheet.get_frame_rects(character, state) for state in self.animations}
+        if self.frame_scale != 1:
+            transform_cache.prewarm(
+                [frame for frames in self.animations.values() for frame in frames],
+                scales=(self.frame_scale,), flips=((False, False), (True, False))
+            )
+        
         # Animation properties
         self.current_frame = 0
         self.animation_timer = 0
@@ -115,14 +482,20 @@ class AnimatedSprite:
         initial_frames = self.animations.get(IDLE) or self.animations.get(WALKING) or self.animations.get(JUMPING)
         if initial_frames:
             first_frame = initial_frames[0]
-            self.width = first_frame.get_width() * scale
-            self.height = first_frame.get_height() * scale
+            self.width = int(first_frame.get_width() * self.frame_scale)
+            self.height = int(first_frame.get_height() * self.frame_scale)
         else:
             # Fallback if no animations are found
             self.width = self.height = 32 * scale
 
-    def update(self, dt):
-        """Update sprite animation and position."""
+    def update(self, dt, tilemap=None):
+        """
+        Update sprite animation and position for a `dt` millisecond step,
+        resolving the movement against `tilemap` when one is given.
+        """
+        self.previous_x = self.x
+        self.previous_y = self.y
+        
         # Update animation frame
         self.animation_timer += dt
         frames = self.animations.get(self.current_state, [])
@@ -132,27 +505,47 @@ class AnimatedSprite:
                 self.current_frame = (self.current_frame + 1) % len(frames)
         
         # Update position
-        self.x += self.velocity_x
-        self.y += self.velocity_y
+        dx = self.velocity_x * dt / FRAME_MS
+        dy = self.velocity_y * dt / FRAME_MS
+        if tilemap is not None:
+            tilemap.move(self, dx, dy)
+        else:
+            self.x += dx
+            self.y += dy
 
-    def draw(self, surface):
-        """Draw the sprite with current animation frame."""
+    def blit_args(self, alpha=1.0):
+        """
+        Source, position and area of the current frame, for Surface.blits.
+        The position is interpolated `alpha` of the way from the previous step.
+        """
         frames = self.animations.get(self.current_state, [])
         if not frames:
-            return
+            return None
 
-        current_sprite = frames[self.current_frame]
-        
-        # Scale sprite
-        scaled_sprite = pygame.transform.scale(
-            current_sprite, (self.width, self.height)
+        # States have different frame counts, the index may be left over
+        # from the previous state
+        frame = self.current_frame % len(frames)
+        position = (
+            self.previous_x + (self.x - self.previous_x) * alpha,
+            self.previous_y + (self.y - self.previous_y) * alpha
         )
-        
-        # Flip sprite if facing left
-        if not self.facing_right:
-            scaled_sprite = pygame.transform.flip(scaled_sprite, True, False)
-        
-        surface.blit(scaled_sprite, (self.x, self.y))
+
+        if self.frame_scale == 1:
+            page, right_rect, left_rect = self.frame_rects[self.current_state][frame]
+            area = right_rect if self.facing_right else left_rect
+            return self.sprite_sheet.atlases[page], position, area
+
+        # Rescaled and (if facing left) flipped frame from the transform cache
+        current_sprite = transform_cache.get(
+            frames[frame], self.frame_scale, flip_x=not self.facing_right
+        )
+        return current_sprite, position, current_sprite.get_rect()
+
+    def draw(self, surface, alpha=1.0):
+        """Draw the sprite with current animation frame."""
+        args = self.blit_args(alpha)
+        if args:
+            surface.blit(*args)
 
 class Game:
     def __init__(self):
@@ -161,18 +554,28 @@ class Game:
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Super Mario World with Sprites")
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep()
+        
+        # Load sprite sheet (placeholder), packed at the sprites' draw scale
+        self.sprite_sheet = SpriteSheet(scale=2)
         
-        # Load sprite sheet (placeholder)
-        self.sprite_sheet = SpriteSheet()
+        # Screen rect for culling and the last frame's drawn/culled sprite counts
+        self.view = self.screen.get_rect()
+        self.cull_stats = {'drawn': 0, 'culled': 0}
+        
+        # Level collision and its pre-rendered tiles
+        self.tilemap = TileMap.from_rows(LEVEL_MAP)
+        self.level_surface = self.tilemap.render()
+        ground = SCREEN_HEIGHT - TILE_SIZE
         
         # Create characters
-        self.mario = AnimatedSprite(self.sprite_sheet, 'mario', 100, SCREEN_HEIGHT - 64)
-        self.luigi = AnimatedSprite(self.sprite_sheet, 'luigi', 200, SCREEN_HEIGHT - 64)
+        self.mario = AnimatedSprite(self.sprite_sheet, 'mario', 100, ground - 64)
+        self.luigi = AnimatedSprite(self.sprite_sheet, 'luigi', 200, ground - 64)
         
         # Create enemies
         self.enemies = [
-            AnimatedSprite(self.sprite_sheet, 'goomba', 400, SCREEN_HEIGHT - 48),
-            AnimatedSprite(self.sprite_sheet, 'koopa', 600, SCREEN_HEIGHT - 48)
+            AnimatedSprite(self.sprite_sheet, 'goomba', 400, ground - 64),
+            AnimatedSprite(self.sprite_sheet, 'koopa', 600, ground - 64)
         ]
         
         # Physics
@@ -234,26 +637,20 @@ class Game:
         }
         self.handle_character_input(self.luigi, luigi_controls, keys)
 
-    def update(self):
-        dt = self.clock.tick(60)  # Ensure the game runs at 60 FPS and get the time since last tick in ms
-        
+    def update(self, dt):
+        """Advance the simulation by one `dt` millisecond step."""
         # Update players and enemies together
         all_sprites = [self.mario, self.luigi] + self.enemies
         
         for sprite in all_sprites:
             # Apply gravity
-            sprite.velocity_y += self.gravity
-            # Update position and animation
-            sprite.update(dt)
+            sprite.velocity_y += self.gravity * dt / FRAME_MS
+            # Update position and animation, colliding with the level tiles
+            sprite.update(dt, self.tilemap)
             
-            # Ground collision
-            ground_level = SCREEN_HEIGHT - sprite.height
-            if sprite.y >= ground_level:
-                sprite.y = ground_level
-                sprite.velocity_y = 0
-                # Reset state if landing from jump
-                if sprite.current_state == JUMPING:
-                    sprite.current_state = IDLE
+            # Reset state if landing from jump
+            if sprite.on_ground and sprite.current_state == JUMPING:
+                sprite.current_state = IDLE
 
         # Simple enemy logic: always walking left
         for enemy in self.enemies:
@@ -261,18 +658,30 @@ class Game:
             enemy.velocity_x = -2
             # Optional: Add boundary checks to make enemies turn around
             if enemy.x < -enemy.width:
-                enemy.x = SCREEN_WIDTH
+                enemy.x = enemy.previous_x = SCREEN_WIDTH
 
-    def draw(self):
+    def draw(self, alpha=1.0):
         self.screen.fill((135, 206, 235))  # Sky blue background
         
-        # Draw ground
-        ground_rect = pygame.Rect(0, SCREEN_HEIGHT - 32, SCREEN_WIDTH, 32)
-        pygame.draw.rect(self.screen, (34, 139, 34), ground_rect)  # Green ground
+        # Draw the level tiles
+        self.screen.blit(self.level_surface, (0, 0))
         
-        # Draw characters and enemies
+        # Draw the on-screen characters and enemies in one batch from the
+        # sprite atlas
+        batch = []
+        culled = 0
         for sprite in [self.mario, self.luigi] + self.enemies:
-            sprite.draw(self.screen)
+            args = sprite.blit_args(alpha)
+            if not args:
+                continue
+            (x, y), area = args[1], args[2]
+            if self.view.colliderect((x, y, area.width, area.height)):
+                batch.append(args)
+            else:
+                culled += 1
+        self.screen.blits(batch, doreturn=False)
+        self.cull_stats['drawn'] = len(batch)
+        self.cull_stats['culled'] = culled
         
         pygame.display.flip()
 
@@ -283,9 +692,14 @@ class Game:
                 if event.type == pygame.QUIT:
                     running = False
                     
-            self.handle_input()
-            self.update()
-            self.draw()
+            # Simulate in fixed steps (60 FPS render cap), render whatever
+            # time is left as the interpolation alpha. Input is applied
+            # before every step so it acts the same however many run
+            frame_time = self.clock.tick(60) / 1000
+            for _ in range(self.timestep.advance(frame_time)):
+                self.handle_input()
+                self.update(self.timestep.step * 1000)
+            self.draw(self.timestep.alpha)
             
         pygame.quit()
 
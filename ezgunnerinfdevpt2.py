@@ -1,14 +1,21 @@
+import os
+import hashlib
+import struct
 import pygame
 import random
 import math
+import numpy as np
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # FTRender 1.0 System Constants
 RENDER_SCALE = 2
 SUBPIXEL_PRECISION = 4
 MAX_SPRITES = 128
 SCANLINE_BUFFER_SIZE = 256
+TRANSFORM_CACHE_BUDGET = 16 * 1024 * 1024  # Bytes of cached sprite variants
+TRANSFORM_ROTATION_STEP = 1.0  # Degrees per cached rotation step
 
 # FX Beta-specific constants
 PERSPECTIVE_DEPTH = 2.5
@@ -17,9 +24,33 @@ CAMERA_SMOOTHING = 0.15
 GRAVITY = 15.0
 JUMP_FORCE = -450
 RUN_SPEED = 350
-FRICTION = 0.85
+FRICTION = 0.85  # Share of horizontal speed kept per 1/FRICTION_HZ s
+FRICTION_HZ = 60  # Rate FRICTION was tuned at (once per 60 fps frame)
+TERMINAL_VELOCITY = 400
 
-@dataclass
+# Fixed-timestep simulation
+SIMULATION_HZ = 120
+MAX_CATCHUP_STEPS = 8  # Simulation steps per rendered frame before dropping time
+
+# Collision broadphase
+SPATIAL_HASH_CELL_SIZE = 128  # Grid cell size in world pixels
+
+# Game snapshots
+SNAPSHOT_MAGIC = b'EZSS'
+SNAPSHOT_VERSION = 3
+
+# Players and the batched environment
+PLAYER_SPAWNS = [(100, 100), (160, 100)]  # Mario, Luigi
+PLAYER_SIZE = (24, 32)
+CROWD_SIZE = (8, 8)  # Bodies added by Game.add_crowd
+ACTION_LEFT, ACTION_RIGHT, ACTION_JUMP = 0, 1, 2
+ACTIONS_PER_PLAYER = 3
+OBSERVATION_SIZE = 5  # x, y, vx, vy, on_ground per player
+ENV_MAX_STEPS = 20 * SIMULATION_HZ  # Episode length before truncation
+ENV_BOUNDS_MARGIN = 600  # World pixels around the level before a player counts as out
+ENV_OUT_OF_BOUNDS_PENALTY = -100.0
+
+@dataclass(slots=True)
 class RenderObject:
     texture: pygame.Surface
     position: Tuple[float, float]
@@ -28,6 +59,77 @@ class RenderObject:
     layer: int = 0
     perspective_enabled: bool = True
     
+class TransformCache:
+    def __init__(self, budget_bytes: int = TRANSFORM_CACHE_BUDGET, rotation_step: float = TRANSFORM_ROTATION_STEP):
+        # Flipped/scaled/rotated variants keyed by (source, scale, rotation
+        # step, flip_x, flip_y), evicted least recently used first once the
+        # pixel memory goes over budget_bytes
+        self.entries = OrderedDict()
+        self.budget_bytes = budget_bytes
+        self.rotation_step = rotation_step
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source: pygame.Surface, scale: float = 1.0, rotation: float = 0.0,
+            flip_x: bool = False, flip_y: bool = False) -> pygame.Surface:
+        steps = int(round(rotation / self.rotation_step)) % int(round(360 / self.rotation_step))
+        if scale == 1.0 and steps == 0 and not flip_x and not flip_y:
+            return source
+        key = (source, scale, steps, flip_x, flip_y)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = source
+        if flip_x or flip_y:
+            surface = pygame.transform.flip(surface, flip_x, flip_y)
+        if scale != 1.0:
+            width, height = source.get_size()
+            surface = pygame.transform.scale(surface, (round(width * scale), round(height * scale)))
+        if steps:
+            surface = pygame.transform.rotate(surface, steps * self.rotation_step)
+
+        size = surface.get_pitch() * surface.get_height()
+        if size <= self.budget_bytes:
+            while self.used_bytes + size > self.budget_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.used_bytes -= evicted.get_pitch() * evicted.get_height()
+                self.evictions += 1
+            self.entries[key] = surface
+            self.used_bytes += size
+        return surface
+
+    def prewarm(self, sources, scales=(1.0,), rotations=(0.0,), flips=((False, False),)):
+        # Build variants at load time so the first frames do not stall
+        for source in sources:
+            for scale in scales:
+                for rotation in rotations:
+                    for flip_x, flip_y in flips:
+                        self.get(source, scale, rotation, flip_x, flip_y)
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.used_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+# Shared by every GameObject so repeated flips are a cache hit
+transform_cache = TransformCache()
+
 class FTRender:
     def __init__(self, screen_width: int, screen_height: int):
         self.width = screen_width
@@ -36,6 +138,7 @@ class FTRender:
         self.scanline_buffer = [0] * SCANLINE_BUFFER_SIZE
         self.render_objects: List[RenderObject] = []
         self.perspective_angle = 0
+        self._fx_tables_cache = {}
         
     def add_object(self, obj: RenderObject):
         if len(self.render_objects) < MAX_SPRITES:
@@ -46,139 +149,647 @@ class FTRender:
         self.render_buffer.fill((0, 0, 0))
         self.render_objects.clear()
         
+    def _fx_tables(self, width: int, height: int):
+        # The perspective scale and the wave phase only depend on the row, so the
+        # source column for every pixel is built once per buffer size and only
+        # the per-row wave offset changes from frame to frame.
+        key = (width, height)
+        tables = self._fx_tables_cache.get(key)
+        if tables is None:
+            horizon = height * 0.5
+            rows = np.arange(height, dtype=np.float64)
+            scale = np.where(rows > horizon, 1.0 + (rows - horizon) / height * PERSPECTIVE_DEPTH, 1.0)
+            cols = np.arange(width, dtype=np.float64)
+            base_x = (cols[None, :] - width/2) * scale[:, None] + width/2
+            wave_phase = [y * 0.02 for y in range(height)]
+            tables = {
+                'base_x': base_x,
+                'wave_phase': wave_phase,
+                'rows': np.arange(height)[:, None],
+                'source_x': np.empty((height, width), dtype=np.float64),
+                'index_x': np.empty((height, width), dtype=np.intp),
+                'invalid': np.empty((height, width), dtype=bool),
+                'result': pygame.Surface((width, height)),
+            }
+            self._fx_tables_cache[key] = tables
+        return tables
+
     def apply_fx_perspective(self, surface: pygame.Surface, camera_x: float, camera_y: float):
         width, height = surface.get_size()
-        result = pygame.Surface((width, height))
-        
-        # FX Beta-style perspective transformation
-        horizon = height * 0.5
-        for y in range(height):
-            scale = 1.0
-            if y > horizon:
-                scale = 1.0 + (y - horizon) / height * PERSPECTIVE_DEPTH
-            
-            for x in range(width):
-                # Apply perspective distortion
-                source_x = (x - width/2) * scale + width/2
-                source_y = y
-                
-                # Add subtle wave effect
-                wave = math.sin(y * 0.02 + self.perspective_angle) * 5
-                source_x += wave
-                
-                # Sample pixel with bounds checking
-                if 0 <= int(source_x) < width and 0 <= int(source_y) < height:
-                    color = surface.get_at((int(source_x), int(source_y)))
-                    result.set_at((x, y), color)
-                    
+        tables = self._fx_tables(width, height)
+        result = tables['result']
+
+        # FX Beta-style perspective transformation with a subtle per-row wave
+        wave = np.array([math.sin(phase + self.perspective_angle) * 5 for phase in tables['wave_phase']])
+        source_x = tables['source_x']
+        np.add(tables['base_x'], wave[:, None], out=source_x)
+
+        # int() truncation towards zero, same as the per-pixel bounds check
+        index_x = tables['index_x']
+        index_x[...] = source_x
+        invalid = tables['invalid']
+        np.logical_or(index_x < 0, index_x >= width, out=invalid)
+        np.clip(index_x, 0, width - 1, out=index_x)
+
+        # Gather every pixel in one pass into the reused destination surface,
+        # working on row-major (y, x) views to match the surface memory layout
+        if surface.get_bytesize() == result.get_bytesize() == 4 and surface.get_masks() == result.get_masks():
+            src = pygame.surfarray.pixels2d(surface).T
+            dst = pygame.surfarray.pixels2d(result).T
+            dst[...] = src[tables['rows'], index_x]
+            dst[invalid] = result.map_rgb((0, 0, 0))
+        else:
+            src = pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+            dst = pygame.surfarray.pixels3d(result).transpose(1, 0, 2)
+            dst[...] = src[tables['rows'], index_x]
+            dst[invalid] = 0
+        del src, dst
+
         self.perspective_angle += ROTATION_SPEED
         return result
 
+class FixedTimestep:
+    def __init__(self, step_hz: Optional[float] = None, max_steps: Optional[int] = None):
+        # Accumulates real frame time and hands it out as fixed simulation
+        # steps; alpha is how far the render time sits between the last two.
+        # The defaults are read when constructed so overridden module
+        # constants (headless.run_instance) take effect
+        self.step = 1.0 / (step_hz or SIMULATION_HZ)
+        self.max_steps = MAX_CATCHUP_STEPS if max_steps is None else max_steps
+        self.accumulator = 0.0
+        self.dropped_steps = 0
+
+    def advance(self, frame_time: float) -> int:
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            # Too far behind: give up on the backlog instead of spiralling
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.step + steps * self.step
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.step
+
+class SpatialHash:
+    def __init__(self, cell_size: int = SPATIAL_HASH_CELL_SIZE):
+        # Uniform grid broadphase. Every entry is filed under each cell its
+        # bounding box covers; queries only look at the cells they overlap
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.items: Dict[int, object] = {}
+        self.spans: Dict[int, Tuple[int, int, int, int]] = {}
+        self.next_handle = 0
+
+    def _span(self, left: float, top: float, right: float, bottom: float) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (int(left // size), int(top // size), int(right // size), int(bottom // size))
+
+    def _file(self, handle: int, span: Tuple[int, int, int, int]):
+        cells = self.cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [handle]
+                else:
+                    bucket.append(handle)
+
+    def _unfile(self, handle: int, span: Tuple[int, int, int, int]):
+        cells = self.cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                bucket = cells[(cx, cy)]
+                bucket.remove(handle)
+                if not bucket:
+                    del cells[(cx, cy)]
+
+    def build(self, rects):
+        # Static level geometry: index every rect once, the rect is the item
+        self.clear()
+        for rect in rects:
+            self.insert(rect, rect)
+
+    def insert(self, item, rect) -> int:
+        handle = self.next_handle
+        self.next_handle += 1
+        span = self._span(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        self.items[handle] = item
+        self.spans[handle] = span
+        self._file(handle, span)
+        return handle
+
+    def move(self, handle: int, rect):
+        # Incremental update for moving objects, the buckets are only touched
+        # when the object crosses into a different set of cells
+        span = self._span(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        old = self.spans[handle]
+        if span != old:
+            self._unfile(handle, old)
+            self._file(handle, span)
+            self.spans[handle] = span
+
+    def remove(self, handle: int):
+        self._unfile(handle, self.spans.pop(handle))
+        del self.items[handle]
+
+    def query(self, rect) -> list:
+        # Everything whose cells overlap rect, in insertion order so the
+        # narrowphase resolves in the same order as a plain list of platforms
+        left, top, right, bottom = self._span(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        cells = self.cells
+        if left == right and top == bottom:
+            handles = sorted(cells.get((left, top), ()))
+        else:
+            found = set()
+            for cx in range(left, right + 1):
+                for cy in range(top, bottom + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket:
+                        found.update(bucket)
+            handles = sorted(found)
+        items = self.items
+        return [items[handle] for handle in handles]
+
+    def clear(self):
+        self.cells.clear()
+        self.items.clear()
+        self.spans.clear()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+class BodyVector:
+    __slots__ = ('world', 'field', 'index')
+
+    def __init__(self, world: 'PhysicsWorld', field: str, index: int):
+        # Vector2-like view of one row of a PhysicsWorld array; looks the
+        # array up on every access since the world reallocates when it grows
+        self.world = world
+        self.field = field
+        self.index = index
+
+    @property
+    def x(self) -> float:
+        return float(getattr(self.world, self.field)[self.index, 0])
+
+    @x.setter
+    def x(self, value: float):
+        getattr(self.world, self.field)[self.index, 0] = value
+
+    @property
+    def y(self) -> float:
+        return float(getattr(self.world, self.field)[self.index, 1])
+
+    @y.setter
+    def y(self, value: float):
+        getattr(self.world, self.field)[self.index, 1] = value
+
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+    def __repr__(self) -> str:
+        return f"BodyVector({self.x}, {self.y})"
+
+class PhysicsWorld:
+    def __init__(self, capacity: int = 64):
+        # Structure-of-arrays body storage, integrated for every body in one
+        # vectorized step; rows past count are spare capacity
+        self.count = 0
+        self.position = np.zeros((capacity, 2))
+        self.previous_position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.acceleration = np.zeros((capacity, 2))
+        self.size = np.zeros((capacity, 2))
+        self.mass = np.ones(capacity)
+        self.on_ground = np.zeros(capacity, dtype=bool)
+        self.is_jumping = np.zeros(capacity, dtype=bool)
+
+        # Static platforms as arrays plus a dense cell -> platform list table
+        # over the level's bounds
+        self.platform_rects = np.zeros((0, 4))  # left, top, right, bottom
+        self.cell_size = SPATIAL_HASH_CELL_SIZE
+        self.cell_origin = np.zeros(2, dtype=np.int64)
+        self.cell_table = np.full((0, 0), -1, dtype=np.int64)  # [cx, cy] -> slot, -1 when empty
+        self.cell_starts = np.zeros(0, dtype=np.int64)
+        self.cell_counts = np.zeros(0, dtype=np.int64)
+        self.cell_items = np.zeros(0, dtype=np.int64)
+
+    FIELDS = ('position', 'previous_position', 'velocity', 'acceleration', 'size', 'mass', 'on_ground', 'is_jumping')
+    STATE_FIELDS = ('position', 'previous_position', 'velocity', 'acceleration', 'on_ground', 'is_jumping')
+
+    def _grow(self):
+        capacity = len(self.mass) * 2
+        for field in self.FIELDS:
+            old = getattr(self, field)
+            new = np.ones((capacity,) + old.shape[1:], dtype=old.dtype) if field == 'mass' else \
+                np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, field, new)
+
+    def add_body(self, x: float, y: float, width: int, height: int, mass: float = 1.0) -> int:
+        if self.count == len(self.mass):
+            self._grow()
+        index = self.count
+        self.count += 1
+        self.position[index] = (x, y)
+        self.previous_position[index] = self.position[index]
+        self.velocity[index] = 0
+        self.acceleration[index] = (0, GRAVITY)
+        self.size[index] = (width, height)
+        self.mass[index] = mass
+        self.on_ground[index] = False
+        self.is_jumping[index] = False
+        return index
+
+    def state_size(self) -> int:
+        # Bytes of snapshot() for the current bodies
+        return sum(getattr(self, field)[:self.count].nbytes for field in self.STATE_FIELDS)
+
+    def snapshot(self) -> bytes:
+        # Per-step body state, one field after another over the live rows;
+        # size and mass are fixed when a body is added
+        n = self.count
+        return b''.join(getattr(self, field)[:n].tobytes() for field in self.STATE_FIELDS)
+
+    def restore(self, data: bytes, offset: int = 0) -> int:
+        # Inverse of snapshot() for a world with the same bodies, reading
+        # from offset; returns the offset just past the body state
+        n = self.count
+        for field in self.STATE_FIELDS:
+            rows = getattr(self, field)[:n]
+            rows[...] = np.frombuffer(data, rows.dtype, rows.size, offset).reshape(rows.shape)
+            offset += rows.nbytes
+        return offset
+
+    def set_platforms(self, platform_index: SpatialHash):
+        # Flatten the level's spatial hash into arrays; platforms are numbered
+        # in insertion order so the first hit matches a plain list scan
+        handles = sorted(platform_index.items)
+        number = {handle: i for i, handle in enumerate(handles)}
+        self.platform_rects = np.array(
+            [(r.left, r.top, r.right, r.bottom) for r in (platform_index.items[h] for h in handles)],
+            dtype=float).reshape(-1, 4)
+        self.cell_size = platform_index.cell_size
+
+        cells = list(platform_index.cells.items())
+        coords = np.array([cell for cell, _ in cells], dtype=np.int64).reshape(-1, 2)
+        if len(coords):
+            self.cell_origin = coords.min(axis=0)
+            self.cell_table = np.full(coords.max(axis=0) - self.cell_origin + 1, -1, dtype=np.int64)
+            self.cell_table[coords[:, 0] - self.cell_origin[0], coords[:, 1] - self.cell_origin[1]] = \
+                np.arange(len(cells))
+        else:
+            self.cell_table = np.full((0, 0), -1, dtype=np.int64)
+        buckets = [[number[h] for h in bucket] for _, bucket in cells]
+        self.cell_counts = np.array([len(bucket) for bucket in buckets], dtype=np.int64)
+        self.cell_starts = np.concatenate(([0], np.cumsum(self.cell_counts)[:-1])).astype(np.int64)
+        self.cell_items = np.array([item for bucket in buckets for item in bucket], dtype=np.int64)
+
+    def step(self, dt: float):
+        n = self.count
+        position = self.position[:n]
+        velocity = self.velocity[:n]
+        acceleration = self.acceleration[:n]
+        self.previous_position[:n] = position
+
+        # Integrate, friction and terminal velocity for every body at once.
+        # Friction is scaled by the step so any SIMULATION_HZ decelerates alike
+        velocity += acceleration * dt
+        velocity[:, 0] *= FRICTION ** (dt * FRICTION_HZ)
+        np.clip(velocity[:, 1], -TERMINAL_VELOCITY, TERMINAL_VELOCITY, out=velocity[:, 1])
+        acceleration[:, 0] = 0
+        acceleration[:, 1] = GRAVITY
+        position += velocity * dt
+
+        self.on_ground[:n] = False
+        self.resolve_platforms()
+
+    def resolve_platforms(self):
+        n = self.count
+        if not n or not self.cell_table.size:
+            return
+        position = self.position[:n]
+        velocity = self.velocity[:n]
+        size = self.size[:n]
+
+        # Collision rect the way pygame.Rect stores a float position
+        # (rounded half away from zero)
+        rect_x = np.copysign(np.floor(np.abs(position[:, 0]) + 0.5), position[:, 0])
+        rect_y = np.copysign(np.floor(np.abs(position[:, 1]) + 0.5), position[:, 1])
+
+        # Only moving bodies can be pushed out; gather the platforms of every
+        # cell each one covers
+        moving = np.nonzero(velocity[:, 1] != 0)[0]
+        if not len(moving):
+            return
+        cell = self.cell_size
+        columns, rows = self.cell_table.shape
+        left = (rect_x[moving] // cell).astype(np.int64) - self.cell_origin[0]
+        top = (rect_y[moving] // cell).astype(np.int64) - self.cell_origin[1]
+        right = ((rect_x[moving] + size[moving, 0]) // cell).astype(np.int64) - self.cell_origin[0]
+        bottom = ((rect_y[moving] + size[moving, 1]) // cell).astype(np.int64) - self.cell_origin[1]
+
+        bodies, slots = [], []
+        for dx in range(int((right - left).max()) + 1):
+            for dy in range(int((bottom - top).max()) + 1):
+                cx, cy = left + dx, top + dy
+                covered = (cx <= right) & (cy <= bottom) & (cx >= 0) & (cx < columns) & (cy >= 0) & (cy < rows)
+                slot = self.cell_table[cx[covered], cy[covered]]
+                filled = slot >= 0
+                bodies.append(moving[covered][filled])
+                slots.append(slot[filled])
+        bodies = np.concatenate(bodies)
+        slot = np.concatenate(slots)
+
+        counts = self.cell_counts[slot]
+        total = int(counts.sum())
+        if not total:
+            return
+        pair_body = np.repeat(bodies, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_platform = self.cell_items[np.repeat(self.cell_starts[slot], counts) + offsets]
+
+        # Rect.colliderect on every candidate pair
+        platforms = self.platform_rects[pair_platform]
+        body_x, body_y = rect_x[pair_body], rect_y[pair_body]
+        overlap = (body_x < platforms[:, 2]) & (body_x + size[pair_body, 0] > platforms[:, 0]) & \
+                  (body_y < platforms[:, 3]) & (body_y + size[pair_body, 1] > platforms[:, 1])
+
+        # The first overlapping platform in level order resolves the body and
+        # zeroes its vertical speed, which makes every later platform a no-op
+        first = np.full(n, len(self.platform_rects))
+        np.minimum.at(first, pair_body[overlap], pair_platform[overlap])
+        hit = np.nonzero(first < len(self.platform_rects))[0]
+        if not len(hit):
+            return
+        platform = self.platform_rects[first[hit]]
+        falling = velocity[hit, 1] > 0
+        position[hit, 1] = np.where(falling, platform[:, 1] - size[hit, 1], platform[:, 3])
+        velocity[hit, 1] = 0
+        landed = hit[falling]
+        self.on_ground[landed] = True
+        self.is_jumping[landed] = False
+
 class PhysicsComponent:
-    def __init__(self):
-        self.velocity = pygame.math.Vector2(0, 0)
-        self.acceleration = pygame.math.Vector2(0, GRAVITY)
-        self.mass = 1.0
-        self.on_ground = False
-        
+    __slots__ = ('world', 'index', 'velocity', 'acceleration')
+
+    def __init__(self, world: PhysicsWorld, index: int):
+        # Handle to one body's physics state in a PhysicsWorld
+        self.world = world
+        self.index = index
+        self.velocity = BodyVector(world, 'velocity', index)
+        self.acceleration = BodyVector(world, 'acceleration', index)
+
+    @property
+    def mass(self) -> float:
+        return float(self.world.mass[self.index])
+
+    @mass.setter
+    def mass(self, value: float):
+        self.world.mass[self.index] = value
+
+    @property
+    def on_ground(self) -> bool:
+        return bool(self.world.on_ground[self.index])
+
+    @on_ground.setter
+    def on_ground(self, value: bool):
+        self.world.on_ground[self.index] = value
+
     def apply_force(self, force: pygame.math.Vector2):
-        self.acceleration += force / self.mass
-        
-    def update(self, dt: float):
-        self.velocity += self.acceleration * dt
-        self.velocity.x *= FRICTION  # Apply friction
-        # Terminal velocity
-        self.velocity.y = min(400, max(-400, self.velocity.y))
-        self.acceleration = pygame.math.Vector2(0, GRAVITY)
+        self.world.acceleration[self.index] += (force.x / self.mass, force.y / self.mass)
 
 class GameObject:
-    def __init__(self, x: float, y: float, width: int, height: int):
-        self.position = pygame.math.Vector2(x, y)
-        self.physics = PhysicsComponent()
-        self.collision = pygame.Rect(x, y, width, height)
+    __slots__ = ('world', 'index', 'position', 'previous_position', 'physics', 'sprite', 'render_object',
+                 'facing_right')
+
+    def __init__(self, world: PhysicsWorld, x: float, y: float, width: int, height: int):
+        # Thin handle: position and physics live in the world's arrays
+        self.world = world
+        self.index = world.add_body(x, y, width, height)
+        self.position = BodyVector(world, 'position', self.index)
+        self.previous_position = BodyVector(world, 'previous_position', self.index)  # Position before the last step
+        self.physics = PhysicsComponent(world, self.index)
         self.sprite = None
         self.render_object = None
         self.facing_right = True
-        self.is_jumping = False
-        
-    def update(self, dt: float, platforms):
-        prev_pos = pygame.math.Vector2(self.position)
-        self.physics.update(dt)
-        self.position += self.physics.velocity * dt
-        
-        # Update collision rect
-        self.collision.x = self.position.x
-        self.collision.y = self.position.y
-        
-        # Platform collision
-        self.physics.on_ground = False
-        for platform in platforms:
-            if self.collision.colliderect(platform):
-                if self.physics.velocity.y > 0:  # Falling
-                    self.collision.bottom = platform.top
-                    self.position.y = self.collision.y
-                    self.physics.velocity.y = 0
-                    self.physics.on_ground = True
-                    self.is_jumping = False
-                elif self.physics.velocity.y < 0:  # Jumping
-                    self.collision.top = platform.bottom
-                    self.position.y = self.collision.y
-                    self.physics.velocity.y = 0
-                
-        # Update render object
+
+    @property
+    def is_jumping(self) -> bool:
+        return bool(self.world.is_jumping[self.index])
+
+    @is_jumping.setter
+    def is_jumping(self, value: bool):
+        self.world.is_jumping[self.index] = value
+
+    @property
+    def collision(self) -> pygame.Rect:
+        width, height = self.world.size[self.index]
+        rect = pygame.Rect(0, 0, int(width), int(height))
+        rect.x, rect.y = self.position
+        return rect
+
+    def interpolated_position(self, alpha: float) -> pygame.math.Vector2:
+        # Render position between the last two simulation steps
+        return pygame.math.Vector2(*self.previous_position).lerp(pygame.math.Vector2(*self.position), alpha)
+
+    def update_render(self):
+        # Sync the render object after a world step
         if self.render_object:
             self.render_object.position = (self.position.x, self.position.y)
             # Flip sprite based on direction
-            if self.physics.velocity.x > 0:
-                self.facing_right = True
-            elif self.physics.velocity.x < 0:
-                self.facing_right = False
-            
-            if not self.facing_right:
-                self.render_object.texture = pygame.transform.flip(self.sprite, True, False)
-            else:
-                self.render_object.texture = self.sprite
+            velocity_x = self.physics.velocity.x
+            self.face(True if velocity_x > 0 else False if velocity_x < 0 else self.facing_right)
+
+    def face(self, right: bool):
+        self.facing_right = right
+        if self.render_object:
+            self.render_object.texture = transform_cache.get(self.sprite, flip_x=not right)
+
+def default_level() -> List[pygame.Rect]:
+    # Ground plus floating platforms, shared by Game and BatchedEnv
+    ground = pygame.Rect(0, 500, 800, 100)
+    platform_positions = [
+        (300, 400, 100, 20),
+        (500, 300, 100, 20),
+        (200, 200, 100, 20),
+        (600, 450, 100, 20)
+    ]
+    return [ground] + [pygame.Rect(*pos) for pos in platform_positions]
+
+class BatchedEnv:
+    def __init__(self, num_worlds: int, platforms: Optional[List[pygame.Rect]] = None,
+                 max_steps: int = ENV_MAX_STEPS, seed: int = 0):
+        # num_worlds independent copies of the Mario/Luigi game stepped in
+        # lockstep. Bodies only collide with the level, never each other, so
+        # every world's players share one PhysicsWorld: world w owns bodies
+        # w * players ... w * players + players - 1
+        self.num_worlds = num_worlds
+        self.players = len(PLAYER_SPAWNS)
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.dt = 1.0 / SIMULATION_HZ
+
+        self.world = PhysicsWorld(capacity=num_worlds * self.players)
+        self.spawns = np.array(PLAYER_SPAWNS, dtype=float)
+        for _ in range(num_worlds):
+            for x, y in PLAYER_SPAWNS:
+                self.world.add_body(x, y, *PLAYER_SIZE)
+
+        level = platforms if platforms is not None else default_level()
+        platform_index = SpatialHash()
+        platform_index.build(level)
+        self.world.set_platforms(platform_index)
+        bounds = level[0].unionall(level[1:]).inflate(ENV_BOUNDS_MARGIN * 2, ENV_BOUNDS_MARGIN * 2)
+        self.bounds = (bounds.left, bounds.right, bounds.bottom)
+
+        self.steps = np.zeros(num_worlds, dtype=np.int64)
+        self.episode_returns = np.zeros(num_worlds)
+        self.terminal_observations = np.zeros((num_worlds, self.players * OBSERVATION_SIZE), dtype=np.float32)
+
+    @property
+    def action_size(self) -> int:
+        return self.players * ACTIONS_PER_PLAYER
+
+    @property
+    def observation_size(self) -> int:
+        return self.players * OBSERVATION_SIZE
+
+    def reset(self, worlds=None) -> np.ndarray:
+        # Put the given worlds (all when None) back on their spawn points
+        worlds = np.arange(self.num_worlds) if worlds is None else np.asarray(worlds)
+        bodies = (worlds[:, None] * self.players + np.arange(self.players)).ravel()
+        spawns = np.tile(self.spawns, (len(worlds), 1))
+        world = self.world
+        world.position[bodies] = spawns
+        world.previous_position[bodies] = spawns
+        world.velocity[bodies] = 0
+        world.acceleration[bodies] = (0, GRAVITY)
+        world.on_ground[bodies] = False
+        world.is_jumping[bodies] = False
+        self.steps[worlds] = 0
+        self.episode_returns[worlds] = 0
+        return self.observe()
+
+    def observe(self) -> np.ndarray:
+        # (num_worlds, players * OBSERVATION_SIZE): x, y, vx, vy, on_ground per player
+        n = self.world.count
+        obs = np.empty((n, OBSERVATION_SIZE), dtype=np.float32)
+        obs[:, 0:2] = self.world.position[:n]
+        obs[:, 2:4] = self.world.velocity[:n]
+        obs[:, 4] = self.world.on_ground[:n]
+        return obs.reshape(self.num_worlds, -1)
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # actions: (num_worlds, players * ACTIONS_PER_PLAYER) of held
+        # left/right/jump per player, applied like Game.handle_input.
+        # Returns (observations, rewards, dones); finished worlds are reset
+        # at once, so their observation is the new episode's first one and
+        # the final one is kept in terminal_observations
+        world = self.world
+        n = world.count
+        pressed = np.asarray(actions, dtype=bool).reshape(n, ACTIONS_PER_PLAYER)
+        push = pressed[:, ACTION_RIGHT].astype(float) - pressed[:, ACTION_LEFT]
+        world.acceleration[:n, 0] += push * RUN_SPEED / world.mass[:n]
+        jump = pressed[:, ACTION_JUMP] & world.on_ground[:n] & ~world.is_jumping[:n]
+        world.velocity[:n, 1][jump] = JUMP_FORCE
+        world.is_jumping[:n] |= jump
+
+        previous_x = world.position[:n, 0].copy()
+        world.step(self.dt)
+        self.steps += 1
+
+        rewards, out = self.compute_rewards(previous_x)
+        dones = out | (self.steps >= self.max_steps)
+        self.episode_returns += rewards
+
+        obs = self.observe()
+        if dones.any():
+            finished = np.nonzero(dones)[0]
+            self.terminal_observations[finished] = obs[finished]
+            obs[finished] = self.reset(finished)[finished]
+        return obs, rewards, dones
+
+    def compute_rewards(self, previous_x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Progress to the right, averaged over the players, and a penalty for
+        # leaving the level (which also ends the episode). Jumps are floaty
+        # under the low GRAVITY, so only the sides and the bottom count
+        n = self.world.count
+        position = self.world.position[:n]
+        progress = (position[:, 0] - previous_x).reshape(self.num_worlds, self.players).mean(axis=1)
+        left, right, bottom = self.bounds
+        outside = (position[:, 0] < left) | (position[:, 0] > right) | (position[:, 1] > bottom)
+        out = outside.reshape(self.num_worlds, self.players).any(axis=1)
+        return progress + out * ENV_OUT_OF_BOUNDS_PENALTY, out
+
+    def sample_actions(self) -> np.ndarray:
+        return self.rng.random((self.num_worlds, self.action_size)) < 0.3
+
+# Snapshot layout: header, view, the PhysicsWorld body state, a facing byte
+# per game object, then the game RNG (Mersenne Twister words plus the cached
+# gauss value). The view record is render-only state: it is not hashed, and
+# restore(view=False) leaves the current view alone (rollbacks)
+SNAPSHOT_HEADER = struct.Struct('<4sHHQ6d')  # magic, version, bodies, frame, camera, previous camera,
+                                             # target camera
+SNAPSHOT_VIEW = struct.Struct('<d')  # perspective angle
+SNAPSHOT_RNG = struct.Struct('<625I?d')
+
+def snapshot_hash(data: bytes) -> int:
+    # 64-bit digest of a snapshot, for comparing states between peers or
+    # runs. The view record advances per rendered frame rather than per
+    # step, so it is left out
+    view = memoryview(data)
+    digest = hashlib.blake2b(view[:SNAPSHOT_HEADER.size], digest_size=8)
+    digest.update(view[SNAPSHOT_HEADER.size + SNAPSHOT_VIEW.size:])
+    return int.from_bytes(digest.digest(), 'little')
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless: bool = False, seed: Optional[int] = None):
+        # Headless games run on SDL's dummy video driver and are stepped with
+        # run_headless() instead of run()
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pygame.init()
         self.screen = pygame.display.set_mode((800, 600))
         pygame.display.set_caption("Super Mario FX Beta")
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep()
         self.running = True
+        self.frame = 0  # Simulation steps so far
+        self.rng = random.Random(seed)  # Gameplay randomness, saved with the snapshots
         
         # Initialize rendering system
         self.renderer = FTRender(800, 600)
         self.camera = pygame.math.Vector2(0, 0)
+        self.previous_camera = pygame.math.Vector2(0, 0)
         self.target_camera = pygame.math.Vector2(0, 0)
         
-        # Initialize game objects
-        self.mario = GameObject(100, 100, 24, 32)
-        self.luigi = GameObject(160, 100, 24, 32)
+        # Initialize game objects, their physics state lives in the world
+        self.world = PhysicsWorld()
+        self.mario = GameObject(self.world, *PLAYER_SPAWNS[0], *PLAYER_SIZE)
+        self.luigi = GameObject(self.world, *PLAYER_SPAWNS[1], *PLAYER_SIZE)
         self.game_objects = [self.mario, self.luigi]
         
         # Create platforms
         self.platforms = []
+        self.platform_index = SpatialHash()
         self.create_level()
         
         # Load textures and create render objects
         self.init_textures()
         
     def create_level(self):
-        # Ground
-        ground = pygame.Rect(0, 500, 800, 100)
-        self.platforms.append(ground)
-        
-        # Platforms
-        platform_positions = [
-            (300, 400, 100, 20),
-            (500, 300, 100, 20),
-            (200, 200, 100, 20),
-            (600, 450, 100, 20)
-        ]
+        # Ground and platforms
+        self.platforms.extend(default_level())
         
-        for pos in platform_positions:
-            self.platforms.append(pygame.Rect(*pos))
+        # Broadphase over the static level, built once
+        self.platform_index.build(self.platforms)
+        self.world.set_platforms(self.platform_index)
         
     def init_textures(self):
         # Create character sprites with simple shading
@@ -194,6 +805,11 @@ class Game:
         self.mario.sprite = mario_texture
         self.luigi.sprite = luigi_texture
         
+        # One texture for every crowd body
+        self.crowd_texture = pygame.Surface(CROWD_SIZE)
+        self.crowd_texture.fill((150, 90, 40))
+        transform_cache.prewarm([mario_texture, luigi_texture], flips=((False, False), (True, False)))
+        
         self.mario.render_object = RenderObject(
             texture=mario_texture,
             position=(self.mario.position.x, self.mario.position.y),
@@ -206,8 +822,20 @@ class Game:
             layer=1
         )
 
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
+    def add_crowd(self, count: int, seed: int = 0):
+        # Extra bodies without game objects, dropped over the level; they
+        # share the players' physics step and are drawn in one batch
+        rng = np.random.default_rng(seed)
+        level = self.platforms[0].unionall(self.platforms[1:])
+        xs = rng.uniform(level.left, level.right - CROWD_SIZE[0], count)
+        ys = rng.uniform(level.top - level.height, level.bottom - CROWD_SIZE[1], count)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.world.add_body(x, y, *CROWD_SIZE)
+
+    def handle_input(self, keys=None):
+        # keys maps key codes to pressed state, the live keyboard when None
+        if keys is None:
+            keys = pygame.key.get_pressed()
         
         # Mario controls
         if keys[pygame.K_RIGHT]:
@@ -227,23 +855,27 @@ class Game:
             self.luigi.physics.velocity.y = JUMP_FORCE
             self.luigi.is_jumping = True
 
-    def update(self):
-        dt = self.clock.get_time() / 1000.0
-        
-        # Update game objects
+    def update(self, dt: float):
+        # Step every body at once, then sync the render objects
+        self.frame += 1
+        self.world.step(dt)
         for obj in self.game_objects:
-            obj.update(dt, self.platforms)
+            obj.update_render()
             
         # Smooth camera following
         self.target_camera.x = self.mario.position.x - 400
         self.target_camera.y = self.mario.position.y - 300
         
+        self.previous_camera.update(self.camera)
         self.camera += (self.target_camera - self.camera) * CAMERA_SMOOTHING
         
-    def render(self):
+    def render(self, alpha: float = 1.0):
         # Clear the render buffer
         self.renderer.clear_buffer()
         
+        # Camera interpolated between the last two simulation steps
+        camera = self.previous_camera.lerp(self.camera, alpha)
+        
         # Create background with gradient
         background = pygame.Surface((800, 600))
         for y in range(600):
@@ -253,8 +885,8 @@ class Game:
         # Apply FX perspective effect
         transformed_bg = self.renderer.apply_fx_perspective(
             background,
-            self.camera.x,
-            self.camera.y
+            camera.x,
+            camera.y
         )
         
         # Draw everything to screen
@@ -263,31 +895,123 @@ class Game:
         # Draw platforms
         for platform in self.platforms:
             rect = platform.copy()
-            rect.x -= self.camera.x
-            rect.y -= self.camera.y
+            rect.x -= camera.x
+            rect.y -= camera.y
             pygame.draw.rect(self.screen, (139, 69, 19), rect)
         
         # Draw render objects
         for obj in self.game_objects:
             if obj.render_object:
-                pos = (obj.position.x - self.camera.x, obj.position.y - self.camera.y)
+                position = obj.interpolated_position(alpha)
+                pos = (position.x - camera.x, position.y - camera.y)
                 self.screen.blit(obj.render_object.texture, pos)
         
+        # Crowd bodies, interpolated and culled as arrays
+        first, count = len(self.game_objects), self.world.count
+        if count > first:
+            previous = self.world.previous_position[first:count]
+            current = self.world.position[first:count]
+            screen_xy = (previous + (current - previous) * alpha - (camera.x, camera.y)).astype(np.int64)
+            width, height = self.screen.get_size()
+            visible = ((screen_xy[:, 0] > -CROWD_SIZE[0]) & (screen_xy[:, 0] < width) &
+                       (screen_xy[:, 1] > -CROWD_SIZE[1]) & (screen_xy[:, 1] < height))
+            texture = self.crowd_texture
+            self.screen.blits([(texture, xy) for xy in screen_xy[visible].tolist()], doreturn=False)
+        
         pygame.display.flip()
 
-    def run(self):
+    def run(self, recorder=None):
+        # recorder (a replay.ReplayRecorder) is handed each step's keys just
+        # before the step runs
         while self.running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
 
-            self.handle_input()
-            self.update()
-            self.render()
-            self.clock.tick(60)
+            # Simulate in fixed steps, render whatever time is left as alpha.
+            # Input forces only last one physics step, so apply them per step.
+            frame_time = self.clock.tick(60) / 1000.0
+            keys = pygame.key.get_pressed()
+            for _ in range(self.timestep.advance(frame_time)):
+                if recorder is not None:
+                    recorder.record_keys(keys)
+                self.handle_input(keys)
+                self.update(self.timestep.step)
+            self.render(self.timestep.alpha)
 
         pygame.quit()
 
+    def state(self) -> dict:
+        # Plain per-step state: [x, y, vx, vy, on_ground] per object and the camera
+        return {
+            'objects': [[obj.position.x, obj.position.y, obj.physics.velocity.x, obj.physics.velocity.y,
+                         obj.physics.on_ground] for obj in self.game_objects],
+            'camera': [self.camera.x, self.camera.y],
+        }
+
+    def snapshot(self) -> bytes:
+        # Full simulation state in the fixed SNAPSHOT_* layout, cheap enough
+        # to take every step
+        _, twister, gauss = self.rng.getstate()
+        return b''.join((
+            SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.world.count, self.frame,
+                                 self.camera.x, self.camera.y, self.previous_camera.x, self.previous_camera.y,
+                                 self.target_camera.x, self.target_camera.y),
+            SNAPSHOT_VIEW.pack(self.renderer.perspective_angle),
+            self.world.snapshot(),
+            bytes(obj.facing_right for obj in self.game_objects),
+            SNAPSHOT_RNG.pack(*twister, gauss is not None, gauss or 0.0),
+        ))
+
+    def restore(self, data: bytes, view: bool = True):
+        # Inverse of snapshot(), for a game with the same bodies; view=False
+        # keeps the current perspective angle
+        magic, version, count, frame, *cameras = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Not a version {SNAPSHOT_VERSION} game snapshot")
+        if count != self.world.count:
+            raise ValueError(f"Snapshot has {count} bodies, the world has {self.world.count}")
+        objects = len(self.game_objects)
+        if len(data) != (SNAPSHOT_HEADER.size + SNAPSHOT_VIEW.size + self.world.state_size() + objects +
+                         SNAPSHOT_RNG.size):
+            raise ValueError("Truncated or oversized game snapshot")
+
+        self.frame = frame
+        camera_x, camera_y, previous_x, previous_y, target_x, target_y = cameras
+        if view:
+            self.renderer.perspective_angle, = SNAPSHOT_VIEW.unpack_from(data, SNAPSHOT_HEADER.size)
+        self.camera.update(camera_x, camera_y)
+        self.previous_camera.update(previous_x, previous_y)
+        self.target_camera.update(target_x, target_y)
+
+        offset = self.world.restore(data, SNAPSHOT_HEADER.size + SNAPSHOT_VIEW.size)
+        for obj, facing_right in zip(self.game_objects, data[offset:offset + objects]):
+            obj.facing_right = bool(facing_right)
+            obj.update_render()
+        offset += objects
+
+        *twister, has_gauss, gauss = SNAPSHOT_RNG.unpack_from(data, offset)
+        self.rng.setstate((3, tuple(twister), gauss if has_gauss else None))
+
+    def state_hash(self) -> int:
+        return snapshot_hash(self.snapshot())
+
+    def run_headless(self, inputs, steps: Optional[int] = None, record_every: int = 1) -> List[dict]:
+        # Step the simulation as fast as possible from scripted inputs (one
+        # key state per step, e.g. headless.ScriptedInput), without rendering.
+        # Returns the state every record_every steps plus the final one
+        steps = len(inputs) if steps is None else steps
+        dt = self.timestep.step
+        states = []
+        for step in range(steps):
+            self.handle_input(inputs[step])
+            self.update(dt)
+            if record_every and (step + 1) % record_every == 0:
+                states.append(dict(self.state(), step=step + 1))
+        if not states or states[-1]['step'] != steps:
+            states.append(dict(self.state(), step=steps))
+        return states
+
 if __name__ == "__main__":
     game = Game()
     game.run()
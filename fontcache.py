@@ -0,0 +1,85 @@
+import pygame
+from collections import OrderedDict
+
+# Shared font registry and rendered-text cache for the pygame menus and HUDs.
+# Fonts are created once per (name, size, style) and rendered labels are kept
+# by (font, text, color, antialias) so redrawing an unchanged label every frame
+# is a dictionary lookup instead of a font.render call.
+
+TEXT_CACHE_SIZE = 512  # Rendered text surfaces kept before evicting the oldest
+
+class FontRegistry:
+    def __init__(self, max_entries: int = TEXT_CACHE_SIZE):
+        self.fonts = {}
+        self.text_cache = OrderedDict()
+        self.max_entries = max_entries
+        self.font_hits = 0
+        self.font_misses = 0
+        self.text_hits = 0
+        self.text_misses = 0
+
+    def font(self, name=None, size: int = 36, sysfont: bool = False, bold: bool = False,
+             italic: bool = False) -> pygame.font.Font:
+        key = (name, size, sysfont, bold, italic)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.font_hits += 1
+            return font
+        self.font_misses += 1
+        if sysfont:
+            font = pygame.font.SysFont(name, size, bold, italic)
+        else:
+            font = pygame.font.Font(name, size)
+            font.set_bold(bold)
+            font.set_italic(italic)
+        self.fonts[key] = font
+        return font
+
+    def render(self, text: str, size: int = 36, color=(255, 255, 255), name=None, antialias: bool = True,
+               sysfont: bool = False, bold: bool = False, italic: bool = False) -> pygame.Surface:
+        # The returned surface is shared, callers must not draw on it
+        key = (name, size, sysfont, bold, italic, text, tuple(color), antialias)
+        surface = self.text_cache.get(key)
+        if surface is not None:
+            self.text_cache.move_to_end(key)
+            self.text_hits += 1
+            return surface
+        self.text_misses += 1
+        surface = self.font(name, size, sysfont, bold, italic).render(text, antialias, color)
+        self.text_cache[key] = surface
+        if len(self.text_cache) > self.max_entries:
+            self.text_cache.popitem(last=False)
+        return surface
+
+    def clear(self):
+        # Fonts die with pygame.quit(), call this after re-initializing pygame
+        self.fonts.clear()
+        self.text_cache.clear()
+
+    def stats(self) -> dict:
+        font_lookups = self.font_hits + self.font_misses
+        text_lookups = self.text_hits + self.text_misses
+        return {
+            'fonts': len(self.fonts),
+            'texts': len(self.text_cache),
+            'font_hit_rate': self.font_hits / font_lookups if font_lookups else 0.0,
+            'text_hit_rate': self.text_hits / text_lookups if text_lookups else 0.0,
+            'text_hits': self.text_hits,
+            'text_misses': self.text_misses,
+        }
+
+# Process-wide instance used by every script
+registry = FontRegistry()
+
+def get_font(name=None, size=36, sysfont=False, bold=False, italic=False):
+    return registry.font(name, size, sysfont, bold, italic)
+
+def render_text(text, size=36, color=(255, 255, 255), name=None, antialias=True, sysfont=False, bold=False,
+                italic=False):
+    return registry.render(text, size, color, name, antialias, sysfont, bold, italic)
+
+def clear():
+    registry.clear()
+
+def stats():
+    return registry.stats()
@@ -0,0 +1,141 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')  # Before any game module initializes pygame
+
+import argparse
+import importlib
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pygame
+
+# Headless runs of the platformer cores (testengine, ezgunnerinfdevpt2):
+# scripted inputs, a single-instance runner and a process pool that spreads
+# independent instances over the CPU cores for balancing sweeps and playtests.
+
+GAME_MODULES = ('testengine', 'ezgunnerinfdevpt2')
+PLAYTEST_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE, pygame.K_a, pygame.K_d, pygame.K_w)
+
+class KeyState(frozenset):
+    # Pressed keys for one step, indexed like pygame.key.get_pressed()
+    def __getitem__(self, key: int) -> bool:
+        return key in self
+
+NO_KEYS = KeyState()
+
+class ScriptedInput:
+    def __init__(self, segments: Iterable[Tuple[int, Iterable[int]]] = (), loop: bool = False):
+        # (steps, keys held) segments played back to back. Past the end the
+        # script repeats when loop is set, otherwise no keys are pressed
+        self.steps: List[KeyState] = []
+        self.loop = loop
+        for count, keys in segments:
+            self.hold(count, keys)
+
+    def hold(self, count: int, keys: Iterable[int] = ()) -> 'ScriptedInput':
+        state = KeyState(keys)
+        self.steps.extend([state] * count)
+        return self
+
+    @classmethod
+    def random(cls, steps: int, seed: int = 0, keys=PLAYTEST_KEYS, hold: Tuple[int, int] = (5, 60)) -> 'ScriptedInput':
+        # Random key combinations held for a random number of steps, for playtests
+        rng = random.Random(seed)
+        script = cls()
+        while len(script) < steps:
+            pressed = [key for key in keys if rng.random() < 0.3]
+            script.hold(min(rng.randint(*hold), steps - len(script)), pressed)
+        return script
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __getitem__(self, step: int) -> KeyState:
+        if step < len(self.steps):
+            return self.steps[step]
+        if self.loop and self.steps:
+            return self.steps[step % len(self.steps)]
+        return NO_KEYS
+
+def run_instance(job: Dict) -> Dict:
+    # Run one headless game. job keys:
+    #   module        game module name (default 'ezgunnerinfdevpt2')
+    #   inputs        ScriptedInput or any per-step sequence of key states
+    #   steps         steps to simulate (default len(inputs))
+    #   constants     module constants to override, e.g. {'RUN_SPEED': 300}
+    #   record_every  keep the state every N steps, 0 for just the final state
+    #   game          extra Game() keyword arguments
+    module_name = job.get('module', GAME_MODULES[-1])
+    if module_name not in GAME_MODULES:
+        raise ValueError(f"Unknown game module {module_name!r}, expected one of {GAME_MODULES}")
+    module = importlib.import_module(module_name)
+    constants = job.get('constants', {})
+    for name in constants:
+        if not hasattr(module, name):
+            raise ValueError(f"{module_name} has no constant {name!r}")
+
+    # Pool workers are reused between jobs, so the overrides are undone
+    # afterwards or they would leak into whichever job runs next
+    originals = {name: getattr(module, name) for name in constants}
+    try:
+        for name, value in constants.items():
+            setattr(module, name, value)
+        inputs = job.get('inputs', ScriptedInput())
+        game = module.Game(headless=True, **job.get('game', {}))
+        start = time.perf_counter()
+        states = game.run_headless(inputs, job.get('steps'), job.get('record_every', 0))
+        elapsed = time.perf_counter() - start
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+    return {
+        'id': job.get('id'),
+        'module': module_name,
+        'constants': job.get('constants', {}),
+        'steps': states[-1]['step'],
+        'elapsed': elapsed,
+        'final': states[-1],
+        'states': states,
+    }
+
+def run_pool(jobs: List[Dict], processes: Optional[int] = None) -> Dict:
+    # Run independent instances across processes (one per core by default),
+    # results come back in job order with aggregate throughput
+    start = time.perf_counter()
+    if processes == 1:
+        results = [run_instance(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(run_instance, jobs))
+    wall = time.perf_counter() - start
+    steps = sum(result['steps'] for result in results)
+    return {
+        'results': results,
+        'instances': len(results),
+        'steps': steps,
+        'wall_time': wall,
+        'steps_per_second': steps / wall if wall else 0.0,
+        'cpu_time': sum(result['elapsed'] for result in results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Random-input headless playtests")
+    parser.add_argument('module', nargs='?', default=GAME_MODULES[-1], choices=GAME_MODULES)
+    parser.add_argument('--instances', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--steps', type=int, default=12000)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    jobs = [{'id': seed, 'module': args.module, 'inputs': ScriptedInput.random(args.steps, seed)}
+            for seed in range(args.instances)]
+    summary = run_pool(jobs, args.processes)
+    for result in summary['results']:
+        x, y = result['final']['objects'][0][:2]
+        print(f"instance {result['id']:>3}: {result['steps']} steps in {result['elapsed']:.2f} s, "
+              f"mario at ({x:.1f}, {y:.1f})")
+    print(f"{summary['instances']} instances, {summary['steps']} steps in {summary['wall_time']:.2f} s "
+          f"({summary['steps_per_second']:.0f} steps/s)")
+
+if __name__ == "__main__":
+    main()
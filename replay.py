@@ -0,0 +1,286 @@
+import argparse
+import importlib
+import mmap
+import os
+import random
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pygame
+
+from rollback import INPUT_KEYS, PLAYER_INPUT_BITS, PLAYER_KEYS, ROLLBACK_MODULES, FRAME_BUDGET_MS
+
+# Input replays for the platformer cores (testengine, ezgunnerinfdevpt2):
+# the combined two-player input of every simulation step, run-length
+# encoded, plus a Game.snapshot keyframe every few seconds. Playback is
+# deterministic, so a replay reproduces a session exactly; keyframes make
+# seeking cost at most one keyframe interval of simulation.
+
+REPLAY_MAGIC = b'FTRP'
+REPLAY_VERSION = 2
+REPLAY_KEYFRAME_INTERVAL = 600  # Simulation steps between keyframes (5 s at 120 Hz)
+REPLAY_RUN_MAX = 0xFFFF  # Longest run of one input per record
+
+# File layout: header, level path (UTF-8, empty for the built-in level),
+# input runs, keyframe index, keyframe snapshots
+REPLAY_HEADER = struct.Struct('<4sH32sqIIIIQH')  # magic, version, module, seed, frames, keyframe interval,
+                                                 # runs, keyframes, final state hash, level path length
+REPLAY_RUN = struct.Struct('<BH')  # input, frames
+REPLAY_KEYFRAME = struct.Struct('<QI')  # offset, size
+
+def read_inputs(keys) -> int:
+    # Both local players' keys as one combined input
+    mask = 0
+    for player, player_keys in enumerate(PLAYER_KEYS):
+        for bit, key in enumerate(player_keys):
+            if keys[key]:
+                mask |= 1 << (player * PLAYER_INPUT_BITS + bit)
+    return mask
+
+def step_game(game, inputs: int):
+    game.handle_input(INPUT_KEYS[inputs])
+    game.update(game.timestep.step)
+
+class ReplayRecorder:
+    def __init__(self, game, module_name: str, seed: int, keyframe_interval: int = REPLAY_KEYFRAME_INTERVAL,
+                 level_path: Optional[str] = None):
+        # Call record() with each step's input (or record_keys() with its key
+        # state, as Game.run does) just before the step runs
+        self.game = game
+        self.module_name = module_name
+        self.seed = seed
+        self.level_path = level_path or ''
+        self.keyframe_interval = keyframe_interval
+        self.frames = 0
+        self.runs: List[List[int]] = []  # [input, frames]
+        self.keyframes: List[bytes] = []
+
+    def record(self, inputs: int):
+        if self.frames % self.keyframe_interval == 0:
+            self.keyframes.append(self.game.snapshot())
+        if self.runs and self.runs[-1][0] == inputs and self.runs[-1][1] < REPLAY_RUN_MAX:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([inputs, 1])
+        self.frames += 1
+
+    def record_keys(self, keys):
+        self.record(read_inputs(keys))
+
+    def save(self, path: str):
+        level = self.level_path.encode()
+        offset = (REPLAY_HEADER.size + len(level) + REPLAY_RUN.size * len(self.runs) +
+                  REPLAY_KEYFRAME.size * len(self.keyframes))
+        index = []
+        for keyframe in self.keyframes:
+            index.append(REPLAY_KEYFRAME.pack(offset, len(keyframe)))
+            offset += len(keyframe)
+        with open(path, 'wb') as f:
+            f.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.module_name.encode(), self.seed,
+                                       self.frames, self.keyframe_interval, len(self.runs), len(self.keyframes),
+                                       self.game.state_hash(), len(level)))
+            f.write(level)
+            f.write(b''.join(REPLAY_RUN.pack(inputs, frames) for inputs, frames in self.runs))
+            f.write(b''.join(index))
+            f.write(b''.join(self.keyframes))
+
+class Replay:
+    def __init__(self, path: str):
+        # Memory-mapped replay; the inputs are decoded up front (one byte per
+        # frame), keyframes are read on demand
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, module, self.seed, self.frames, self.keyframe_interval, run_count, keyframe_count, \
+            self.final_hash, level_length = REPLAY_HEADER.unpack_from(self.map)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+        self.module_name = module.rstrip(b'\0').decode()
+        if self.module_name not in ROLLBACK_MODULES:
+            raise ValueError(f"{path} records unknown game module {self.module_name!r}")
+        runs_offset = REPLAY_HEADER.size + level_length
+        self.level_path = self.map[REPLAY_HEADER.size:runs_offset].decode() or None
+        runs = np.frombuffer(self.map, dtype=[('inputs', 'u1'), ('frames', '<u2')], count=run_count,
+                             offset=runs_offset)
+        self.inputs = np.repeat(runs['inputs'], runs['frames']).tobytes()
+        index_offset = runs_offset + REPLAY_RUN.size * run_count
+        self.index = [REPLAY_KEYFRAME.unpack_from(self.map, index_offset + REPLAY_KEYFRAME.size * i)
+                      for i in range(keyframe_count)]
+        if len(self.inputs) != self.frames or not self.index:
+            raise ValueError(f"{path} is truncated")
+
+    def new_game(self, **kwargs):
+        module = importlib.import_module(self.module_name)
+        if self.level_path:
+            kwargs['level_path'] = self.level_path
+        game = module.Game(seed=self.seed, **kwargs)
+        game.restore(self.keyframe(0))
+        return game
+
+    def keyframe(self, index: int) -> bytes:
+        offset, size = self.index[index]
+        return self.map[offset:offset + size]
+
+    def seek(self, game, frame: int) -> int:
+        # Restore the nearest keyframe at or before frame, then simulate up
+        # to it; returns the number of steps simulated
+        frame = max(0, min(frame, self.frames))
+        keyframe = min(frame // self.keyframe_interval, len(self.index) - 1)
+        game.restore(self.keyframe(keyframe))
+        start = keyframe * self.keyframe_interval
+        self.play(game, start, frame)
+        return frame - start
+
+    def play(self, game, start: int = 0, end: Optional[int] = None):
+        # Fast-forward: simulate frames [start, end) as fast as possible
+        inputs = self.inputs
+        for frame in range(start, self.frames if end is None else end):
+            step_game(game, inputs[frame])
+
+    def verify(self, game) -> bool:
+        # True when game, played to the end, matches the recorded final state
+        return game.state_hash() == self.final_hash
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> 'Replay':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def frame_time_stats(times: List[float], budget_ms: float = FRAME_BUDGET_MS) -> Dict:
+    # Per-frame times in seconds -> summary in milliseconds
+    ms = np.asarray(times) * 1000
+    if not len(ms):
+        return {'frames': 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        'frames': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'max_ms': float(ms.max()),
+        'worst_frame': int(ms.argmax()),
+        'over_budget': int((ms > budget_ms).sum()),
+        'fps': float(1000 / ms.mean()),
+    }
+
+def benchmark(replay: Replay, render: bool = True) -> Dict:
+    # Replay as a workload at uncapped speed: one 60 Hz frame of steps
+    # (plus a render) per sample, the way Game.run spends a frame
+    game = replay.new_game(headless=True)
+    steps_per_frame = max(1, round(1 / (60 * game.timestep.step))) if render else 1
+    times = []
+    clock = time.perf_counter
+    for start in range(0, replay.frames, steps_per_frame):
+        begin = clock()
+        replay.play(game, start, min(start + steps_per_frame, replay.frames))
+        if render:
+            game.render(1.0)
+        times.append(clock() - begin)
+    stats = frame_time_stats(times)
+    stats['steps_per_frame'] = steps_per_frame
+    stats['deterministic'] = replay.verify(game)
+    return stats
+
+def game_kwargs(level_path: Optional[str]) -> Dict:
+    # Only testengine streams levels from a file
+    return {'level_path': level_path} if level_path else {}
+
+def record(module_name: str, path: str, seed: int, keyframe_interval: int, level_path: Optional[str] = None):
+    # The game's own Game.run with both local players on the keyboard,
+    # recording every step through its recorder hook
+    module = importlib.import_module(module_name)
+    game = module.Game(seed=seed, **game_kwargs(level_path))
+    recorder = ReplayRecorder(game, module_name, seed, keyframe_interval, level_path)
+    game.run(recorder)
+    recorder.save(path)
+    pygame.quit()
+    print(f"{recorder.frames} frames, {len(recorder.runs)} input runs, {len(recorder.keyframes)} keyframes, "
+          f"{os.path.getsize(path)} bytes written to {path}")
+
+def watch(replay: Replay, start: int):
+    # Windowed playback at game speed from frame start
+    game = replay.new_game()
+    replay.seek(game, start)
+    frame = start
+    while game.running and frame < replay.frames:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.running = False
+        frame_time = game.clock.tick(60) / 1000.0
+        for _ in range(game.timestep.advance(frame_time)):
+            if frame < replay.frames:
+                step_game(game, replay.inputs[frame])
+                frame += 1
+        game.render(game.timestep.alpha)
+    pygame.quit()
+
+def random_replay(module_name: str, path: str, frames: int, seed: int, keyframe_interval: int,
+                  level_path: Optional[str] = None):
+    # Headless recording from random inputs, for benchmark workloads
+    module = importlib.import_module(module_name)
+    game = module.Game(headless=True, seed=seed, **game_kwargs(level_path))
+    recorder = ReplayRecorder(game, module_name, seed, keyframe_interval, level_path)
+    rng = random.Random(seed)
+    inputs = 0
+    for _ in range(frames):
+        if rng.random() < 0.05:
+            inputs = rng.randrange(len(INPUT_KEYS))
+        recorder.record(inputs)
+        step_game(game, inputs)
+    recorder.save(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, play back and benchmark input replays")
+    commands = parser.add_subparsers(dest='command', required=True)
+    rec = commands.add_parser('record', help="Play with both players on the keyboard and record")
+    rec.add_argument('path')
+    rec.add_argument('--module', default=ROLLBACK_MODULES[-1], choices=ROLLBACK_MODULES)
+    rec.add_argument('--seed', type=int, default=None)
+    rec.add_argument('--keyframe-interval', type=int, default=REPLAY_KEYFRAME_INTERVAL)
+    rec.add_argument('--level', default=None, help="Streamed level file (testengine only)")
+    gen = commands.add_parser('random', help="Record a headless session from random inputs")
+    gen.add_argument('path')
+    gen.add_argument('--module', default=ROLLBACK_MODULES[-1], choices=ROLLBACK_MODULES)
+    gen.add_argument('--frames', type=int, default=36000)
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('--keyframe-interval', type=int, default=REPLAY_KEYFRAME_INTERVAL)
+    gen.add_argument('--level', default=None, help="Streamed level file (testengine only)")
+    play = commands.add_parser('play', help="Watch a replay")
+    play.add_argument('path')
+    play.add_argument('--start', type=int, default=0, help="Frame to seek to first")
+    bench = commands.add_parser('bench', help="Replay at uncapped speed and report frame times")
+    bench.add_argument('path')
+    bench.add_argument('--no-render', action='store_true', help="Simulation only, one step per frame")
+    args = parser.parse_args()
+    if getattr(args, 'level', None) and args.module != 'testengine':
+        parser.error("--level needs --module testengine")
+
+    if args.command == 'record':
+        seed = args.seed if args.seed is not None else random.randrange(1 << 31)
+        record(args.module, args.path, seed, args.keyframe_interval, args.level)
+    elif args.command == 'random':
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        random_replay(args.module, args.path, args.frames, args.seed, args.keyframe_interval, args.level)
+        print(f"{args.frames} frames, {os.path.getsize(args.path)} bytes written to {args.path}")
+    elif args.command == 'play':
+        with Replay(args.path) as replay:
+            watch(replay, args.start)
+    else:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        with Replay(args.path) as replay:
+            stats = benchmark(replay, render=not args.no_render)
+        print(f"{replay.module_name}: {stats['frames']} frames of {stats['steps_per_frame']} steps, "
+              f"mean {stats['mean_ms']:.2f} ms ({stats['fps']:.0f} fps), p50 {stats['p50_ms']:.2f}, "
+              f"p95 {stats['p95_ms']:.2f}, p99 {stats['p99_ms']:.2f}, max {stats['max_ms']:.2f} ms "
+              f"at frame {stats['worst_frame']}, {stats['over_budget']} over {FRAME_BUDGET_MS:.1f} ms")
+        print("playback matches the recording" if stats['deterministic'] else "playback DIVERGED from the recording")
+
+if __name__ == "__main__":
+    main()
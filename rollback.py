@@ -0,0 +1,378 @@
+import argparse
+import heapq
+import importlib
+import os
+import random
+import socket
+import struct
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pygame
+
+# Rollback networking for the two-player platformer cores (testengine,
+# ezgunnerinfdevpt2): each machine owns one player and only inputs go over
+# the wire. The remote player's input is predicted (last one received),
+# and when a confirmed input disagrees with the prediction the game is
+# restored from a snapshot and re-simulated up to the current frame.
+
+ROLLBACK_MODULES = ('testengine', 'ezgunnerinfdevpt2')
+ROLLBACK_MAX_FRAMES = 8  # Simulation steps the local side may run ahead of the remote inputs
+ROLLBACK_INPUT_DELAY = 2  # Steps between sampling a local input and simulating it
+ROLLBACK_SEED = 0  # Both peers must build their games from the same seed
+ROLLBACK_CHECKSUM_HISTORY = 256  # Confirmed state hashes kept for desync checks
+FRAME_BUDGET_MS = 1000 / 60
+
+# Inputs: three bits per player, player 0 is Mario on the arrows and space,
+# player 1 Luigi on A/D/W
+INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP = 1, 2, 4
+PLAYER_INPUT_BITS = 3
+PLAYER_KEYS = ((pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE), (pygame.K_a, pygame.K_d, pygame.K_w))
+
+# Key states for every combined two-player input, in the form Game.handle_input reads
+INPUT_KEYS = [{key: bool(mask >> (player * PLAYER_INPUT_BITS + bit) & 1)
+               for player, keys in enumerate(PLAYER_KEYS) for bit, key in enumerate(keys)}
+              for mask in range(1 << (2 * PLAYER_INPUT_BITS))]
+
+# Packet: magic, sender's player, frame of the first input carried, inputs
+# of the receiver's player seen so far, a confirmed frame and its state hash,
+# input count; followed by one input byte per frame
+PACKET_MAGIC = b'FTRB'
+PACKET_HEADER = struct.Struct('<4sBIIIQB')
+PACKET_MAX_INPUTS = 255
+
+def read_local_input(keys) -> int:
+    # Either control scheme drives the local player
+    mask = 0
+    for left, right, jump in PLAYER_KEYS:
+        if keys[left]:
+            mask |= INPUT_LEFT
+        if keys[right]:
+            mask |= INPUT_RIGHT
+        if keys[jump]:
+            mask |= INPUT_JUMP
+    return mask
+
+class UdpLink:
+    def __init__(self, port: int, peer: Tuple[str, int], latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 loss: float = 0.0, seed: Optional[int] = None, clock: Callable[[], float] = time.perf_counter,
+                 host: str = '127.0.0.1'):
+        # Non-blocking UDP socket with an artificial network shim on the
+        # sending side: every packet is dropped with probability loss, the
+        # rest leave after latency_ms plus up to jitter_ms
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.peer = peer
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.outbox = []  # (due time, sequence, packet) heap
+        self.sequence = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, packet: bytes):
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        due = self.clock() + self.latency + self.rng.uniform(0, self.jitter)
+        heapq.heappush(self.outbox, (due, self.sequence, packet))
+        self.sequence += 1
+        self.flush()
+
+    def flush(self):
+        now = self.clock()
+        while self.outbox and self.outbox[0][0] <= now:
+            _, _, packet = heapq.heappop(self.outbox)
+            try:
+                self.sock.sendto(packet, self.peer)
+                self.sent += 1
+            except OSError:
+                self.dropped += 1  # Peer not up yet
+
+    def receive(self) -> List[bytes]:
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packet, _ = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+            packets.append(packet)
+
+    def close(self):
+        self.sock.close()
+
+class RollbackSession:
+    def __init__(self, game, player: int, link: UdpLink, max_rollback: int = ROLLBACK_MAX_FRAMES,
+                 input_delay: int = ROLLBACK_INPUT_DELAY):
+        # Drives game one fixed step per tick() from the local player's input
+        # and the remote player's confirmed or predicted input
+        self.game = game
+        self.player = player
+        self.link = link
+        self.max_rollback = max_rollback
+        self.input_delay = input_delay
+        self.dt = game.timestep.step
+        self.snapshot_hash = sys.modules[type(game).__module__].snapshot_hash
+
+        self.frame = 0  # Next step to simulate
+        self.local_inputs = [0] * input_delay  # Per frame, all confirmed
+        self.remote_inputs: List[int] = []  # Confirmed per frame, contiguous from frame 0
+        self.predicted: Dict[int, int] = {}  # Frame -> remote input simulated before it was confirmed
+        self.snapshots: Dict[int, bytes] = {}  # Frame -> state before simulating it
+        self.rollback_frame: Optional[int] = None  # Earliest mispredicted frame
+        self.peer_ack = 0  # Local inputs the peer has seen
+        self.checksums: Dict[int, int] = {}  # Confirmed frame -> state hash
+        self.checksum_frame = 0
+        self.peer_checksum = (0, 0)
+
+        # Per-tick readouts and totals
+        self.last_depth = 0
+        self.last_resim_ms = 0.0
+        self.depth_histogram = [0] * (max_rollback + 1)
+        self.resim_total_ms = 0.0
+        self.resim_max_ms = 0.0
+        self.resim_steps = 0
+        self.over_budget = 0
+        self.mispredictions = 0
+        self.stalls = 0
+        self.desyncs = 0
+
+    def tick(self, local_input: int) -> bool:
+        # One fixed step: take in the peer's inputs, roll back if a
+        # prediction was wrong, then simulate the next frame. Returns False
+        # when the remote inputs are too far behind to predict and the step
+        # was skipped
+        self.poll()
+        self.resimulate()
+        self.check_desync()
+        if self.frame - len(self.remote_inputs) >= self.max_rollback:
+            self.stalls += 1
+            self.send()
+            return False
+        self.local_inputs.append(local_input)
+        self.send()
+        self.simulate(self.frame)
+        self.frame += 1
+        return True
+
+    def poll(self):
+        for packet in self.link.receive():
+            if len(packet) < PACKET_HEADER.size:
+                continue
+            magic, player, first, ack, checksum_frame, checksum, count = PACKET_HEADER.unpack_from(packet)
+            if magic != PACKET_MAGIC or player == self.player:
+                continue
+            self.peer_ack = max(self.peer_ack, ack)
+            if checksum_frame > self.peer_checksum[0]:
+                self.peer_checksum = (checksum_frame, checksum)
+            inputs = packet[PACKET_HEADER.size:PACKET_HEADER.size + count]
+            # Inputs past a gap wait for a later packet to fill it
+            for frame in range(len(self.remote_inputs), first + len(inputs)):
+                if frame < first:
+                    break
+                self.confirm(frame, inputs[frame - first])
+
+    def confirm(self, frame: int, remote_input: int):
+        self.remote_inputs.append(remote_input)
+        predicted = self.predicted.pop(frame, None)
+        if predicted is not None and predicted != remote_input:
+            self.mispredictions += 1
+            if self.rollback_frame is None or frame < self.rollback_frame:
+                self.rollback_frame = frame
+
+    def resimulate(self):
+        # Restore the state before the first mispredicted frame and replay
+        # the frames since with the corrected inputs
+        target, self.rollback_frame = self.rollback_frame, None
+        if target is None:
+            self.last_depth = 0
+            self.last_resim_ms = 0.0
+            self.depth_histogram[0] += 1
+        else:
+            start = time.perf_counter()
+            # The view keeps running; only the simulation rewinds
+            self.game.restore(self.snapshots[target], view=False)
+            for frame in range(target, self.frame):
+                self.simulate(frame)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.last_depth = self.frame - target
+            self.last_resim_ms = elapsed
+            self.depth_histogram[min(self.last_depth, self.max_rollback)] += 1
+            self.resim_total_ms += elapsed
+            self.resim_max_ms = max(self.resim_max_ms, elapsed)
+            self.resim_steps += self.last_depth
+            if elapsed > FRAME_BUDGET_MS:
+                self.over_budget += 1
+
+        # States up to the first unconfirmed input are final: hash them for
+        # the desync check and drop the snapshots that can no longer be
+        # rolled back to
+        confirmed = min(len(self.remote_inputs), self.frame - 1)
+        for frame in range(self.checksum_frame + 1, confirmed + 1):
+            self.checksums[frame] = self.snapshot_hash(self.snapshots[frame])
+            self.checksums.pop(frame - ROLLBACK_CHECKSUM_HISTORY, None)
+            self.snapshots.pop(frame - 1, None)
+        self.checksum_frame = max(self.checksum_frame, confirmed)
+
+    def check_desync(self):
+        frame, checksum = self.peer_checksum
+        if frame and self.checksums.get(frame, checksum) != checksum:
+            self.desyncs += 1
+            self.peer_checksum = (0, 0)
+
+    def simulate(self, frame: int):
+        self.snapshots[frame] = self.game.snapshot()
+        if frame < len(self.remote_inputs):
+            remote_input = self.remote_inputs[frame]
+        else:
+            # Predict the remote player keeps holding their last input
+            remote_input = self.remote_inputs[-1] if self.remote_inputs else 0
+            self.predicted[frame] = remote_input
+        local_input = self.local_inputs[frame]
+        inputs = [local_input, remote_input] if self.player == 0 else [remote_input, local_input]
+        self.game.handle_input(INPUT_KEYS[inputs[0] | inputs[1] << PLAYER_INPUT_BITS])
+        self.game.update(self.dt)
+
+    def send(self):
+        # Every local input the peer has not acknowledged yet, so a lost
+        # packet is covered by the next one
+        first = max(self.peer_ack, len(self.local_inputs) - PACKET_MAX_INPUTS)
+        inputs = bytes(self.local_inputs[first:])
+        checksum = self.checksums.get(self.checksum_frame, 0)
+        self.link.send(PACKET_HEADER.pack(PACKET_MAGIC, self.player, first, len(self.remote_inputs),
+                                          self.checksum_frame, checksum, len(inputs)) + inputs)
+
+    def stats(self) -> dict:
+        rollbacks = sum(self.depth_histogram[1:])
+        step_ms = self.resim_total_ms / self.resim_steps if self.resim_steps else 0.0
+        return {
+            'frames': self.frame,
+            'rollbacks': rollbacks,
+            'mispredictions': self.mispredictions,
+            'depth_histogram': list(self.depth_histogram),
+            'max_depth': max((depth for depth, count in enumerate(self.depth_histogram) if count), default=0),
+            'mean_resim_ms': self.resim_total_ms / rollbacks if rollbacks else 0.0,
+            'max_resim_ms': self.resim_max_ms,
+            'step_ms': step_ms,
+            'worst_case_ms': step_ms * self.max_rollback,  # A full-depth rollback at the mean step cost
+            'over_budget': self.over_budget,
+            'stalls': self.stalls,
+            'desyncs': self.desyncs,
+            'packets_sent': self.link.sent,
+            'packets_dropped': self.link.dropped,
+        }
+
+def format_stats(stats: dict) -> str:
+    return (f"frame {stats['frames']}: {stats['rollbacks']} rollbacks, depth max {stats['max_depth']}, "
+            f"resim mean {stats['mean_resim_ms']:.2f} ms max {stats['max_resim_ms']:.2f} ms "
+            f"(full {stats['worst_case_ms']:.2f} of {FRAME_BUDGET_MS:.1f} ms budget, "
+            f"{stats['over_budget']} over), {stats['stalls']} stalls, {stats['desyncs']} desyncs, "
+            f"{stats['packets_dropped']}/{stats['packets_sent'] + stats['packets_dropped']} packets dropped")
+
+def reference_hash(module, seed: int, inputs: List[Tuple[int, int]]) -> int:
+    # State hash after simulating the given per-frame inputs offline
+    game = module.Game(headless=True, seed=seed)
+    for player_0, player_1 in inputs:
+        game.handle_input(INPUT_KEYS[player_0 | player_1 << PLAYER_INPUT_BITS])
+        game.update(game.timestep.step)
+    return game.state_hash()
+
+def run_loopback(module_name: str, steps: int, latency_ms: float, jitter_ms: float, loss: float,
+                 port: int, max_rollback: int, input_delay: int, seed: int) -> List[dict]:
+    # Two headless peers in this process over localhost UDP on a virtual
+    # clock, with random inputs; checks both against an offline run
+    from headless import ScriptedInput, PLAYTEST_KEYS
+    module = importlib.import_module(module_name)
+    now = [0.0]
+    clock = lambda: now[0]
+    games = [module.Game(headless=True, seed=seed) for _ in range(2)]
+    links = [UdpLink(port, ('127.0.0.1', port + 1), latency_ms, jitter_ms, loss, seed, clock),
+             UdpLink(port + 1, ('127.0.0.1', port), latency_ms, jitter_ms, loss, seed + 1, clock)]
+    sessions = [RollbackSession(game, player, link, max_rollback, input_delay)
+                for player, (game, link) in enumerate(zip(games, links))]
+    scripts = [ScriptedInput.random(steps, seed + player, PLAYTEST_KEYS[:3], (5, 30)) for player in range(2)]
+
+    # Run until both sides have confirmed every frame of the scripts
+    dt = games[0].timestep.step
+    while any(session.checksum_frame < steps for session in sessions):
+        now[0] += dt
+        for session, script in zip(sessions, scripts):
+            session.tick(read_local_input(script[len(session.local_inputs) - input_delay]))
+
+    inputs = list(zip(sessions[0].local_inputs[:steps], sessions[1].local_inputs[:steps]))
+    expected = reference_hash(module, seed, inputs)
+    for session in sessions:
+        if session.checksums[steps] != expected:
+            raise AssertionError(f"player {session.player + 1} diverged from the offline run by frame {steps}")
+    for link in links:
+        link.close()
+    return [session.stats() for session in sessions]
+
+def run_play(module_name: str, player: int, port: int, peer: Tuple[str, int], latency_ms: float,
+             jitter_ms: float, loss: float, max_rollback: int, input_delay: int, seed: int, host: str):
+    # Windowed game for one player, the other one runs on the peer
+    module = importlib.import_module(module_name)
+    game = module.Game(seed=seed)
+    pygame.display.set_caption(f"Super Mario FX Beta - player {player + 1}")
+    session = RollbackSession(game, player, UdpLink(port, peer, latency_ms, jitter_ms, loss, host=host),
+                              max_rollback, input_delay)
+    last_report = time.perf_counter()
+    while game.running:
+        frame_time = game.clock.tick(60) / 1000.0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.running = False
+        local_input = read_local_input(pygame.key.get_pressed())
+        for _ in range(game.timestep.advance(frame_time)):
+            session.tick(local_input)
+        game.render(game.timestep.alpha)
+        if time.perf_counter() - last_report > 5:
+            print(format_stats(session.stats()))
+            last_report = time.perf_counter()
+    print(format_stats(session.stats()))
+    session.link.close()
+    pygame.quit()
+
+def parse_address(text: str) -> Tuple[str, int]:
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-player rollback netplay over UDP")
+    parser.add_argument('--module', default=ROLLBACK_MODULES[-1], choices=ROLLBACK_MODULES)
+    parser.add_argument('--latency', type=float, default=0.0, help="Artificial one-way latency in ms")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random latency in ms")
+    parser.add_argument('--loss', type=float, default=0.0, help="Packet loss probability")
+    parser.add_argument('--max-rollback', type=int, default=ROLLBACK_MAX_FRAMES)
+    parser.add_argument('--input-delay', type=int, default=ROLLBACK_INPUT_DELAY)
+    parser.add_argument('--seed', type=int, default=ROLLBACK_SEED)
+    commands = parser.add_subparsers(dest='command', required=True)
+    loopback = commands.add_parser('loopback', help="Both peers headless in this process on localhost")
+    loopback.add_argument('--steps', type=int, default=6000)
+    loopback.add_argument('--port', type=int, default=7400)
+    play = commands.add_parser('play', help="Play one side against a peer")
+    play.add_argument('player', type=int, choices=(1, 2))
+    play.add_argument('--port', type=int, default=7400)
+    play.add_argument('--peer', type=parse_address, default=('127.0.0.1', 7401), help="host:port")
+    play.add_argument('--host', default='0.0.0.0', help="Local address to bind")
+    args = parser.parse_args()
+
+    if args.command == 'loopback':
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        for player, stats in enumerate(run_loopback(args.module, args.steps, args.latency, args.jitter, args.loss,
+                                                    args.port, args.max_rollback, args.input_delay, args.seed)):
+            print(f"player {player + 1}: {format_stats(stats)}")
+            print(f"          depth histogram {stats['depth_histogram']}")
+        print("both peers match the offline simulation")
+    else:
+        run_play(args.module, args.player - 1, args.port, args.peer, args.latency, args.jitter, args.loss,
+                 args.max_rollback, args.input_delay, args.seed, args.host)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import argparse
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import pygame
+
+from replay import read_inputs
+from rollback import INPUT_KEYS
+
+# Two-process runtime for ezgunnerinfdevpt2: a simulation process steps the
+# PhysicsWorld and publishes every body's transforms into a ring of
+# fixed-layout frames in shared memory, while this (render) process draws the
+# newest complete frame straight out of the shared buffers. Inputs flow the
+# other way through a single-producer single-consumer byte ring in the same
+# block: the renderer pushes each change of input and the simulation takes
+# one per step, oldest first, so short presses are not lost between steps.
+# Only plain stores and sequence numbers coordinate the two sides.
+
+SPLIT_SLOTS = 3  # Frames in the ring: one being drawn, one newest, one being written
+INPUT_RING_SIZE = 256
+SPLIT_ENTITIES = 10000  # Crowd bodies in the default scene
+SPLIT_SEED = 0
+
+# Control words (uint64) at the start of the block
+CONTROL_SLOTS, CONTROL_CAPACITY, CONTROL_LATEST, CONTROL_READER, CONTROL_QUIT, CONTROL_INPUT_HEAD, \
+    CONTROL_INPUT_TAIL, CONTROL_STEPS = range(8)
+CONTROL_WORDS = 8
+
+# Per slot: sequence begin/end, body count, simulation frame (uint64), then
+# camera, previous camera, alpha, publish time (float64), then the position,
+# previous position (float64 x, y) and flag (uint8) arrays
+SLOT_WORDS = 4
+SLOT_VIEW = 6
+FLAG_FACING_RIGHT = 1
+
+def slot_size(capacity: int) -> int:
+    return 8 * (SLOT_WORDS + SLOT_VIEW) + 32 * capacity + (capacity + 7) // 8 * 8
+
+class FrameView:
+    __slots__ = ('slot', 'sequence', 'count', 'frame', 'camera', 'previous_camera', 'alpha', 'time',
+                 'position', 'previous_position', 'flags')
+
+class FrameRing:
+    def __init__(self, capacity: int = 0, slots: int = SPLIT_SLOTS, name: Optional[str] = None):
+        # Creates the block for capacity bodies, or attaches to the block
+        # called name (capacity and slots are then read from it)
+        self.owner = name is None
+        if self.owner:
+            size = 8 * CONTROL_WORDS + INPUT_RING_SIZE + slots * slot_size(capacity)
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        buf = self.memory.buf
+        self.control = np.ndarray((CONTROL_WORDS,), np.uint64, buf, 0)
+        if self.owner:
+            self.control[:] = 0
+            self.control[CONTROL_SLOTS] = slots
+            self.control[CONTROL_CAPACITY] = capacity
+        self.slots = int(self.control[CONTROL_SLOTS])
+        self.capacity = int(self.control[CONTROL_CAPACITY])
+        self.inputs = np.ndarray((INPUT_RING_SIZE,), np.uint8, buf, 8 * CONTROL_WORDS)
+
+        # Views of every slot, built once
+        self.words, self.view, self.positions, self.previous, self.flags = [], [], [], [], []
+        offset = 8 * CONTROL_WORDS + INPUT_RING_SIZE
+        for _ in range(self.slots):
+            self.words.append(np.ndarray((SLOT_WORDS,), np.uint64, buf, offset))
+            self.view.append(np.ndarray((SLOT_VIEW,), np.float64, buf, offset + 8 * SLOT_WORDS))
+            arrays = offset + 8 * (SLOT_WORDS + SLOT_VIEW)
+            self.positions.append(np.ndarray((self.capacity, 2), np.float64, buf, arrays))
+            self.previous.append(np.ndarray((self.capacity, 2), np.float64, buf, arrays + 16 * self.capacity))
+            self.flags.append(np.ndarray((self.capacity,), np.uint8, buf, arrays + 32 * self.capacity))
+            offset += slot_size(self.capacity)
+        self.sequence = 0
+        self.reading = None
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    # Simulation side
+
+    def publish(self, game, alpha: float):
+        # Copy the world's transforms into a free slot: neither the newest
+        # frame nor the one the renderer announced it is reading
+        control = self.control
+        busy = (int(control[CONTROL_LATEST]) - 1, int(control[CONTROL_READER]) - 1)
+        slot = next(s for s in range(self.slots) if s not in busy)
+        self.sequence += 1
+        words = self.words[slot]
+        words[0] = self.sequence  # Begin: the slot is being written
+
+        world = game.world
+        count = world.count
+        np.copyto(self.positions[slot][:count], world.position[:count])
+        np.copyto(self.previous[slot][:count], world.previous_position[:count])
+        flags = self.flags[slot]
+        flags[:count] = FLAG_FACING_RIGHT
+        for index, obj in enumerate(game.game_objects):
+            flags[index] = FLAG_FACING_RIGHT if obj.facing_right else 0
+        self.view[slot][:] = (game.camera.x, game.camera.y, game.previous_camera.x, game.previous_camera.y,
+                              alpha, time.perf_counter())
+        words[2] = count
+        words[3] = game.frame
+
+        words[1] = self.sequence  # End: complete
+        control[CONTROL_LATEST] = slot + 1
+
+    def pop_inputs(self) -> Optional[int]:
+        # Oldest input pushed by the renderer and not yet taken, or None when
+        # the ring is empty and the simulation should hold its last input
+        control = self.control
+        head, tail = int(control[CONTROL_INPUT_HEAD]), int(control[CONTROL_INPUT_TAIL])
+        if head == tail:
+            return None
+        inputs = int(self.inputs[tail % INPUT_RING_SIZE])
+        control[CONTROL_INPUT_TAIL] = tail + 1
+        return inputs
+
+    # Render side
+
+    def acquire(self) -> Optional[FrameView]:
+        # Zero-copy view of the newest complete frame. publish() may have read
+        # CONTROL_READER just before the slot is announced here and picked it
+        # anyway, but only after a newer frame replaced it as the latest. So
+        # once the slot is announced it must still be the latest, or the
+        # reader retries. From then on the writer picks another slot. Store
+        # and load order across processes is not fenced, so release()
+        # rechecks the begin sequence as a backstop
+        control = self.control
+        while True:
+            latest = int(control[CONTROL_LATEST])
+            if not latest:
+                return None
+            slot = latest - 1
+            control[CONTROL_READER] = latest
+            if int(control[CONTROL_LATEST]) != latest:
+                continue
+            words = self.words[slot]
+            sequence = int(words[1])
+            if int(words[0]) == sequence:
+                break
+        frame = FrameView()
+        frame.slot = slot
+        frame.sequence = sequence
+        frame.count = int(words[2])
+        frame.frame = int(words[3])
+        view = self.view[slot]
+        frame.camera = (float(view[0]), float(view[1]))
+        frame.previous_camera = (float(view[2]), float(view[3]))
+        frame.alpha = float(view[4])
+        frame.time = float(view[5])
+        frame.position = self.positions[slot][:frame.count]
+        frame.previous_position = self.previous[slot][:frame.count]
+        frame.flags = self.flags[slot][:frame.count]
+        self.reading = frame
+        return frame
+
+    def release(self) -> bool:
+        # Done with the acquired frame; False when it was torn while in use
+        frame, self.reading = self.reading, None
+        self.control[CONTROL_READER] = 0
+        return frame is None or int(self.words[frame.slot][0]) == frame.sequence
+
+    def push_input(self, inputs: int) -> bool:
+        control = self.control
+        head, tail = int(control[CONTROL_INPUT_HEAD]), int(control[CONTROL_INPUT_TAIL])
+        if head - tail >= INPUT_RING_SIZE:
+            return False
+        self.inputs[head % INPUT_RING_SIZE] = inputs
+        control[CONTROL_INPUT_HEAD] = head + 1
+        return True
+
+    def request_quit(self):
+        self.control[CONTROL_QUIT] = 1
+
+    @property
+    def quit_requested(self) -> bool:
+        return bool(self.control[CONTROL_QUIT])
+
+    @property
+    def steps(self) -> int:
+        return int(self.control[CONTROL_STEPS])
+
+    def close(self):
+        # Drop the array views before the mapping goes away
+        self.control = self.inputs = self.reading = None
+        self.words = self.view = self.positions = self.previous = self.flags = []
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+def make_game(entities: int, seed: int, headless: bool = False):
+    import ezgunnerinfdevpt2
+    game = ezgunnerinfdevpt2.Game(headless=headless)
+    game.add_crowd(entities, seed)
+    return game
+
+def simulate(name: str, entities: int, seed: int, uncapped: bool = False):
+    # Simulation process: fixed steps in real time (or back to back when
+    # uncapped), publishing a frame after each batch
+    ring = FrameRing(name=name)
+    game = make_game(entities, seed, headless=True)
+    inputs = 0
+    last = time.perf_counter()
+    try:
+        while not ring.quit_requested:
+            now = time.perf_counter()
+            steps = 1 if uncapped else game.timestep.advance(now - last)
+            last = now
+            if not steps:
+                time.sleep(game.timestep.step / 4)
+                continue
+            for _ in range(steps):
+                # One queued input per step, in order; hold the last when empty
+                pushed = ring.pop_inputs()
+                if pushed is not None:
+                    inputs = pushed
+                game.handle_input(INPUT_KEYS[inputs])
+                game.update(game.timestep.step)
+            ring.control[CONTROL_STEPS] = ring.steps + steps
+            ring.publish(game, 1.0 if uncapped else game.timestep.alpha)
+    finally:
+        ring.close()
+        pygame.quit()
+
+def show(game, frame: FrameView):
+    # Point the render-side world at the frame's shared arrays and draw
+    world = game.world
+    world.position = frame.position
+    world.previous_position = frame.previous_position
+    game.camera.update(frame.camera)
+    game.previous_camera.update(frame.previous_camera)
+    for obj, flag in zip(game.game_objects, frame.flags[:len(game.game_objects)].tolist()):
+        if obj.facing_right != bool(flag & FLAG_FACING_RIGHT):
+            obj.face(not obj.facing_right)
+    game.render(frame.alpha)
+
+class SplitRuntime:
+    def __init__(self, entities: int = SPLIT_ENTITIES, seed: int = SPLIT_SEED, headless: bool = False,
+                 uncapped: bool = False):
+        # Renderer in this process, simulation in a spawned one
+        self.game = make_game(entities, seed, headless)
+        self.ring = FrameRing(self.game.world.count)
+        context = multiprocessing.get_context('spawn')
+        self.process = context.Process(target=simulate, args=(self.ring.name, entities, seed, uncapped),
+                                       name='simulation', daemon=True)
+        self.process.start()
+        self.frames = 0
+        self.new_frames = 0
+        self.torn = 0
+        self.last_sequence = 0
+        self.steps = 0
+        self.last_inputs = 0
+
+    def frame(self, inputs: int = 0) -> bool:
+        # Push the input if it changed and draw the newest published frame;
+        # False while the simulation has not published anything yet. Only
+        # changes go in the ring, so a renderer faster than the simulation
+        # cannot queue up stale input; a full ring retries next frame
+        if inputs != self.last_inputs and self.ring.push_input(inputs):
+            self.last_inputs = inputs
+        frame = self.ring.acquire()
+        if frame is None:
+            return False
+        show(self.game, frame)
+        if not self.ring.release():
+            self.torn += 1
+        self.frames += 1
+        if frame.sequence != self.last_sequence:
+            self.new_frames += 1
+            self.last_sequence = frame.sequence
+        return True
+
+    def run(self):
+        game = self.game
+        while game.running and self.process.is_alive():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    game.running = False
+            game.clock.tick(60)
+            self.frame(read_inputs(pygame.key.get_pressed()))
+
+    def close(self):
+        self.ring.request_quit()
+        self.process.join(5)
+        self.steps = self.ring.steps
+        # The world's arrays may still view the ring, give it its own copies
+        world = self.game.world
+        world.position = np.array(world.position)
+        world.previous_position = np.array(world.previous_position)
+        self.ring.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="ezgunnerinfdevpt2 with simulation and rendering in two processes")
+    parser.add_argument('--entities', type=int, default=SPLIT_ENTITIES)
+    parser.add_argument('--seed', type=int, default=SPLIT_SEED)
+    parser.add_argument('--single', action='store_true', help="Run the usual single-process Game.run instead")
+    args = parser.parse_args()
+    if args.single:
+        make_game(args.entities, args.seed).run()
+        return
+    runtime = SplitRuntime(args.entities, args.seed)
+    try:
+        runtime.run()
+    finally:
+        runtime.close()
+        pygame.quit()
+    print(f"{runtime.frames} frames drawn, {runtime.new_frames} new, {runtime.torn} torn, "
+          f"{runtime.steps} simulation steps")
+
+if __name__ == "__main__":
+    main()
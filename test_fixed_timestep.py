@@ -0,0 +1,21 @@
+# test_fixed_timestep.py
+###
+# Rate independence of the fixed-timestep platformer cores, run headless.
+# Run: python -m pytest test_fixed_timestep.py
+import pygame
+import pytest
+from headless import GAME_MODULES, ScriptedInput, run_instance
+
+@pytest.mark.parametrize('module', GAME_MODULES)
+def test_distance_does_not_depend_on_the_step_rate(module):
+    # A quarter second of running, then a second of coasting on friction:
+    # Mario covers the same ground at 120 and 240 steps per second
+    start = run_instance({'module': module, 'steps': 0})['final']['objects'][0][0]
+    distances = []
+    for hz in (120, 240):
+        inputs = ScriptedInput([(hz // 4, [pygame.K_RIGHT]), (hz, [])])
+        result = run_instance({'module': module, 'inputs': inputs, 'constants': {'SIMULATION_HZ': hz},
+                               'record_every': 0})
+        distances.append(result['final']['objects'][0][0] - start)
+    assert distances[0] > 0
+    assert distances[1] == pytest.approx(distances[0], rel=0.03)
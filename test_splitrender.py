@@ -0,0 +1,20 @@
+# test_splitrender.py
+###
+# Input ring of the two-process runtime, driven from one process.
+# Run: python -m pytest test_splitrender.py
+from splitrender import INPUT_RING_SIZE, FrameRing
+
+def test_inputs_are_taken_one_per_step_in_order():
+    # A press and release pushed between two simulation steps must both
+    # reach the simulation, oldest first
+    ring = FrameRing(4)
+    try:
+        assert ring.pop_inputs() is None
+        for inputs in (0b10, 0b00, 0b01):
+            assert ring.push_input(inputs)
+        assert [ring.pop_inputs() for _ in range(4)] == [0b10, 0b00, 0b01, None]
+        for _ in range(INPUT_RING_SIZE):
+            assert ring.push_input(1)
+        assert not ring.push_input(1)
+    finally:
+        ring.close()
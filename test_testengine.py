@@ -0,0 +1,31 @@
+# test_testengine.py
+###
+# Simulation checks for testengine, run headless. Run: python -m pytest test_testengine.py
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+import testengine
+from headless import KeyState
+
+RIGHT = KeyState([pygame.K_RIGHT])
+
+def test_streamed_level_pages_around_the_player(tmp_path):
+    # A ground far wider than the view, walked from one end: chunks must page
+    # in ahead of Mario and out behind him, and he must never fall through
+    path = str(tmp_path / 'long.ftlv')
+    ground_y = 500
+    testengine.write_level(path, [(x, ground_y, 200, 20) for x in range(0, 40000, 200)],
+                           spawns=[(100, 400, testengine.SPAWN_PLAYER), (160, 400, testengine.SPAWN_PLAYER)])
+    game = testengine.Game(headless=True, level_path=path)
+    landed = False
+    for _ in range(3000):
+        game.handle_input(RIGHT)
+        game.update(game.timestep.step)
+        landed = landed or game.mario.on_ground
+        if landed:
+            assert game.mario.position.y == ground_y - game.mario.height
+    stats = game.level.stats()
+    assert game.mario.position.x > 3 * testengine.LEVEL_CHUNK_WIDTH
+    assert stats['loads'] > 3 and stats['unloads'] > 0
+    assert stats['resident_chunks'] < stats['loads']
+    game.close()
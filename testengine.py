@@ -1,17 +1,32 @@
-ezenginev0.py 
+# ezenginev0.py
 ###
-[C]Flames Labs [20XX]
+# [C]Flames Labs [20XX]
+import os
 import pygame
 import random
 import math
+import bisect
+import hashlib
+import mmap
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 # FTRender 1.0 System Constants
 RENDER_SCALE = 2
 SUBPIXEL_PRECISION = 4
-MAX_SPRITES = 128
+MAX_SPRITES = None  # Render queue cap, None for unbounded
 SCANLINE_BUFFER_SIZE = 256
+TRANSFORM_CACHE_BUDGET = 16 * 1024 * 1024  # Bytes of cached sprite variants
+TRANSFORM_ROTATION_STEP = 1.0  # Degrees per cached rotation step
+EFFECT_WORKERS = None  # Threads for banded post-processing, None for one per core
+EFFECT_MIN_BAND_ROWS = 32  # Frames are not cut into bands thinner than this
 
 # FX Beta-specific constants
 PERSPECTIVE_DEPTH = 2.5
@@ -20,9 +35,35 @@ CAMERA_SMOOTHING = 0.15
 GRAVITY = 15.0
 JUMP_FORCE = -450
 RUN_SPEED = 350
-FRICTION = 0.85
+FRICTION = 0.85  # Share of horizontal speed kept per 1/FRICTION_HZ s
+FRICTION_HZ = 60  # Rate FRICTION was tuned at (once per 60 fps frame)
 
-@dataclass
+# Fixed-timestep simulation
+SIMULATION_HZ = 120
+MAX_CATCHUP_STEPS = 8  # Simulation steps per rendered frame before dropping time
+THREADED_PHYSICS = False  # Simulate the next frame on a worker thread while this one is drawn
+
+# Collision broadphase
+SPATIAL_HASH_CELL_SIZE = 128  # Grid cell size in world pixels
+CULL_MARGIN = 32  # World pixels around the view when querying moving objects
+
+# Streaming levels
+LEVEL_MAGIC = b'FTLV'
+LEVEL_VERSION = 1
+LEVEL_CHUNK_WIDTH = 1024  # World pixels per level chunk
+LEVEL_TILE_SIZE = 32
+LEVEL_PREFETCH_CHUNKS = 1  # Chunks kept loaded beyond each edge of the view
+SPAWN_PLAYER = 0  # Spawn kinds, the rest are up to the game
+
+# Game snapshots
+SNAPSHOT_MAGIC = b'FTSS'
+SNAPSHOT_VERSION = 4
+
+# Mode-7 ground plane
+MODE7_CAMERA_HEIGHT = 32.0
+MODE7_FOCAL_LENGTH = 256.0
+
+@dataclass(slots=True)
 class RenderObject:
     texture: pygame.Surface
     position: Tuple[float, float]
@@ -32,104 +73,995 @@ class RenderObject:
     perspective_enabled: bool = True
     ascii_mode: bool = False
     
+class SurfacePool:
+    def __init__(self):
+        # Named fixed-size buffers live for the whole run; temporary surfaces
+        # are handed out per frame and recycled by end_frame()
+        self.buffers: Dict[object, pygame.Surface] = {}
+        self.free: Dict[Tuple[Tuple[int, int], int], List[pygame.Surface]] = {}
+        self.in_use: List[Tuple[Tuple[Tuple[int, int], int], pygame.Surface]] = []
+        self.allocations = 0  # Surfaces created during the current frame
+        self.last_frame_allocations = 0
+        self.total_allocations = 0
+
+    def _allocate(self, size: Tuple[int, int], flags: int) -> pygame.Surface:
+        self.allocations += 1
+        self.total_allocations += 1
+        return pygame.Surface(size, flags)
+
+    def buffer(self, name, size: Tuple[int, int], flags: int = 0) -> pygame.Surface:
+        # Persistent intermediate buffer, only reallocated if its size changes
+        surface = self.buffers.get(name)
+        if surface is None or surface.get_size() != tuple(size) or surface.get_flags() & flags != flags:
+            surface = self.buffers[name] = self._allocate(size, flags)
+        return surface
+
+    def acquire(self, size: Tuple[int, int], flags: int = 0) -> pygame.Surface:
+        # Temporary surface for this frame; contents are undefined
+        key = (tuple(size), flags)
+        free = self.free.get(key)
+        surface = free.pop() if free else self._allocate(size, flags)
+        self.in_use.append((key, surface))
+        return surface
+
+    def release(self, surface: pygame.Surface):
+        # Hand a temporary surface back early so it can be reused this frame
+        for index, (key, used) in enumerate(self.in_use):
+            if used is surface:
+                del self.in_use[index]
+                self.free.setdefault(key, []).append(surface)
+                return
+
+    def end_frame(self):
+        for key, surface in self.in_use:
+            self.free.setdefault(key, []).append(surface)
+        self.in_use.clear()
+        self.last_frame_allocations = self.allocations
+        self.allocations = 0
+
+class TransformCache:
+    def __init__(self, budget_bytes: int = TRANSFORM_CACHE_BUDGET, rotation_step: float = TRANSFORM_ROTATION_STEP):
+        # Flipped/scaled/rotated variants keyed by (source, scale, rotation
+        # step, flip_x, flip_y), evicted least recently used first once the
+        # pixel memory goes over budget_bytes
+        self.entries = OrderedDict()
+        self.budget_bytes = budget_bytes
+        self.rotation_step = rotation_step
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source: pygame.Surface, scale: float = 1.0, rotation: float = 0.0,
+            flip_x: bool = False, flip_y: bool = False) -> pygame.Surface:
+        steps = int(round(rotation / self.rotation_step)) % int(round(360 / self.rotation_step))
+        if scale == 1.0 and steps == 0 and not flip_x and not flip_y:
+            return source
+        key = (source, scale, steps, flip_x, flip_y)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = source
+        if flip_x or flip_y:
+            surface = pygame.transform.flip(surface, flip_x, flip_y)
+        if scale != 1.0:
+            width, height = source.get_size()
+            surface = pygame.transform.scale(surface, (round(width * scale), round(height * scale)))
+        if steps:
+            surface = pygame.transform.rotate(surface, steps * self.rotation_step)
+
+        size = surface.get_pitch() * surface.get_height()
+        if size <= self.budget_bytes:
+            while self.used_bytes + size > self.budget_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.used_bytes -= evicted.get_pitch() * evicted.get_height()
+                self.evictions += 1
+            self.entries[key] = surface
+            self.used_bytes += size
+        return surface
+
+    def prewarm(self, sources, scales=(1.0,), rotations=(0.0,), flips=((False, False),)):
+        # Build variants at load time so the first frames do not stall
+        for source in sources:
+            for scale in scales:
+                for rotation in rotations:
+                    for flip_x, flip_y in flips:
+                        self.get(source, scale, rotation, flip_x, flip_y)
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.used_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+@dataclass(frozen=True, slots=True)
+class EffectPass:
+    name: str
+    # Each output row only depends on inputs the band can see, so the
+    # kernel may run on horizontal bands in parallel
+    band_separable: bool = True
+
+FX_PERSPECTIVE_PASS = EffectPass('fx_perspective')
+ASCII_PASS = EffectPass('ascii')
+MODE7_PASS = EffectPass('mode7')
+
+class EffectExecutor:
+    def __init__(self, workers: Optional[int] = EFFECT_WORKERS, min_band_rows: int = EFFECT_MIN_BAND_ROWS):
+        # Runs an effect kernel over horizontal bands of a frame on a thread
+        # pool sized to the cores, allocated on the first banded pass and kept
+        # until shutdown(); the calling thread takes the first band itself.
+        # NumPy drops the GIL inside the kernels' ufuncs and gathers, which is
+        # where the bands overlap
+        self.workers = workers or os.cpu_count() or 1
+        self.min_band_rows = min_band_rows
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.timings: Dict[str, float] = {}  # Seconds of the last run per pass
+
+    def bands(self, rows: int, multiple: int = 1) -> List[Tuple[int, int]]:
+        # Split rows into up to one band per worker, band edges on multiples
+        # of multiple (e.g. whole character cells)
+        count = max(1, min(self.workers, rows // max(self.min_band_rows, multiple)))
+        units = -(-rows // multiple)
+        edges = [min(rows, units * i // count * multiple) for i in range(count + 1)]
+        return [(start, stop) for start, stop in zip(edges, edges[1:]) if stop > start]
+
+    def run(self, effect: EffectPass, kernel: Callable[[int, int], None], rows: int, multiple: int = 1):
+        # kernel(start, stop) processes rows [start, stop); passes that are
+        # not band-separable get the whole frame in one call
+        start_time = time.perf_counter()
+        bands = self.bands(rows, multiple) if effect.band_separable else [(0, rows)]
+        if len(bands) > 1 and self.pool is None:
+            self.pool = ThreadPoolExecutor(self.workers - 1, thread_name_prefix='effects')
+        futures = [self.pool.submit(kernel, start, stop) for start, stop in bands[1:]]
+        kernel(*bands[0])
+        for future in futures:
+            future.result()
+        self.timings[effect.name] = time.perf_counter() - start_time
+
+    def shutdown(self):
+        # Stop the pool; later passes run on the calling thread only
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        self.workers = 1
+
 class FTRender:
-    def __init__(self, screen_width: int, screen_height: int):
+    def __init__(self, screen_width: int, screen_height: int, max_sprites: Optional[int] = MAX_SPRITES):
         self.width = screen_width
         self.height = screen_height
-        self.render_buffer = pygame.Surface((screen_width * RENDER_SCALE, screen_height * RENDER_SCALE))
-        self.scanline_buffer = [0] * SCANLINE_BUFFER_SIZE
-        self.render_objects: List[RenderObject] = []
+        self.pool = SurfacePool()
+        self.render_buffer = self.pool.buffer('render', (screen_width * RENDER_SCALE, screen_height * RENDER_SCALE))
+        # Per-scanline affine terms (u0, v0, du, dv) for the Mode-7 floor
+        self.scanline_buffer = np.zeros((max(SCANLINE_BUFFER_SIZE, screen_height * RENDER_SCALE), 4))
+        self._mode7_tables_cache = {}
+        self._mode7_texture = None
+        # Post-processing passes run their kernels through this, in bands
+        self.effects = EffectExecutor()
+        # Render queue: one bucket per layer, kept in insertion order
+        self.render_layers: Dict[int, List[RenderObject]] = {}
+        self.layer_order: List[int] = []
+        self.max_sprites = max_sprites
+        self.queued_objects = 0
+        self.dropped_objects = 0
+        # Camera rect in world space (see set_camera) and per-frame culling counts
+        self.view: Optional[pygame.Rect] = None
+        self.camera = (0.0, 0.0)
+        self.cull_stats = {'objects_drawn': 0, 'objects_culled': 0, 'platforms_drawn': 0, 'platforms_culled': 0}
+        # Scaled/rotated textures for render objects
+        self.transform_cache = TransformCache()
+        # Dirty-rectangle presentation (opt-in, see present_dirty)
+        self.dirty_rects_enabled = False
+        self.dirty_threshold = 0.35  # Damaged screen fraction that forces a full flip
+        self.dirty_stats = {'rects': 0, 'area': 0, 'full': True}
+        self._previous_bounds: Dict[object, pygame.Rect] = {}
+        self._full_redraw = True
         self.perspective_angle = 0
+        self._fx_tables_cache = {}
         self.ascii_font = pygame.font.SysFont('Courier', 12)  # Initialize ASCII font
         self.ascii_chars = ' .:-=+*#%@'  # ASCII brightness levels
+        self.ascii_cell_size = self.ascii_font.size('A')
+        self.ascii_color = (255, 255, 255)
+        self.ascii_colored = False  # Tint glyphs with the cell's average color
+        self._ascii_atlas = None
         
-    def pixel_to_ascii(self, pixel):
-        # Convert RGB to brightness (0-255)
-        brightness = sum(pixel[:3]) / 3
-        # Map brightness to ASCII character
-        index = int(brightness / 256 * len(self.ascii_chars))
-        return self.ascii_chars[min(index, len(self.ascii_chars)-1)]
-        
+    def configure_ascii(self, cell_size: Tuple[int, int] = None, chars: str = None,
+                        color: Tuple[int, int, int] = None, colored: bool = None):
+        # Any change invalidates the glyph atlas, it is rebuilt on next use
+        if cell_size is not None:
+            self.ascii_cell_size = cell_size
+        if chars is not None:
+            self.ascii_chars = chars
+        if color is not None:
+            self.ascii_color = color
+        if colored is not None:
+            self.ascii_colored = colored
+        self._ascii_atlas = None
+
+    def _build_ascii_atlas(self):
+        # Pre-render every brightness glyph once as a coverage mask (0-255)
+        # of exactly one cell, indexed [glyph, x, y]
+        cell_width, cell_height = self.ascii_cell_size
+        coverage = np.zeros((len(self.ascii_chars), cell_width, cell_height), dtype=np.uint16)
+        cell = pygame.Surface((cell_width, cell_height))
+        for i, char in enumerate(self.ascii_chars):
+            cell.fill((0, 0, 0))
+            cell.blit(self.ascii_font.render(char, True, (255, 255, 255)), (0, 0))
+            coverage[i] = pygame.surfarray.pixels_red(cell)
+        # Glyphs are tinted once up front so a frame is a pure gather; the
+        # color-preserving variant starts from white glyphs instead
+        tint = (255, 255, 255) if self.ascii_colored else self.ascii_color
+        self._ascii_atlas = (coverage[..., None] * np.array(tint, dtype=np.uint16) // 255).astype(np.uint8)
+
     def surface_to_ascii(self, surface: pygame.Surface) -> pygame.Surface:
         width, height = surface.get_size()
-        char_width, char_height = self.ascii_font.size('A')
-        
-        # Create new surface for ASCII art
-        ascii_surface = pygame.Surface((width, height))
-        ascii_surface.fill((0, 0, 0))
-        
-        # Convert pixels to ASCII characters
-        for y in range(0, height, char_height):
-            for x in range(0, width, char_width):
-                # Sample pixel color
-                try:
-                    pixel = surface.get_at((x, y))
-                    char = self.pixel_to_ascii(pixel)
-                    # Render ASCII character
-                    char_surface = self.ascii_font.render(char, True, (255, 255, 255))
-                    ascii_surface.blit(char_surface, (x, y))
-                except IndexError:
-                    continue
-                    
+        char_width, char_height = self.ascii_cell_size
+        if self._ascii_atlas is None:
+            self._build_ascii_atlas()
+
+        # Reuse the ASCII art surface between frames
+        ascii_surface = self.pool.buffer('ascii', (width, height))
+        cell_x = np.arange(0, width, char_width)
+        cell_y = np.arange(0, height, char_height)
+        cell_color = np.empty((len(cell_x), len(cell_y), 3), dtype=np.uint32)
+        pixels = pygame.surfarray.pixels3d(surface)
+        target = pygame.surfarray.pixels3d(ascii_surface)
+        atlas = self._ascii_atlas
+        levels = len(self.ascii_chars)
+
+        def kernel(start, stop):
+            # Rows [start, stop) hold whole character rows, bar the last band
+            band_y = np.arange(start, stop, char_height)
+            cells = slice(start // char_height, start // char_height + len(band_y))
+
+            # Block-average every character cell (partial cells on the edges too)
+            sums = np.add.reduceat(np.add.reduceat(pixels[:, start:stop], cell_x, axis=0, dtype=np.uint32),
+                                   band_y - start, axis=1)
+            counts = np.diff(np.append(cell_x, width))[:, None] * np.diff(np.append(band_y, stop))[None, :]
+            color = cell_color[:, cells]
+            color[...] = sums // counts[..., None]
+
+            # Map the mean brightness (0-255) linearly onto the glyph ramp
+            brightness = color.sum(axis=2) / 3
+            index = np.minimum((brightness / 256 * levels).astype(np.intp), levels - 1)
+
+            # Gather glyphs into a (cells_x, char_width, cells_y, char_height) frame
+            frame = atlas[index].swapaxes(1, 2)
+            frame = frame.reshape(len(cell_x) * char_width, len(band_y) * char_height, 3)
+            target[:, start:stop] = frame[:width, :stop - start]
+
+        self.effects.run(ASCII_PASS, kernel, height, char_height)
+        del pixels, target
+
+        # Color-preserving variant: multiply the white glyphs by the cell colors
+        if self.ascii_colored:
+            cells = self.pool.acquire((len(cell_x), len(cell_y)))
+            pygame.surfarray.blit_array(cells, cell_color)
+            tint_size = (len(cell_x) * char_width, len(cell_y) * char_height)
+            tint = self.pool.buffer('ascii_tint', tint_size)
+            pygame.transform.scale(cells, tint_size, tint)
+            self.pool.release(cells)
+            ascii_surface.blit(tint, (0, 0), special_flags=pygame.BLEND_RGB_MULT)
+
         return ascii_surface
 
-    def add_object(self, obj: RenderObject):
-        if len(self.render_objects) < MAX_SPRITES:
-            self.render_objects.append(obj)
-            self.render_objects.sort(key=lambda x: x.layer)
-            
+    def _mode7_tables(self, width: int, height: int, horizon: int):
+        # Scratch arrays for the floor below the horizon, reused every frame
+        key = (width, height, horizon)
+        tables = self._mode7_tables_cache.get(key)
+        if tables is None:
+            floor_height = height - horizon - 1
+            tables = {
+                'columns': np.arange(width, dtype=np.float64)[None, :],
+                'depth': (np.arange(horizon + 1, height, dtype=np.float64) - horizon)[:, None],
+                'u': np.empty((floor_height, width), dtype=np.float64),
+                'v': np.empty((floor_height, width), dtype=np.float64),
+                'iu': np.empty((floor_height, width), dtype=np.intp),
+                'iv': np.empty((floor_height, width), dtype=np.intp),
+            }
+            self._mode7_tables_cache[key] = tables
+        return tables
+
+    def render_mode7(self, target: pygame.Surface, texture: pygame.Surface, camera_x: float, camera_y: float,
+                     yaw: float, horizon: Optional[int] = None, camera_height: float = MODE7_CAMERA_HEIGHT,
+                     focal_length: float = MODE7_FOCAL_LENGTH):
+        # SNES-style ground plane: one affine transform per scanline below the
+        # horizon, then the whole floor is sampled from the (wrapping) texture
+        # with a single vectorized gather
+        width, height = target.get_size()
+        if horizon is None:
+            horizon = int(height * 0.5)
+        if horizon + 1 >= height:
+            return
+        tables = self._mode7_tables(width, height, horizon)
+
+        # Per-scanline affine terms into the scanline buffer: world position of
+        # the left edge (u0, v0) and the step per screen pixel (du, dv)
+        distance = camera_height * focal_length / tables['depth'][:, 0]
+        step = distance / focal_length
+        cos_yaw, sin_yaw = math.cos(yaw), math.sin(yaw)
+        lines = self.scanline_buffer[horizon + 1:height]
+        lines[:, 2] = -sin_yaw * step
+        lines[:, 3] = cos_yaw * step
+        lines[:, 0] = camera_x + cos_yaw * distance - lines[:, 2] * width / 2
+        lines[:, 1] = camera_y + sin_yaw * distance - lines[:, 3] * width / 2
+
+        # Sample in the target's pixel format so the gather is a raw copy
+        if self._mode7_texture is None or self._mode7_texture[0] is not texture:
+            self._mode7_texture = (texture, texture.convert(target))
+        texels = pygame.surfarray.pixels2d(self._mode7_texture[1]).T
+        texture_height, texture_width = texels.shape
+        floor = pygame.surfarray.pixels2d(target).T[horizon + 1:height]
+        columns = tables['columns']
+
+        def kernel(start, stop):
+            # Floor scanlines [start, stop)
+            band = slice(start, stop)
+            u, v, iu, iv = tables['u'][band], tables['v'][band], tables['iu'][band], tables['iv'][band]
+            np.multiply(lines[band, 2:3], columns, out=u)
+            u += lines[band, 0:1]
+            np.multiply(lines[band, 3:4], columns, out=v)
+            v += lines[band, 1:2]
+            np.floor(u, out=u)
+            np.floor(v, out=v)
+            iu[...] = u
+            iv[...] = v
+            np.remainder(iu, texture_width, out=iu)
+            np.remainder(iv, texture_height, out=iv)
+            floor[band] = texels[iv, iu]
+
+        self.effects.run(MODE7_PASS, kernel, height - horizon - 1)
+        del texels, floor
+
+    @property
+    def render_objects(self) -> List[RenderObject]:
+        # Queued objects in draw order (by layer, then insertion order)
+        return [obj for layer in self.layer_order for obj in self.render_layers[layer]]
+
+    def object_texture(self, obj: RenderObject) -> pygame.Surface:
+        # Texture with the object's scale and rotation applied
+        return self.transform_cache.get(obj.texture, obj.scale, obj.rotation)
+
+    def set_camera(self, camera_x: float, camera_y: float, width: Optional[int] = None,
+                   height: Optional[int] = None):
+        # World-space view for this frame, everything outside it is culled.
+        # Fractional cameras straddle one more pixel column/row
+        left, top = math.floor(camera_x), math.floor(camera_y)
+        self.camera = (camera_x, camera_y)
+        self.view = pygame.Rect(left, top, (width or self.width) + (camera_x != left),
+                                (height or self.height) + (camera_y != top))
+
+    def cull(self, items, index: Optional['SpatialHash'] = None, bounds=None, margin: int = 0,
+             kind: str = 'platforms') -> list:
+        # Items whose bounds overlap the view (grown by margin). With a spatial
+        # index only the cells under the view are visited, so the cost follows
+        # what is on screen rather than the level size
+        if self.view is None:
+            return list(items)
+        view = self.view.inflate(margin * 2, margin * 2)
+        candidates = index.query(view) if index is not None else items
+        if bounds is None:
+            visible = [item for item in candidates if view.colliderect(item)]
+        else:
+            visible = [item for item in candidates if view.colliderect(bounds(item))]
+        self.cull_stats[kind + '_culled'] += len(items) - len(visible)
+        return visible
+
+    def draw_platforms(self, target: pygame.Surface, platforms, index: Optional['SpatialHash'] = None,
+                       color=(139, 69, 19)) -> int:
+        # Fill the visible platform rects in camera space
+        visible = self.cull(platforms, index)
+        camera_x, camera_y = self.camera
+        for platform in visible:
+            # Integer rects, so this is floor(x - camera) like the sprites
+            rect = platform.move(-math.ceil(camera_x), -math.ceil(camera_y))
+            # draw.rect, Surface.fill misplaces rects with a negative corner
+            pygame.draw.rect(target, color, rect)
+        self.cull_stats['platforms_drawn'] += len(visible)
+        return len(visible)
+
+    def add_object(self, obj: RenderObject) -> bool:
+        if self.view is not None:
+            width, height = self.object_texture(obj).get_size()
+            if not self.view.colliderect((obj.position[0], obj.position[1], width, height)):
+                self.cull_stats['objects_culled'] += 1
+                return False
+        if self.max_sprites is not None and self.queued_objects >= self.max_sprites:
+            self.dropped_objects += 1
+            return False
+        bucket = self.render_layers.get(obj.layer)
+        if bucket is None:
+            bucket = self.render_layers[obj.layer] = []
+            bisect.insort(self.layer_order, obj.layer)
+        bucket.append(obj)
+        self.queued_objects += 1
+        return True
+
+    def flush(self, target: pygame.Surface, camera_x: float = 0, camera_y: float = 0) -> int:
+        # Draw the queue with one blits() call per layer, skipping anything
+        # that lands completely outside the target after the camera offset.
+        # Screen positions are floored on every path (here, present_dirty,
+        # platforms) so switching paths never moves anything by a pixel
+        view_width, view_height = target.get_size()
+        drawn = 0
+        for layer in self.layer_order:
+            batch = []
+            for obj in self.render_layers[layer]:
+                x = math.floor(obj.position[0] - camera_x)
+                y = math.floor(obj.position[1] - camera_y)
+                texture = self.object_texture(obj)
+                width, height = texture.get_size()
+                if x + width <= 0 or y + height <= 0 or x >= view_width or y >= view_height:
+                    self.cull_stats['objects_culled'] += 1
+                    continue
+                batch.append((texture, (x, y)))
+            if batch:
+                target.blits(batch, doreturn=False)
+                drawn += len(batch)
+        self.cull_stats['objects_drawn'] += drawn
+        return drawn
+
+    def enable_dirty_rects(self, enabled: bool = True, threshold: Optional[float] = None):
+        self.dirty_rects_enabled = enabled
+        if threshold is not None:
+            self.dirty_threshold = threshold
+        self.invalidate()
+
+    def invalidate(self):
+        # Forget tracked bounds so the next present repaints the whole screen
+        self._previous_bounds.clear()
+        self._full_redraw = True
+
+    def close(self):
+        # Release the effect worker threads
+        self.effects.shutdown()
+
+    def present_dirty(self, screen: pygame.Surface, background: pygame.Surface, camera_x: float = 0,
+                      camera_y: float = 0, platforms=(), platform_color=(139, 69, 19),
+                      platform_index: Optional['SpatialHash'] = None) -> bool:
+        # Draw the queued objects and platforms over a static background and
+        # push only the regions that changed since the previous frame. Falls
+        # back to a full repaint and flip past dirty_threshold. Returns True
+        # when the whole screen was presented.
+        screen_rect = screen.get_rect()
+        self.set_camera(camera_x, camera_y, screen_rect.width, screen_rect.height)
+        items = []
+        bounds = {}
+        for platform in self.cull(platforms, platform_index):
+            rect = platform.move(-math.ceil(camera_x), -math.ceil(camera_y))
+            if rect.colliderect(screen_rect):
+                bounds[('platform', id(platform))] = rect
+                items.append((None, rect))
+        self.cull_stats['platforms_drawn'] += len(items)
+        for layer in self.layer_order:
+            for obj in self.render_layers[layer]:
+                texture = self.object_texture(obj)
+                rect = texture.get_rect(topleft=(math.floor(obj.position[0] - camera_x),
+                                                 math.floor(obj.position[1] - camera_y)))
+                if rect.colliderect(screen_rect):
+                    bounds[id(obj)] = rect
+                    items.append((texture, rect))
+                    self.cull_stats['objects_drawn'] += 1
+                else:
+                    self.cull_stats['objects_culled'] += 1
+
+        # Damage is the old and new bounds of everything that moved or vanished
+        dirty = []
+        previous_bounds = self._previous_bounds
+        for key, rect in bounds.items():
+            previous = previous_bounds.pop(key, None)
+            if previous is None:
+                dirty.append(rect.clip(screen_rect))
+            elif previous != rect:
+                if previous.colliderect(rect):
+                    dirty.append(previous.union(rect).clip(screen_rect))
+                else:
+                    dirty.append(previous.clip(screen_rect))
+                    dirty.append(rect.clip(screen_rect))
+        dirty.extend(rect.clip(screen_rect) for rect in previous_bounds.values())
+        self._previous_bounds = bounds
+
+        area = sum(rect.width * rect.height for rect in dirty)
+        full = self._full_redraw or area > self.dirty_threshold * screen_rect.width * screen_rect.height
+        self._full_redraw = False
+        self.dirty_stats = {'rects': len(dirty), 'area': area, 'full': full}
+
+        if full:
+            dirty = [screen_rect]
+        for region in dirty:
+            screen.set_clip(region)
+            screen.blit(background, region, region)
+            for texture, rect in items:
+                if rect.colliderect(region):
+                    if texture is None:
+                        pygame.draw.rect(screen, platform_color, rect)
+                    else:
+                        screen.blit(texture, rect)
+        screen.set_clip(None)
+
+        if full:
+            pygame.display.flip()
+        elif dirty:
+            pygame.display.update(dirty)
+        return full
+
     def clear_buffer(self):
         self.render_buffer.fill((0, 0, 0))
-        self.render_objects.clear()
-        
+        # Keep the layer buckets around so steady-state frames do not reallocate
+        for bucket in self.render_layers.values():
+            bucket.clear()
+        self.queued_objects = 0
+        self.dropped_objects = 0
+        for key in self.cull_stats:
+            self.cull_stats[key] = 0
+
+    def _fx_tables(self, width: int, height: int):
+        # The perspective scale and the wave phase only depend on the row, so the
+        # source column for every pixel is built once per buffer size and only
+        # the per-row wave offset changes from frame to frame.
+        key = (width, height)
+        tables = self._fx_tables_cache.get(key)
+        if tables is None:
+            horizon = height * 0.5
+            rows = np.arange(height, dtype=np.float64)
+            scale = np.where(rows > horizon, 1.0 + (rows - horizon) / height * PERSPECTIVE_DEPTH, 1.0)
+            cols = np.arange(width, dtype=np.float64)
+            base_x = (cols[None, :] - width/2) * scale[:, None] + width/2
+            wave_phase = [y * 0.02 for y in range(height)]
+            tables = {
+                'base_x': base_x,
+                'wave_phase': wave_phase,
+                'rows': np.arange(height)[:, None],
+                'source_x': np.empty((height, width), dtype=np.float64),
+                'index_x': np.empty((height, width), dtype=np.intp),
+                'invalid': np.empty((height, width), dtype=bool),
+                'result': self.pool.buffer(('fx', width, height), (width, height)),
+            }
+            self._fx_tables_cache[key] = tables
+        return tables
+
     def apply_fx_perspective(self, surface: pygame.Surface, camera_x: float, camera_y: float):
         width, height = surface.get_size()
-        result = pygame.Surface((width, height))
-        
-        # FX Beta-style perspective transformation
-        horizon = height * 0.5
-        for y in range(height):
-            scale = 1.0
-            if y > horizon:
-                scale = 1.0 + (y - horizon) / height * PERSPECTIVE_DEPTH
-            
-            for x in range(width):
-                # Apply perspective distortion
-                source_x = (x - width/2) * scale + width/2
-                source_y = y
-                
-                # Add subtle wave effect
-                wave = math.sin(y * 0.02 + self.perspective_angle) * 5
-                source_x += wave
-                
-                # Sample pixel with bounds checking
-                if 0 <= int(source_x) < width and 0 <= int(source_y) < height:
-                    color = surface.get_at((int(source_x), int(source_y)))
-                    result.set_at((x, y), color)
-                    
+        tables = self._fx_tables(width, height)
+        result = tables['result']
+
+        # FX Beta-style perspective transformation with a subtle per-row wave
+        wave = np.array([math.sin(phase + self.perspective_angle) * 5 for phase in tables['wave_phase']])
+
+        # Gather every pixel into the reused destination surface, working on
+        # row-major (y, x) views to match the surface memory layout
+        if surface.get_bytesize() == result.get_bytesize() == 4 and surface.get_masks() == result.get_masks():
+            src = pygame.surfarray.pixels2d(surface).T
+            dst = pygame.surfarray.pixels2d(result).T
+            blank = result.map_rgb((0, 0, 0))
+        else:
+            src = pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+            dst = pygame.surfarray.pixels3d(result).transpose(1, 0, 2)
+            blank = 0
+
+        def kernel(start, stop):
+            band = slice(start, stop)
+            source_x = tables['source_x'][band]
+            np.add(tables['base_x'][band], wave[band, None], out=source_x)
+
+            # int() truncation towards zero, same as the per-pixel bounds check
+            index_x = tables['index_x'][band]
+            index_x[...] = source_x
+            invalid = tables['invalid'][band]
+            np.logical_or(index_x < 0, index_x >= width, out=invalid)
+            np.clip(index_x, 0, width - 1, out=index_x)
+
+            rows = dst[band]
+            rows[...] = src[tables['rows'][band], index_x]
+            rows[invalid] = blank
+
+        self.effects.run(FX_PERSPECTIVE_PASS, kernel, height)
+        del src, dst
+
         self.perspective_angle += ROTATION_SPEED
         return result
 
+class LayerCache:
+    def __init__(self):
+        # Background layers are rendered once by their builder, converted to
+        # the display format and only rebuilt after an explicit invalidate()
+        self.layers: Dict[str, dict] = {}
+        self.layer_order: List[str] = []
+        self.builds = 0
+        self._last_composite = None
+
+    def add_layer(self, name: str, size: Tuple[int, int], builder, parallax: Tuple[float, float] = (0.0, 0.0),
+                  depth: int = 0, wrap: bool = True, colorkey=None):
+        # builder(surface) paints the layer; parallax scales the camera offset
+        # (0 = fixed to the screen, 1 = moves with the world)
+        self.layers[name] = {
+            'size': size,
+            'builder': builder,
+            'parallax': parallax,
+            'depth': depth,
+            'wrap': wrap,
+            'colorkey': colorkey,
+            'surface': None,
+        }
+        self.layer_order = sorted(self.layers, key=lambda layer: self.layers[layer]['depth'])
+        self._last_composite = None
+
+    def invalidate(self, name: Optional[str] = None):
+        for layer_name in ([name] if name is not None else self.layers):
+            self.layers[layer_name]['surface'] = None
+        self._last_composite = None
+
+    def get(self, name: str) -> pygame.Surface:
+        layer = self.layers[name]
+        if layer['surface'] is None:
+            surface = pygame.Surface(layer['size'])
+            layer['builder'](surface)
+            if layer['colorkey'] is not None:
+                surface.set_colorkey(layer['colorkey'])
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            layer['surface'] = surface
+            self.builds += 1
+        return layer['surface']
+
+    def composite(self, target: pygame.Surface, camera_x: float = 0, camera_y: float = 0) -> bool:
+        # Draw every layer back to front with its parallax offset, tiling
+        # wrapping layers across the target. Skipped (returns False) when
+        # nothing changed since the last composite into the same target.
+        key = (id(target), camera_x, camera_y)
+        if key == self._last_composite:
+            return False
+        target_width, target_height = target.get_size()
+        for name in self.layer_order:
+            layer = self.layers[name]
+            surface = self.get(name)
+            parallax_x, parallax_y = layer['parallax']
+            offset_x = int(-camera_x * parallax_x)
+            offset_y = int(-camera_y * parallax_y)
+            if not layer['wrap']:
+                target.blit(surface, (offset_x, offset_y))
+                continue
+            width, height = surface.get_size()
+            tiles = []
+            for y in range(offset_y % height - height if offset_y % height else 0, target_height, height):
+                for x in range(offset_x % width - width if offset_x % width else 0, target_width, width):
+                    tiles.append((surface, (x, y)))
+            target.blits(tiles, doreturn=False)
+        self._last_composite = key
+        return True
+
+    def memory_bytes(self) -> int:
+        total = 0
+        for layer in self.layers.values():
+            surface = layer['surface']
+            if surface is not None:
+                total += surface.get_pitch() * surface.get_height()
+        return total
+
+class FixedTimestep:
+    def __init__(self, step_hz: Optional[float] = None, max_steps: Optional[int] = None):
+        # Accumulates real frame time and hands it out as fixed simulation
+        # steps; alpha is how far the render time sits between the last two.
+        # The defaults are read when constructed so overridden module
+        # constants (headless.run_instance) take effect
+        self.step = 1.0 / (step_hz or SIMULATION_HZ)
+        self.max_steps = MAX_CATCHUP_STEPS if max_steps is None else max_steps
+        self.accumulator = 0.0
+        self.dropped_steps = 0
+
+    def advance(self, frame_time: float) -> int:
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            # Too far behind: give up on the backlog instead of spiralling
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.step + steps * self.step
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.step
+
+class SpatialHash:
+    def __init__(self, cell_size: int = SPATIAL_HASH_CELL_SIZE):
+        # Uniform grid broadphase. Every entry is filed under each cell its
+        # bounding box covers; queries only look at the cells they overlap
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        self.items: Dict[int, object] = {}
+        self.spans: Dict[int, Tuple[int, int, int, int]] = {}
+        self.next_handle = 0
+
+    def _span(self, left: float, top: float, right: float, bottom: float) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (int(left // size), int(top // size), int(right // size), int(bottom // size))
+
+    def _file(self, handle: int, span: Tuple[int, int, int, int]):
+        cells = self.cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [handle]
+                else:
+                    bucket.append(handle)
+
+    def _unfile(self, handle: int, span: Tuple[int, int, int, int]):
+        cells = self.cells
+        for cx in range(span[0], span[2] + 1):
+            for cy in range(span[1], span[3] + 1):
+                bucket = cells[(cx, cy)]
+                bucket.remove(handle)
+                if not bucket:
+                    del cells[(cx, cy)]
+
+    def build(self, rects):
+        # Static level geometry: index every rect once, the rect is the item
+        self.clear()
+        for rect in rects:
+            self.insert(rect, rect)
+
+    def insert(self, item, rect) -> int:
+        handle = self.next_handle
+        self.next_handle += 1
+        span = self._span(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        self.items[handle] = item
+        self.spans[handle] = span
+        self._file(handle, span)
+        return handle
+
+    def move(self, handle: int, rect):
+        # Incremental update for moving objects, the buckets are only touched
+        # when the object crosses into a different set of cells
+        span = self._span(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        old = self.spans[handle]
+        if span != old:
+            self._unfile(handle, old)
+            self._file(handle, span)
+            self.spans[handle] = span
+
+    def remove(self, handle: int):
+        self._unfile(handle, self.spans.pop(handle))
+        del self.items[handle]
+
+    def query(self, rect) -> list:
+        # Everything whose cells overlap rect, in insertion order so the
+        # narrowphase resolves in the same order as a plain list of platforms
+        left, top, right, bottom = self._span(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        cells = self.cells
+        if left == right and top == bottom:
+            handles = sorted(cells.get((left, top), ()))
+        else:
+            found = set()
+            for cx in range(left, right + 1):
+                for cy in range(top, bottom + 1):
+                    bucket = cells.get((cx, cy))
+                    if bucket:
+                        found.update(bucket)
+            handles = sorted(found)
+        items = self.items
+        return [items[handle] for handle in handles]
+
+    def clear(self):
+        self.cells.clear()
+        self.items.clear()
+        self.spans.clear()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+# Chunked level file layout (little-endian):
+#   header  LEVEL_HEADER: magic, version, tile size, chunk width, chunk count,
+#           reach (chunks a platform can extend past its own)
+#   index   LEVEL_INDEX_ENTRY per chunk: byte offset, platform/tile/spawn counts
+#   chunks  int32 records, platforms (x, y, w, h), tiles (col, row, flags),
+#           spawns (x, y, kind), back to back for each chunk
+LEVEL_HEADER = struct.Struct('<4sHHIII')
+LEVEL_INDEX_ENTRY = struct.Struct('<QIII')
+
+class LevelChunk:
+    __slots__ = ('index', 'platforms', 'tiles', 'spawns', 'handles')
+
+    def __init__(self, index: int, platforms: List[pygame.Rect], tiles: np.ndarray, spawns: np.ndarray):
+        # One resident chunk: platform rects, (col, row, flags) tiles and
+        # (x, y, kind) spawns
+        self.index = index
+        self.platforms = platforms
+        self.tiles = tiles
+        self.spawns = spawns
+        self.handles: List[int] = []
+
+def write_level(path: str, platforms, tiles=(), spawns=(), chunk_width: int = LEVEL_CHUNK_WIDTH,
+                tile_size: int = LEVEL_TILE_SIZE):
+    # Bin the level into chunk_width wide columns by left edge. Platforms are
+    # kept whole (split pieces would round apart under a fractional camera),
+    # the header records how many chunks the widest one reaches into
+    chunk_platforms: Dict[int, list] = {}
+    chunk_tiles: Dict[int, list] = {}
+    chunk_spawns: Dict[int, list] = {}
+    reach = 0
+    for rect in platforms:
+        x, y, width, height = rect
+        if x < 0:
+            raise ValueError(f"Level platforms must start at x >= 0, got {rect}")
+        chunk = x // chunk_width
+        chunk_platforms.setdefault(chunk, []).append((x, y, width, height))
+        reach = max(reach, (x + width - 1) // chunk_width - chunk)
+    for col, row, flags in tiles:
+        chunk_tiles.setdefault(col * tile_size // chunk_width, []).append((col, row, flags))
+    for x, y, kind in spawns:
+        chunk_spawns.setdefault(int(x) // chunk_width, []).append((x, y, kind))
+
+    chunk_count = max(list(chunk_platforms) + list(chunk_tiles) + list(chunk_spawns), default=-1) + 1
+    offset = LEVEL_HEADER.size + LEVEL_INDEX_ENTRY.size * chunk_count
+    index, payload = [], []
+    for chunk in range(chunk_count):
+        records = [np.array(table.get(chunk, []), dtype='<i4').reshape(-1, fields)
+                   for table, fields in ((chunk_platforms, 4), (chunk_tiles, 3), (chunk_spawns, 3))]
+        index.append(LEVEL_INDEX_ENTRY.pack(offset, *(len(r) for r in records)))
+        for r in records:
+            payload.append(r.tobytes())
+            offset += r.nbytes
+
+    with open(path, 'wb') as f:
+        f.write(LEVEL_HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, tile_size, chunk_width, chunk_count, reach))
+        f.writelines(index)
+        f.writelines(payload)
+
+class LevelFile:
+    def __init__(self, path: str):
+        # Memory-mapped chunked level; chunks are decoded on demand and the
+        # OS pages the file in and out underneath
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.tile_size, self.chunk_width, self.chunk_count, self.reach = \
+            LEVEL_HEADER.unpack_from(self.map)
+        if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+            raise ValueError(f"{path} is not a version {LEVEL_VERSION} level file")
+        self.index = [LEVEL_INDEX_ENTRY.unpack_from(self.map, LEVEL_HEADER.size + LEVEL_INDEX_ENTRY.size * i)
+                      for i in range(self.chunk_count)]
+
+    @property
+    def width(self) -> int:
+        return self.chunk_count * self.chunk_width
+
+    def read_chunk(self, chunk: int) -> LevelChunk:
+        offset, platform_count, tile_count, spawn_count = self.index[chunk]
+        records = np.frombuffer(self.map, dtype='<i4', offset=offset,
+                                count=platform_count * 4 + (tile_count + spawn_count) * 3)
+        platforms = [pygame.Rect(*rect) for rect in records[:platform_count * 4].reshape(-1, 4).tolist()]
+        # Copies, so no view outlives the map and close() always succeeds
+        tiles_end = platform_count * 4 + tile_count * 3
+        return LevelChunk(chunk, platforms, records[platform_count * 4:tiles_end].reshape(-1, 3).copy(),
+                          records[tiles_end:].reshape(-1, 3).copy())
+
+    def release_chunk(self, chunk: int):
+        # Let the OS drop the chunk's pages now instead of under pressure
+        if not hasattr(self.map, 'madvise') or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        offset, platform_count, tile_count, spawn_count = self.index[chunk]
+        start = offset - offset % mmap.PAGESIZE
+        end = offset + (platform_count * 4 + (tile_count + spawn_count) * 3) * 4
+        if end > start:
+            self.map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> 'LevelFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class LevelStreamer:
+    def __init__(self, level: LevelFile, platform_index: Optional[SpatialHash] = None,
+                 prefetch: int = LEVEL_PREFETCH_CHUNKS):
+        # Keeps the chunks under the view plus `prefetch` chunks either side
+        # resident, as well as the chunks to the left whose platforms reach
+        # into that range. platforms is updated in place and platform_index
+        # incrementally, so both can be shared with the game
+        self.level = level
+        self.platform_index = platform_index if platform_index is not None else SpatialHash()
+        self.prefetch = prefetch
+        self.resident: Dict[int, LevelChunk] = {}
+        self.platforms: List[pygame.Rect] = []
+        self.loaded_spawns: List[Tuple[int, int, int]] = []  # Spawns from chunks paged in by the last update
+        self.loads = 0
+        self.unloads = 0
+
+    def update(self, camera_x: float, view_width: int) -> bool:
+        # Page chunks in and out for the current camera, returns True when
+        # the resident set changed
+        width = self.level.chunk_width
+        first = max(0, int(camera_x // width) - self.prefetch - self.level.reach)
+        last = min(self.level.chunk_count - 1, int((camera_x + view_width) // width) + self.prefetch)
+        wanted = range(first, last + 1)
+
+        self.loaded_spawns = []
+        changed = False
+        for chunk in [chunk for chunk in self.resident if chunk not in wanted]:
+            self.unload(chunk)
+            changed = True
+        for chunk in wanted:
+            if chunk not in self.resident:
+                self.load(chunk)
+                changed = True
+        if changed:
+            self.platforms[:] = [rect for chunk in sorted(self.resident) for rect in self.resident[chunk].platforms]
+        return changed
+
+    def load(self, chunk: int):
+        data = self.level.read_chunk(chunk)
+        data.handles = [self.platform_index.insert(rect, rect) for rect in data.platforms]
+        self.resident[chunk] = data
+        self.loaded_spawns.extend(map(tuple, data.spawns.tolist()))
+        self.loads += 1
+
+    def unload(self, chunk: int):
+        data = self.resident.pop(chunk)
+        for handle in data.handles:
+            self.platform_index.remove(handle)
+        self.level.release_chunk(chunk)
+        self.unloads += 1
+
+    def stats(self) -> dict:
+        return {
+            'resident_chunks': len(self.resident),
+            'resident_platforms': len(self.platforms),
+            'loads': self.loads,
+            'unloads': self.unloads,
+        }
+
 class GameObject:
+    __slots__ = ('position', 'previous_position', 'width', 'height', 'velocity', 'on_ground', 'render_object')
+
     def __init__(self, x, y, width, height):
         self.position = pygame.math.Vector2(x, y)
+        self.previous_position = pygame.math.Vector2(x, y)  # Position before the last step
         self.width = width
         self.height = height
         self.velocity = pygame.math.Vector2(0, 0)
         self.on_ground = False
         self.render_object = None
 
+    def interpolated_position(self, alpha):
+        # Render position between the last two simulation steps
+        return self.previous_position.lerp(self.position, alpha)
+
+    def bounds(self):
+        return (self.position.x, self.position.y, self.width, self.height)
+
     def update(self, dt):
+        self.previous_position.update(self.position)
+
         # Apply gravity
         if not self.on_ground:
             self.velocity.y += GRAVITY * dt
 
-        # Apply friction
-        self.velocity.x *= FRICTION
-
         # Update position
         self.position += self.velocity * dt
 
+        # Apply friction, scaled by the step so any SIMULATION_HZ decelerates
+        # alike. After the move, so held input (which sets the velocity
+        # outright) runs at RUN_SPEED whatever the step
+        self.velocity.x *= FRICTION ** (dt * FRICTION_HZ)
+
         # Reset on_ground status
         self.on_ground = False
 
@@ -161,18 +1093,148 @@ class GameObject:
     def set_render_object(self, render_object):
         self.render_object = render_object
 
-class Game:
+# Snapshot layout: header, view, one record per game object, then the game
+# RNG (Mersenne Twister words plus the cached gauss value). The view record
+# is render-only state: it is not hashed, and restore(view=False) leaves the
+# current view alone (rollbacks)
+SNAPSHOT_HEADER = struct.Struct('<4sHHQ6d')  # magic, version, objects, frame, camera, previous camera,
+                                             # target camera
+SNAPSHOT_VIEW = struct.Struct('<2d')  # perspective angle, Mode-7 yaw
+SNAPSHOT_OBJECT = struct.Struct('<6d?')  # position, previous position, velocity, on_ground
+SNAPSHOT_RNG = struct.Struct('<625I?d')
+
+class RenderState:
+    __slots__ = ('frame', 'alpha', 'camera', 'bodies', 'platforms', 'platform_index')
+
     def __init__(self):
+        # What render() reads from the simulation, captured after the steps
+        # of a frame: per object its render object, previous and current
+        # position and size
+        self.frame = 0
+        self.alpha = 1.0
+        self.camera = (0.0, 0.0)
+        self.bodies = []
+        self.platforms = []
+        self.platform_index = None
+
+    def capture(self, game, alpha: float):
+        self.frame = game.frame
+        self.alpha = alpha
+        camera = game.previous_camera.lerp(game.camera, alpha)
+        self.camera = (camera.x, camera.y)
+        self.bodies = [(obj.render_object, obj.previous_position.x, obj.previous_position.y,
+                        obj.position.x, obj.position.y, obj.width, obj.height) for obj in game.game_objects]
+        if game.level is None:
+            # Static level, never written after create_level
+            self.platforms = game.platforms
+            self.platform_index = game.platform_index
+        else:
+            # The streamer edits both while the simulation runs
+            self.platforms = list(game.platforms)
+            self.platform_index = None
+
+    @staticmethod
+    def body_bounds(body) -> Tuple[float, float, int, int]:
+        return body[3:7]
+
+class PhysicsThread:
+    def __init__(self, game, recorder=None):
+        # Runs a frame's simulation steps on a worker thread while the main
+        # thread draws the previous frame. The two RenderStates are a double
+        # buffer: the worker only writes the back one, the main thread only
+        # reads the front one, and they swap at the once-a-frame handoff, so
+        # neither side takes a lock while simulating or drawing. recorder is
+        # called from the worker, which owns the game while it steps
+        self.game = game
+        self.recorder = recorder
+        self.states = [RenderState(), RenderState()]
+        self.front = 0
+        self.states[0].capture(game, 1.0)
+        self.jobs = queue.SimpleQueue()
+        self.results = queue.SimpleQueue()
+        self.pending = False
+        self.simulation_time = 0.0  # Seconds the last job took on the worker
+        self.wait_time = 0.0  # Seconds the main thread waited for it
+        self.thread = threading.Thread(target=self.work, name='physics', daemon=True)
+        self.thread.start()
+
+    def work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            keys, steps, alpha = job
+            start = time.perf_counter()
+            for _ in range(steps):
+                if keys is not None:
+                    if self.recorder is not None:
+                        self.recorder.record_keys(keys)
+                    self.game.handle_input(keys)
+                self.game.update(self.game.timestep.step)
+            self.states[1 - self.front].capture(self.game, alpha)
+            self.results.put(time.perf_counter() - start)
+
+    def submit(self, keys, steps: int, alpha: float):
+        # Start simulating the next frame; keys as for Game.handle_input,
+        # applied before every step
+        self.jobs.put((keys, steps, alpha))
+        self.pending = True
+
+    def collect(self) -> RenderState:
+        # Wait for the frame in flight and make its state the front buffer
+        if self.pending:
+            start = time.perf_counter()
+            self.simulation_time = self.results.get()
+            self.wait_time = time.perf_counter() - start
+            self.pending = False
+            self.front = 1 - self.front
+        return self.states[self.front]
+
+    def stop(self):
+        self.collect()
+        self.jobs.put(None)
+        self.thread.join()
+
+def snapshot_hash(data: bytes) -> int:
+    # 64-bit digest of a snapshot, for comparing states between peers or
+    # runs. The view record advances per rendered frame rather than per
+    # step, so it is left out
+    view = memoryview(data)
+    digest = hashlib.blake2b(view[:SNAPSHOT_HEADER.size], digest_size=8)
+    digest.update(view[SNAPSHOT_HEADER.size + SNAPSHOT_VIEW.size:])
+    return int.from_bytes(digest.digest(), 'little')
+
+class Game:
+    def __init__(self, dirty_rects: bool = False, level_path: Optional[str] = None, headless: bool = False,
+                 seed: Optional[int] = None, threaded_physics: bool = THREADED_PHYSICS):
+        # Headless games run on SDL's dummy video driver and are stepped with
+        # run_headless() instead of run()
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pygame.init()
         self.screen = pygame.display.set_mode((800, 600))
         pygame.display.set_caption("Super Mario FX Beta")
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep()
         self.running = True
+        self.threaded_physics = threaded_physics
+        self.frame = 0  # Simulation steps so far
+        self.rng = random.Random(seed)  # Gameplay randomness, saved with the snapshots
         self.ascii_mode = False  # Add ASCII mode toggle
+        self.mode7 = False  # Mode-7 floor instead of the FX wave (M key)
+        self.mode7_yaw = 0.0
         
         # Initialize rendering system
         self.renderer = FTRender(800, 600)
+        self.renderer.enable_dirty_rects(dirty_rects)
+        
+        # Cached background layers, composited into a persistent buffer
+        self.background = pygame.Surface((800, 600))
+        self.layers = LayerCache()
+        self.layers.add_layer('sky', (800, 600), self.draw_sky)
         self.camera = pygame.math.Vector2(0, 0)
+        self.previous_camera = pygame.math.Vector2(0, 0)
         self.target_camera = pygame.math.Vector2(0, 0)
         
         # Initialize game objects
@@ -180,57 +1242,117 @@ class Game:
         self.luigi = GameObject(160, 100, 24, 32)
         self.game_objects = [self.mario, self.luigi]
         
-        # Create platforms
+        # Moving objects live in their own hash, updated incrementally each step
+        self.object_index = SpatialHash()
+        self.object_handles = [self.object_index.insert(obj, obj.bounds()) for obj in self.game_objects]
+        
+        # Create platforms, streamed from a chunked level file when one is given
         self.platforms = []
-        self.create_level()
+        self.platform_index = SpatialHash()
+        self.level = None
+        if level_path:
+            self.load_level(level_path)
+        else:
+            self.create_level()
         
         # Load textures and create render objects
         self.init_textures()
 
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
-        
-        # Add ASCII mode toggle with Tab key
+    def handle_input(self, keys=None):
+        # keys maps key codes to pressed state, the live keyboard (and the
+        # toggle keys) when None
+        if keys is None:
+            keys = pygame.key.get_pressed()
+            self.handle_events()
+                    
+        # Mario on the arrows and space, Luigi on A/D/W
+        for obj, left, right, jump in ((self.mario, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE),
+                                       (self.luigi, pygame.K_a, pygame.K_d, pygame.K_w)):
+            if keys[left]:
+                obj.move_left()
+            elif keys[right]:
+                obj.move_right()
+            if keys[jump]:
+                obj.jump()
+
+    def handle_events(self):
+        # Window close, and the view toggles: ASCII mode on Tab, Mode-7 floor on M
         for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_TAB:
                     self.ascii_mode = not self.ascii_mode
-                    
-        # [Rest of the existing input handling code]
+                    self.renderer.invalidate()
+                elif event.key == pygame.K_m:
+                    self.mode7 = not self.mode7
+
+    def render(self, alpha=1.0, state: Optional[RenderState] = None):
+        # Draws the live game, or a RenderState published by the physics
+        # thread while the simulation has moved on
+        if state is None:
+            # Camera interpolated between the last two simulation steps
+            camera_x, camera_y = self.previous_camera.lerp(self.camera, alpha)
+            platforms, platform_index = self.platforms, self.platform_index
+        else:
+            camera_x, camera_y = state.camera
+            platforms, platform_index = state.platforms, state.platform_index
 
-    def render(self):
         # Clear the render buffer
         self.renderer.clear_buffer()
+        self.renderer.set_camera(camera_x, camera_y)
         
-        # Create background with gradient
-        background = pygame.Surface((800, 600))
-        for y in range(600):
-            color = (92 - y//10, 148 - y//8, 252 - y//6)
-            pygame.draw.line(background, color, (0, y), (800, y))
+        # Queue the render objects near the view (interpolated between
+        # simulation steps), they are drawn in batches below
+        if state is None:
+            for obj in self.renderer.cull(self.game_objects, self.object_index, GameObject.bounds, CULL_MARGIN,
+                                          'objects'):
+                if obj.render_object:
+                    position = obj.interpolated_position(alpha)
+                    obj.render_object.position = (position.x, position.y)
+                    self.renderer.add_object(obj.render_object)
+        else:
+            for render_object, previous_x, previous_y, x, y, _, _ in self.renderer.cull(
+                    state.bodies, None, RenderState.body_bounds, CULL_MARGIN, 'objects'):
+                if render_object:
+                    render_object.position = (previous_x + (x - previous_x) * alpha,
+                                              previous_y + (y - previous_y) * alpha)
+                    self.renderer.add_object(render_object)
+        
+        # Dirty-rect mode keeps a static (unwarped) background and only
+        # pushes the damaged regions to the display
+        if self.renderer.dirty_rects_enabled and not self.ascii_mode:
+            if self.layers.composite(self.background, camera_x, camera_y):
+                self.renderer.invalidate()
+            self.renderer.present_dirty(self.screen, self.background, camera_x, camera_y,
+                                        platforms, platform_index=platform_index)
+            self.renderer.pool.end_frame()
+            return
+        
+        # Background from the layer cache
+        self.layers.composite(self.background, camera_x, camera_y)
             
-        # Apply FX perspective effect
-        transformed_bg = self.renderer.apply_fx_perspective(
-            background,
-            self.camera.x,
-            self.camera.y
-        )
+        # Fixed-size surface for all game elements, reused every frame
+        game_surface = self.renderer.pool.buffer('frame', (800, 600))
         
-        # Create a temporary surface for all game elements
-        game_surface = pygame.Surface((800, 600))
-        game_surface.blit(transformed_bg, (0, 0))
+        if self.mode7:
+            # Mode-7 ground plane under the sky, slowly rotating
+            game_surface.blit(self.background, (0, 0))
+            self.renderer.render_mode7(game_surface, self.floor_texture, camera_x, camera_y, self.mode7_yaw)
+            self.mode7_yaw += ROTATION_SPEED
+        else:
+            # Apply FX perspective effect
+            transformed_bg = self.renderer.apply_fx_perspective(
+                self.background,
+                camera_x,
+                camera_y
+            )
+            game_surface.blit(transformed_bg, (0, 0))
         
-        # Draw platforms
-        for platform in self.platforms:
-            rect = platform.copy()
-            rect.x -= self.camera.x
-            rect.y -= self.camera.y
-            pygame.draw.rect(game_surface, (139, 69, 19), rect)
+        # Draw the platforms in view
+        self.renderer.draw_platforms(game_surface, platforms, platform_index)
         
-        # Draw render objects
-        for obj in self.game_objects:
-            if obj.render_object:
-                pos = (obj.position.x - self.camera.x, obj.position.y - self.camera.y)
-                game_surface.blit(obj.render_object.texture, pos)
+        self.renderer.flush(game_surface, camera_x, camera_y)
         
         # Apply ASCII conversion if enabled
         if self.ascii_mode:
@@ -239,14 +1361,46 @@ class Game:
         # Final blit to screen
         self.screen.blit(game_surface, (0, 0))
         pygame.display.flip()
+        
+        # Recycle this frame's temporary surfaces
+        self.renderer.pool.end_frame()
+
+    def draw_sky(self, surface):
+        # Sky gradient, built once by the layer cache
+        for y in range(600):
+            color = (92 - y//10, 148 - y//8, 252 - y//6)
+            pygame.draw.line(surface, color, (0, y), (800, y))
 
     def create_level(self):
         # Create some platforms for the level
         self.platforms.append(pygame.Rect(50, 500, 200, 20))
         self.platforms.append(pygame.Rect(300, 400, 200, 20))
         self.platforms.append(pygame.Rect(550, 300, 200, 20))
+        self.platform_index.build(self.platforms)
+
+    def load_level(self, path):
+        # Stream platforms around the camera and start the players on the
+        # level's player spawns (in the chunks at the start of the level),
+        # with the camera on Mario
+        self.level = LevelStreamer(LevelFile(path), self.platform_index)
+        self.platforms = self.level.platforms
+        self.level.update(self.camera.x, self.screen.get_width())
+        spawns = [(x, y) for x, y, kind in self.level.loaded_spawns if kind == SPAWN_PLAYER]
+        for obj, handle, (x, y) in zip(self.game_objects, self.object_handles, spawns):
+            obj.position.update(x, y)
+            obj.previous_position.update(x, y)
+            self.object_index.move(handle, obj.bounds())
+        self.follow_camera(snap=True)
+        self.level.update(self.camera.x, self.screen.get_width())
 
     def init_textures(self):
+        # Checkerboard ground texture for the Mode-7 floor
+        self.floor_texture = pygame.Surface((256, 256))
+        for y in range(0, 256, 32):
+            for x in range(0, 256, 32):
+                color = (60, 160, 60) if (x + y) // 32 % 2 else (40, 120, 40)
+                self.floor_texture.fill(color, (x, y, 32, 32))
+
         # Load textures and create render objects for Mario and Luigi
         mario_texture = pygame.Surface((24, 32))
         mario_texture.fill((255, 0, 0))
@@ -256,101 +1410,150 @@ class Game:
         luigi_texture.fill((0, 255, 0))
         self.luigi.set_render_object(RenderObject(luigi_texture, (self.luigi.position.x, self.luigi.position.y)))
 
-    def run(self):
-        while self.running:
-            dt = self.clock.tick(60) / 1000.0
-            self.handle_input()
-            self.update(dt)
-            self.render()
+    def run(self, recorder=None):
+        # recorder (a replay.ReplayRecorder) is handed each step's keys just
+        # before the step runs
+        try:
+            if self.threaded_physics:
+                self.run_threaded(recorder)
+                return
+            while self.running:
+                frame_time = self.clock.tick(60) / 1000.0
+                self.handle_events()
+                keys = pygame.key.get_pressed()
+                # Simulate in fixed steps, render whatever time is left as
+                # alpha. Input forces only last one physics step, so apply
+                # them per step
+                for _ in range(self.timestep.advance(frame_time)):
+                    if recorder is not None:
+                        recorder.record_keys(keys)
+                    self.handle_input(keys)
+                    self.update(self.timestep.step)
+                self.render(self.timestep.alpha)
+        finally:
+            self.close()
 
-    def update(self, dt):
-        for obj in self.game_objects:
-            obj.update(dt)
-            obj.check_collision(self.platforms)
+    def close(self):
+        # Release the renderer's worker threads once the game is done
+        self.renderer.close()
 
-if __name__ == "__main__":
-    game = Game()
-    game.run()
+    def run_threaded(self, recorder=None):
+        # Pipelined loop: while the worker simulates frame N+1, the main
+        # thread composites and flips frame N from its RenderState. Events and
+        # the keyboard stay on the main thread, as SDL requires
+        physics = PhysicsThread(self, recorder)
+        try:
+            while self.running:
+                frame_time = self.clock.tick(60) / 1000.0
+                self.handle_events()
+                keys = pygame.key.get_pressed()
+                steps = self.timestep.advance(frame_time)
+                state = physics.collect()
+                physics.submit(keys, steps, self.timestep.alpha)
+                self.render(state.alpha, state)
+        finally:
+            physics.stop()
 
-class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((800, 600))
-        pygame.display.set_caption("Super Mario FX Beta")
-        self.clock = pygame.time.Clock()
-        self.running = True
-        self.ascii_mode = False  # Add ASCII mode toggle
-        
-        # Initialize rendering system
-        self.renderer = FTRender(800, 600)
-        self.camera = pygame.math.Vector2(0, 0)
-        self.target_camera = pygame.math.Vector2(0, 0)
-        
-        # Initialize game objects
-        self.mario = GameObject(100, 100, 24, 32)
-        self.luigi = GameObject(160, 100, 24, 32)
-        self.game_objects = [self.mario, self.luigi]
-        
-        # Create platforms
-        self.platforms = []
-        self.create_level()
+    def update(self, dt):
+        self.frame += 1
+        for obj, handle in zip(self.game_objects, self.object_handles):
+            obj.update(dt)
+            # Only the platforms sharing a grid cell with the object
+            obj.check_collision(self.platform_index.query(obj.bounds()))
+            self.object_index.move(handle, obj.bounds())
+        self.follow_camera()
         
-        # Load textures and create render objects
-        self.init_textures()
+        # Page level chunks in and out around the camera
+        if self.level is not None:
+            self.level.update(self.camera.x, self.screen.get_width())
 
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
+    def follow_camera(self, snap: bool = False):
+        # Smooth camera following, Mario centred on the 800x600 view; snap
+        # jumps straight to him (e.g. at a level's spawn)
+        self.target_camera.x = self.mario.position.x - 400
+        self.target_camera.y = self.mario.position.y - 300
         
-        # Add ASCII mode toggle with Tab key
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_TAB:
-                    self.ascii_mode = not self.ascii_mode
-                    
-        # [Rest of the existing input handling code]
+        self.previous_camera.update(self.camera)
+        if snap:
+            self.camera.update(self.target_camera)
+            self.previous_camera.update(self.camera)
+        else:
+            self.camera += (self.target_camera - self.camera) * CAMERA_SMOOTHING
 
-    def render(self):
-        # Clear the render buffer
-        self.renderer.clear_buffer()
-        
-        # Create background with gradient
-        background = pygame.Surface((800, 600))
-        for y in range(600):
-            color = (92 - y//10, 148 - y//8, 252 - y//6)
-            pygame.draw.line(background, color, (0, y), (800, y))
-            
-        # Apply FX perspective effect
-        transformed_bg = self.renderer.apply_fx_perspective(
-            background,
-            self.camera.x,
-            self.camera.y
-        )
-        
-        # Create a temporary surface for all game elements
-        game_surface = pygame.Surface((800, 600))
-        game_surface.blit(transformed_bg, (0, 0))
-        
-        # Draw platforms
-        for platform in self.platforms:
-            rect = platform.copy()
-            rect.x -= self.camera.x
-            rect.y -= self.camera.y
-            pygame.draw.rect(game_surface, (139, 69, 19), rect)
-        
-        # Draw render objects
-        for obj in self.game_objects:
-            if obj.render_object:
-                pos = (obj.position.x - self.camera.x, obj.position.y - self.camera.y)
-                game_surface.blit(obj.render_object.texture, pos)
-        
-        # Apply ASCII conversion if enabled
-        if self.ascii_mode:
-            game_surface = self.renderer.surface_to_ascii(game_surface)
-            
-        # Final blit to screen
-        self.screen.blit(game_surface, (0, 0))
-        pygame.display.flip()
+    def state(self) -> dict:
+        # Plain per-step state: [x, y, vx, vy, on_ground] per object and the camera
+        return {
+            'objects': [[obj.position.x, obj.position.y, obj.velocity.x, obj.velocity.y, obj.on_ground]
+                        for obj in self.game_objects],
+            'camera': [self.camera.x, self.camera.y],
+        }
+
+    def snapshot(self) -> bytes:
+        # Full simulation state in the fixed SNAPSHOT_* layout, cheap enough
+        # to take every step
+        _, twister, gauss = self.rng.getstate()
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self.game_objects), self.frame,
+                                      self.camera.x, self.camera.y, self.previous_camera.x,
+                                      self.previous_camera.y, self.target_camera.x, self.target_camera.y),
+                 SNAPSHOT_VIEW.pack(self.renderer.perspective_angle, self.mode7_yaw)]
+        parts.extend(SNAPSHOT_OBJECT.pack(*obj.position, *obj.previous_position, *obj.velocity, obj.on_ground)
+                     for obj in self.game_objects)
+        parts.append(SNAPSHOT_RNG.pack(*twister, gauss is not None, gauss or 0.0))
+        return b''.join(parts)
+
+    def restore(self, data: bytes, view: bool = True):
+        # Inverse of snapshot(), for a game with the same objects; view=False
+        # keeps the current perspective angle and Mode-7 yaw
+        magic, version, count, frame, *cameras = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Not a version {SNAPSHOT_VERSION} game snapshot")
+        if count != len(self.game_objects):
+            raise ValueError(f"Snapshot has {count} objects, the game has {len(self.game_objects)}")
+        if len(data) != SNAPSHOT_HEADER.size + SNAPSHOT_VIEW.size + count * SNAPSHOT_OBJECT.size + SNAPSHOT_RNG.size:
+            raise ValueError("Truncated or oversized game snapshot")
 
+        self.frame = frame
+        camera_x, camera_y, previous_x, previous_y, target_x, target_y = cameras
+        if view:
+            self.renderer.perspective_angle, self.mode7_yaw = SNAPSHOT_VIEW.unpack_from(data, SNAPSHOT_HEADER.size)
+        self.camera.update(camera_x, camera_y)
+        self.previous_camera.update(previous_x, previous_y)
+        self.target_camera.update(target_x, target_y)
+
+        offset = SNAPSHOT_HEADER.size + SNAPSHOT_VIEW.size
+        for obj, handle in zip(self.game_objects, self.object_handles):
+            x, y, previous_x, previous_y, vx, vy, obj.on_ground = SNAPSHOT_OBJECT.unpack_from(data, offset)
+            obj.position.update(x, y)
+            obj.previous_position.update(previous_x, previous_y)
+            obj.velocity.update(vx, vy)
+            self.object_index.move(handle, obj.bounds())
+            offset += SNAPSHOT_OBJECT.size
+
+        *twister, has_gauss, gauss = SNAPSHOT_RNG.unpack_from(data, offset)
+        self.rng.setstate((3, tuple(twister), gauss if has_gauss else None))
+
+        # Streamed levels follow the restored camera
+        if self.level is not None:
+            self.level.update(self.camera.x, self.screen.get_width())
+
+    def state_hash(self) -> int:
+        return snapshot_hash(self.snapshot())
+
+    def run_headless(self, inputs, steps: Optional[int] = None, record_every: int = 1) -> List[dict]:
+        # Step the simulation as fast as possible from scripted inputs (one
+        # key state per step, e.g. headless.ScriptedInput), without rendering.
+        # Returns the state every record_every steps plus the final one
+        steps = len(inputs) if steps is None else steps
+        dt = self.timestep.step
+        states = []
+        for step in range(steps):
+            self.handle_input(inputs[step])
+            self.update(dt)
+            if record_every and (step + 1) % record_every == 0:
+                states.append(dict(self.state(), step=step + 1))
+        if not states or states[-1]['step'] != steps:
+            states.append(dict(self.state(), step=steps))
+        return states
 
 if __name__ == "__main__":
     game = Game()
@@ -1,5 +1,6 @@
 
 import pygame
+import fontcache
 import sys
 import json
 import os
@@ -10,8 +11,12 @@ WIDTH, HEIGHT = 640, 480
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("SM64 VHS Menu")
 
-font = pygame.font.SysFont("Courier New", 24, bold=True)
-big_font = pygame.font.SysFont("Arial Black", 48)
+# Menu text goes through the shared font registry and text cache
+def render_small(text, color):
+    return fontcache.render_text(text, 24, color, "Courier New", sysfont=True, bold=True)
+
+def render_big(text, color):
+    return fontcache.render_text(text, 48, color, "Arial Black", sysfont=True)
 
 save_path = "saves.json"
 files = [{"name": "Mario A", "stars": 0}, {"name": "Mario B", "stars": 0},
@@ -29,25 +34,47 @@ def save_saves():
     with open(save_path, "w") as f:
         json.dump(data, f)
 
+VHS_NOISE_FRAMES = 8
+vhs_backgrounds = []
+vhs_tick = 0
+
 def draw_vhs_background():
-    for y in range(0, HEIGHT, 10):
-        color = (random.randint(50, 100), random.randint(0, 50), random.randint(100, 255))
-        pygame.draw.line(screen, color, (0, y), (WIDTH, y))
+    # Pre-render a handful of noise frames once, then cycle through them in
+    # order, one per drawn frame.
+    # The gaps between the stripes are colorkeyed (no stripe is ever black)
+    # so whatever is already on screen shows through, as before
+    global vhs_tick
+    if not vhs_backgrounds:
+        for _ in range(VHS_NOISE_FRAMES):
+            frame = pygame.Surface((WIDTH, HEIGHT)).convert()
+            frame.fill((0, 0, 0))
+            frame.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            for y in range(0, HEIGHT, 10):
+                color = (random.randint(50, 100), random.randint(0, 50), random.randint(100, 255))
+                pygame.draw.line(frame, color, (0, y), (WIDTH, y))
+            vhs_backgrounds.append(frame)
+    screen.blit(vhs_backgrounds[vhs_tick % len(vhs_backgrounds)], (0, 0))
+    vhs_tick += 1
+
+def vhs_background_bytes():
+    # Pixel memory held by the pre-rendered stripe frames, counted the same
+    # way as testengine.LayerCache.memory_bytes
+    return sum(frame.get_pitch() * frame.get_height() for frame in vhs_backgrounds)
 
 def draw_main_menu():
     draw_vhs_background()
-    title = big_font.render("SUPER MARIO", True, (255, 0, 255))
+    title = render_big("SUPER MARIO", (255, 0, 255))
     screen.blit(title, (WIDTH//2 - title.get_width()//2, 100))
 
-    press = font.render("PRESS Z OR ENTER", True, (255, 255, 255))
+    press = render_small("PRESS Z OR ENTER", (255, 255, 255))
     screen.blit(press, (WIDTH//2 - press.get_width()//2, 200))
 
-    static_text = font.render("SP 00:00:00", True, (255, 255, 255))
+    static_text = render_small("SP 00:00:00", (255, 255, 255))
     screen.blit(static_text, (20, HEIGHT - 40))
 
 def draw_file_select():
     screen.fill((218, 165, 32))  # golden background
-    title = big_font.render("SELECT FILE", True, (255, 0, 255))
+    title = render_big("SELECT FILE", (255, 0, 255))
     screen.blit(title, (WIDTH//2 - title.get_width()//2, 30))
 
     for i, file in enumerate(files):
@@ -57,14 +84,14 @@ def draw_file_select():
         pygame.draw.rect(screen, (255, 255, 255), box)
         pygame.draw.rect(screen, (0, 0, 0), box, 2)
 
-        name_text = font.render(file["name"], True, (0, 0, 0))
-        star_text = font.render(f"★ {file['stars']}" if file["stars"] > 0 else "NEW", True, (0, 0, 0))
+        name_text = render_small(file["name"], (0, 0, 0))
+        star_text = render_small(f"★ {file['stars']}" if file["stars"] > 0 else "NEW", (0, 0, 0))
         screen.blit(name_text, (x + 10, y + 5))
         screen.blit(star_text, (x + 10, y + 30))
 
 def draw_castle(file_idx):
     screen.fill((100, 149, 237))
-    text = big_font.render(f"Welcome to the Castle, {files[file_idx]['name']}!", True, (255, 255, 255))
+    text = render_big(f"Welcome to the Castle, {files[file_idx]['name']}!", (255, 255, 255))
     screen.blit(text, (WIDTH//2 - text.get_width()//2, HEIGHT//2 - text.get_height()//2))
 
 def main():